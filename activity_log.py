@@ -0,0 +1,133 @@
+"""Activity history with running totals kept up to date on every write"""
+from collections import deque
+from datetime import datetime
+from enum import Enum
+
+from session_store import ServerSideSession, full_activity_history
+
+MAX_RECENT_ACTIVITIES = 20
+
+
+class ActivityCategory(str, Enum):
+    ACCOUNT = 'account'
+    COMMUNICATION = 'communication'
+
+
+class ActivityLog:
+    """Bounded recent activities plus aggregates, stored in the session.
+
+    ``recent`` is newest first and holds at most ``max_recent`` entries.
+    ``totals`` is updated as entries are recorded, so reading progress never
+    rescans the history.
+    """
+
+    def __init__(self, recent=(), totals=None,
+                 max_recent=MAX_RECENT_ACTIVITIES):
+        self.recent = deque(recent, maxlen=max_recent)
+        self.totals = {
+            'activities': 0,
+            'xp': 0,
+            'scenarios_completed': 0,
+            'communication_xp': 0,
+            'per_scenario': {}
+        }
+        if totals:
+            self.totals.update(totals)
+
+    def record(self, category, title, description, xp=0, scenario=None):
+        """Add an activity; returns the entry pushed out of ``recent``, if any"""
+        category = ActivityCategory(category)
+        entry = {
+            'title': title,
+            'description': description,
+            'xp': xp,
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'category': category.value
+        }
+        if scenario:
+            entry['scenario'] = scenario
+        return self.add(entry)
+
+    def add(self, entry):
+        evicted = None
+        if len(self.recent) == self.recent.maxlen:
+            evicted = self.recent.pop()
+        self.recent.appendleft(entry)
+
+        totals = self.totals
+        totals['activities'] += 1
+        totals['xp'] += entry.get('xp', 0)
+        if entry.get('category') == ActivityCategory.COMMUNICATION:
+            totals['scenarios_completed'] += 1
+            totals['communication_xp'] += entry.get('xp', 0)
+            scenario = entry.get('scenario')
+            if scenario:
+                totals['per_scenario'][scenario] = \
+                    totals['per_scenario'].get(scenario, 0) + 1
+        return evicted
+
+    def recent_in(self, category, limit=5):
+        """Newest entries of one category among the recent ones"""
+        matches = []
+        for entry in self.recent:
+            if entry.get('category') == category:
+                matches.append(entry)
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+def _categorize(entry, scenario_titles):
+    """Category for entries written before activities were typed"""
+    title = entry.get('title', '')
+    if not title.startswith('Completed '):
+        return dict(entry, category=ActivityCategory.ACCOUNT.value)
+    entry = dict(entry, category=ActivityCategory.COMMUNICATION.value)
+    scenario = scenario_titles.get(title[len('Completed '):])
+    if scenario:
+        entry['scenario'] = scenario
+    return entry
+
+
+def load_activity_log(session, scenario_titles=None):
+    """ActivityLog for this session.
+
+    Sessions from before the log existed only have ``activity_history``;
+    their totals are rebuilt once from the full history and stored back in
+    the session. ``scenario_titles`` maps scenario titles to ids for that
+    one-off categorization.
+    """
+    totals = session.get('activity_totals')
+    if totals is not None:
+        return ActivityLog(session.get('activity_history', ()), totals)
+
+    log = ActivityLog()
+    for entry in reversed(full_activity_history(session)):
+        if 'category' not in entry:
+            entry = _categorize(entry, scenario_titles or {})
+        log.add(entry)
+    if isinstance(session, ServerSideSession):
+        # Keep session entries that no longer fit in ``recent``
+        overflow = session.get('activity_history', [])[log.recent.maxlen:]
+        if overflow:
+            session.backend.append_history(session.sid, overflow[::-1])
+    _store(session, log)
+    return log
+
+
+def _store(session, log):
+    session['activity_history'] = list(log.recent)
+    session['activity_totals'] = log.totals
+
+
+def record_activity(session, category, title, description, xp=0,
+                    scenario=None, scenario_titles=None):
+    """Record an activity in the session's log and store the log back"""
+    log = load_activity_log(session, scenario_titles)
+    evicted = log.record(category, title, description, xp=xp,
+                         scenario=scenario)
+    if evicted is not None and isinstance(session, ServerSideSession):
+        # Server-side sessions keep older history out of the session itself
+        session.backend.append_history(session.sid, [evicted])
+    _store(session, log)
+    return log
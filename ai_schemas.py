@@ -0,0 +1,68 @@
+"""Response schemas for the structured (JSON) mode of the AI features.
+
+Each model is passed to Gemini as ``response_schema``, so the reply is JSON
+of that shape, and is used again to validate the reply before it is cached
+or returned.
+"""
+from pydantic import BaseModel, Field
+
+
+class CareerGuidance(BaseModel):
+    answer: str = Field(description="Direct answer to the user's question")
+    next_steps: list[str] = Field(
+        description="Specific, actionable next steps")
+
+
+class InterviewFeedback(BaseModel):
+    score: int = Field(ge=1, le=10,
+                       description="Overall quality of the answer, 1-10")
+    strengths: list[str]
+    improvements: list[str] = Field(description="Areas for improvement")
+    suggestions: list[str] = Field(
+        description="Specific suggestions for enhancement")
+    sample_response: str = Field(description="A sample improved response")
+
+
+class AnswerFeedback(InterviewFeedback):
+    index: int = Field(description="Number of the answer being graded")
+
+
+class InterviewFeedbackBatch(BaseModel):
+    answers: list[AnswerFeedback] = Field(
+        description="Feedback for every numbered answer, in order")
+
+
+class NetworkingItem(BaseModel):
+    category: str = Field(
+        description="One of: people, platform, conversation, relationship")
+    action: str = Field(description="What to do, in one sentence")
+    detail: str = Field(description="How and why, in one or two sentences")
+
+
+class NetworkingPlan(BaseModel):
+    summary: str
+    items: list[NetworkingItem]
+
+
+class Milestone(BaseModel):
+    timeframe: str = Field(description="e.g. '0-6 months', '1-2 years'")
+    goal: str
+    actions: list[str]
+
+
+class CareerTrajectory(BaseModel):
+    current_position: str = Field(
+        description="Assessment of the user's current position")
+    milestones: list[Milestone] = Field(
+        description="Short-term then long-term milestones, in order")
+    skill_gaps: list[str]
+    next_steps: list[str]
+
+
+class ScenarioFeedback(BaseModel):
+    feedback: str = Field(
+        description="Brief, constructive feedback on the latest response")
+    suggestions: list[str] = Field(
+        description="Specific suggestions for improvement")
+    next_prompt: str = Field(
+        description="The follow-up question or next challenge for the user")
@@ -1,234 +1,208 @@
-from flask import Flask, render_template, request, jsonify, session, redirect
+from flask import Flask, render_template, request, jsonify, session, redirect, Response, stream_with_context
 import json
 import re
 import os
-from datetime import datetime
+import threading
+import time
+from activity_log import ActivityCategory, record_activity
 from career_advisor import AIGrowthCompanion
 from communication_coach import CommunicationCoach
+from catalogue import (CatalogueStore, ListCatalogue, StoredDocuments,
+                       read_jsonl)
+from intent_router import IntentRouter
+from internship_index import InternshipIndex, normalize_internship
+from metrics import metrics
+from recommendation_cache import RecommendationCache, profile_fingerprint
+from session_store import (MemorySessionBackend, ServerSideSessionInterface,
+                           SQLiteSessionBackend, regenerate)
+from skill_taxonomy import taxonomy as skill_taxonomy
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('FLASK_SECRET_KEY',
                                 'dev-key-change-in-production')
-
-# Sample dataset for internships
-INTERNSHIPS = [{
-    "id": 1,
-    "title": "Software Engineering Intern",
-    "company": "TechCorp",
-    "location": "San Francisco, CA",
-    "description":
-    "Work on full-stack web development projects using Python, JavaScript, and React",
-    "required_skills": ["Python", "JavaScript", "React", "Git"],
-    "preferred_degree": ["Computer Science", "Software Engineering"],
-    "experience_level": "entry",
-    "duration": "3 months",
-    "stipend": "$2500/month"
-}, {
-    "id":
-    2,
-    "title":
-    "Data Science Intern",
-    "company":
-    "DataFlow Analytics",
-    "location":
-    "New York, NY",
-    "description":
-    "Analyze large datasets and build machine learning models for business insights",
-    "required_skills": ["Python", "Machine Learning", "SQL", "Statistics"],
-    "preferred_degree":
-    ["Data Science", "Statistics", "Computer Science", "Mathematics"],
-    "experience_level":
-    "intermediate",
-    "duration":
-    "4 months",
-    "stipend":
-    "$3000/month"
-}, {
-    "id":
-    3,
-    "title":
-    "Marketing Analytics Intern",
-    "company":
-    "BrandBoost",
-    "location":
-    "Chicago, IL",
-    "description":
-    "Support marketing campaigns with data analysis and performance tracking",
-    "required_skills": ["Excel", "Analytics", "Communication", "Marketing"],
-    "preferred_degree": ["Marketing", "Business", "Economics"],
-    "experience_level":
-    "entry",
-    "duration":
-    "3 months",
-    "stipend":
-    "$2000/month"
-}, {
-    "id":
-    4,
-    "title":
-    "UX Design Intern",
-    "company":
-    "DesignStudio",
-    "location":
-    "Austin, TX",
-    "description":
-    "Create user-centered designs and conduct usability testing",
-    "required_skills":
-    ["Design Thinking", "Figma", "User Research", "Prototyping"],
-    "preferred_degree": ["Design", "Psychology", "Human-Computer Interaction"],
-    "experience_level":
-    "entry",
-    "duration":
-    "4 months",
-    "stipend":
-    "$2200/month"
-}, {
-    "id":
-    5,
-    "title":
-    "Cybersecurity Intern",
-    "company":
-    "SecureNet",
-    "location":
-    "Washington, DC",
-    "description":
-    "Assist in threat analysis and security protocol implementation",
-    "required_skills":
-    ["Network Security", "Python", "Risk Assessment", "Linux"],
-    "preferred_degree":
-    ["Cybersecurity", "Computer Science", "Information Technology"],
-    "experience_level":
-    "intermediate",
-    "duration":
-    "6 months",
-    "stipend":
-    "$2800/month"
-}, {
-    "id":
-    6,
-    "title":
-    "Finance Intern",
-    "company":
-    "InvestPro",
-    "location":
-    "Boston, MA",
-    "description":
-    "Support financial analysis and investment research",
-    "required_skills":
-    ["Financial Analysis", "Excel", "Research", "Communication"],
-    "preferred_degree": ["Finance", "Economics", "Business", "Accounting"],
-    "experience_level":
-    "entry",
-    "duration":
-    "3 months",
-    "stipend":
-    "$2600/month"
-}]
-
-# Sample dataset for degree suggestions
-DEGREE_SUGGESTIONS = {
-    "Software Engineering": [{
-        "degree":
-        "Master's in Computer Science",
-        "reason":
-        "Advanced programming skills and system design knowledge"
-    }, {
-        "degree":
-        "Certification in Cloud Computing",
-        "reason":
-        "High demand for cloud expertise in tech companies"
-    }, {
-        "degree":
-        "Data Structures and Algorithms Bootcamp",
-        "reason":
-        "Essential for technical interviews at top tech companies"
-    }],
-    "Data Science": [{
-        "degree":
-        "Master's in Data Science",
-        "reason":
-        "Deep expertise in advanced analytics and machine learning"
-    }, {
-        "degree":
-        "Statistics and Probability Certification",
-        "reason":
-        "Strong foundation for data interpretation and model validation"
-    }, {
-        "degree":
-        "Big Data Technologies Course",
-        "reason":
-        "Skills in Hadoop, Spark, and distributed computing"
-    }],
-    "Marketing": [{
-        "degree": "Digital Marketing Certification",
-        "reason": "Modern marketing requires digital expertise"
-    }, {
-        "degree":
-        "Master's in Business Administration (MBA)",
-        "reason":
-        "Leadership skills and strategic thinking for senior roles"
-    }, {
-        "degree":
-        "Data Analytics for Marketing Certificate",
-        "reason":
-        "Data-driven decision making is crucial in modern marketing"
-    }],
-    "Design": [{
-        "degree":
-        "Master's in Human-Computer Interaction",
-        "reason":
-        "Advanced understanding of user behavior and interface design"
-    }, {
-        "degree": "Frontend Development Bootcamp",
-        "reason": "Technical skills to implement your designs"
-    }, {
-        "degree":
-        "Design Thinking Certification",
-        "reason":
-        "Structured approach to problem-solving and innovation"
-    }],
-    "Cybersecurity": [{
-        "degree":
-        "Master's in Cybersecurity",
-        "reason":
-        "Advanced knowledge of security protocols and threat analysis"
-    }, {
-        "degree":
-        "Certified Information Security Manager (CISM)",
-        "reason":
-        "Industry-recognized certification for security management"
-    }, {
-        "degree":
-        "Ethical Hacking Certification",
-        "reason":
-        "Hands-on skills in identifying and preventing security vulnerabilities"
-    }],
-    "Finance": [{
-        "degree":
-        "Master's in Finance (MFin)",
-        "reason":
-        "Advanced financial modeling and investment strategies"
-    }, {
-        "degree":
-        "Chartered Financial Analyst (CFA)",
-        "reason":
-        "Gold standard certification for investment professionals"
-    }, {
-        "degree":
-        "Financial Technology (FinTech) Certificate",
-        "reason":
-        "Skills in emerging financial technologies and blockchain"
-    }]
-}
+os.makedirs(app.instance_path, exist_ok=True)
+# Request timing and /metrics, with MENTORA_METRICS=1
+metrics.init_app(app)
+
+# Session data is kept server-side; the cookie only carries a signed id.
+# MENTORA_SESSION_BACKEND=cookie restores Flask's signed-cookie sessions.
+SESSION_BACKEND = os.environ.get('MENTORA_SESSION_BACKEND', 'sqlite')
+SESSION_HOT_HISTORY = int(os.environ.get('MENTORA_SESSION_HOT_HISTORY', 20))
+# About one save in this many also deletes expired sessions; 0 never does
+SESSION_PURGE_EVERY = int(os.environ.get('MENTORA_SESSION_PURGE_EVERY', 1000))
+if SESSION_BACKEND == 'sqlite':
+    app.session_interface = ServerSideSessionInterface(
+        SQLiteSessionBackend(
+            os.environ.get('MENTORA_SESSION_DB',
+                           os.path.join(app.instance_path, 'sessions.db'))),
+        hot_history=SESSION_HOT_HISTORY,
+        purge_every=SESSION_PURGE_EVERY)
+elif SESSION_BACKEND == 'memory':
+    app.session_interface = ServerSideSessionInterface(
+        MemorySessionBackend(), hot_history=SESSION_HOT_HISTORY,
+        purge_every=SESSION_PURGE_EVERY)
+
+# Internship catalogue, seeded from the bundled sample data on first boot
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+CATALOGUE_PATH = os.environ.get(
+    'MENTORA_CATALOGUE_DB', os.path.join(app.instance_path, 'catalogue.db'))
+os.makedirs(os.path.dirname(CATALOGUE_PATH), exist_ok=True)
+
+
+def seed_catalogue(store):
+    """Load the bundled sample data into an empty catalogue store"""
+    with open(os.path.join(DATA_DIR, 'degree_suggestions.json'),
+              encoding='utf-8') as f:
+        degree_suggestions = json.load(f)
+    store.replace(internships=read_jsonl(
+        os.path.join(DATA_DIR, 'internships.jsonl')),
+                  degree_suggestions=degree_suggestions,
+                  only_if_empty=True)
+
+
+# Page sizes for the ranked "more internships" catalogue in /api/chat
+ALL_INTERNSHIPS_PAGE_SIZE = 10
+MAX_INTERNSHIPS_PAGE_SIZE = 50
+MAX_TONE_BATCH = 100
+MAX_INTERVIEW_ANSWERS = 20
+
+# Catalogues of at least MENTORA_SHARD_MIN_LISTINGS positions are matched by
+# MENTORA_MATCH_SHARDS worker processes, when that is above 1; smaller ones
+# are scored in-process, where a query costs less than handing it out
+MATCH_SHARDS = int(os.environ.get('MENTORA_MATCH_SHARDS', 1))
+SHARD_MIN_LISTINGS = int(os.environ.get('MENTORA_SHARD_MIN_LISTINGS', 200000))
+
+
+def display_score(score):
+    """A match score as served to clients; ranking uses the exact value"""
+    return round(score, 1)
 
 
 class InternshipMatcher:
 
-    def __init__(self):
+    def __init__(self, catalogue, reload_interval=2.0, cache=None, shards=1,
+                 shard_min_listings=SHARD_MIN_LISTINGS):
+        """``catalogue`` is a catalogue store or a plain list of internships.
+
+        With ``shards`` above 1, catalogues of at least
+        ``shard_min_listings`` positions are indexed and ranked by that
+        many worker processes, see sharded_matcher.
+        """
         self.user_profile = {}
+        if isinstance(catalogue, list):
+            catalogue = ListCatalogue(catalogue)
+        self.catalogue = catalogue
+        self.reload_interval = reload_interval
+        self.cache = cache if cache is not None else RecommendationCache()
+        self.shards = shards
+        self.shard_min_listings = shard_min_listings
+        self._current = None  # (index, catalogue version)
+        self._checked_at = 0
+        # Held while reading the index, since listings change it in place
+        self.lock = threading.RLock()
+        self._listeners = []
+
+    def _snapshot(self):
+        """The current (index, version), rebuilt when the catalogue changes"""
+        now = time.monotonic()
+        if self._current is None or \
+                now - self._checked_at >= self.reload_interval:
+            with self.lock:
+                self._checked_at = now
+                version = self.catalogue.version()
+                if self._current is None or version != self._current[1]:
+                    index = self._build_index()
+                    self._close(self._current)
+                    self._current = (index, version)
+                    self.cache.clear()
+                    for listener in self._listeners:
+                        listener(index, None)
+        return self._current
+
+    def _build_index(self):
+        if self.shards > 1 and \
+                self.catalogue.positions() >= self.shard_min_listings:
+            # Imported here so in-process matching never loads it
+            from sharded_matcher import ShardedIndex
+            return ShardedIndex(self.catalogue, self.shards)
+        return InternshipIndex(self.catalogue.documents(),
+                               self.catalogue.normalized())
+
+    @staticmethod
+    def _close(current):
+        """Stop the worker processes of a replaced sharded index"""
+        if current is not None and hasattr(current[0], 'close'):
+            current[0].close()
+
+    def subscribe(self, listener):
+        """Call ``listener(index, change)`` after each catalogue change.
+
+        ``change`` is the ListingChange of a listing added, updated or
+        removed through this matcher, or None when the index was rebuilt.
+        """
+        self._listeners.append(listener)
+
+    def add_internship(self, internship):
+        """Add a listing; returns its position"""
+        return self._change(lambda: self.catalogue.add(internship), None,
+                            internship)
+
+    def update_internship(self, position, internship):
+        """Replace the listing at ``position``; KeyError if there is none"""
+        self._change(lambda: self.catalogue.update(position, internship),
+                     position, internship)
+
+    def remove_internship(self, position):
+        """Remove the listing at ``position``; KeyError if there is none"""
+        self._change(lambda: self.catalogue.remove(position), position, None)
+
+    def _change(self, write, position, internship):
+        """Write one listing change and patch the index in place"""
+        with self.lock:
+            index, version = self._snapshot()
+            old = None if position is None else normalize_internship(
+                self.catalogue.get(position))
+            written = write()
+            if position is None:
+                position = written
+            if self.catalogue.version() != version + 1 or \
+                    not isinstance(index, InternshipIndex):
+                # Another process changed the catalogue too, or the shards
+                # hold the index; start over
+                self._close(self._current)
+                self._current = None
+                self._snapshot()
+                return position
+            if internship is None:
+                change = index.remove_listing(position, old)
+            else:
+                change = index.set_listing(position,
+                                           normalize_internship(internship),
+                                           old)
+            if isinstance(index.internships, StoredDocuments):
+                index.internships.refresh(self.catalogue.positions())
+            self._current = (index, version + 1)
+            self.cache.clear()
+            for listener in self._listeners:
+                listener(index, change)
+            return position
+
+    @property
+    def index(self):
+        """Index of the current catalogue"""
+        return self._snapshot()[0]
+
+    def memoized(self, key, compute):
+        """``compute()``, cached under ``key`` for this catalogue version"""
+        _, version = self._snapshot()
+        return self.cache.get_or_compute((version, ) + key, compute)
 
     def calculate_match_score(self, user_profile, internship):
         """Calculate how well a user matches an internship (0-100 score)"""
+        with metrics.span('matcher.calculate_match_score'):
+            return self._match_score(user_profile, internship)
+
+    def _match_score(self, user_profile, internship):
         score = 0
 
         # Degree match (30 points)
@@ -242,20 +216,13 @@ class InternshipMatcher:
                    for keyword in ['computer', 'engineering', 'science']):
                 score += 15
 
-        # Skills match (40 points)
-        user_skills = [
-            skill.lower().strip()
-            for skill in user_profile.get('skills', '').split(',')
-        ]
-        required_skills = [
-            skill.lower() for skill in internship['required_skills']
-        ]
-
-        matching_skills = sum(1 for skill in user_skills
-                              if any(req_skill in skill or skill in req_skill
-                                     for req_skill in required_skills))
-        skill_score = min(40, (matching_skills / len(required_skills)) * 40)
-        score += skill_score
+        # Skills match (40 points): shared canonical skill ids
+        user_skills = skill_taxonomy.parse(user_profile.get('skills', ''))
+        required_skills = skill_taxonomy.listing_skills(
+            internship['required_skills'])
+        if required_skills:
+            matching_skills = len(required_skills & user_skills)
+            score += min(40, (matching_skills / len(required_skills)) * 40)
 
         # Experience level match (20 points)
         user_exp = user_profile.get('experience_level', 'entry').lower()
@@ -267,34 +234,125 @@ class InternshipMatcher:
              (user_exp == 'advanced' and internship_exp in ['entry', 'intermediate']):
             score += 15
 
-        # Interest/goal alignment (10 points)
-        user_interests = user_profile.get('career_goals', '').lower()
-        if any(word in user_interests
-               for word in internship['title'].lower().split()):
-            score += 10
+        # Interest/goal alignment (10 points): TF-IDF cosine similarity of
+        # goals and interests with the listing's title and description
+        with self.lock:
+            score += self.index.listing_goal_points(user_profile, internship)
 
         return min(100, score)
 
-    def get_recommendations(self, user_profile):
+    def get_recommendations(self, user_profile, limit=5, min_score=20):
         """Get internship recommendations for a user"""
-        scored_internships = []
-
-        for internship in INTERNSHIPS:
-            score = self.calculate_match_score(user_profile, internship)
-            if score > 20:  # Only recommend if score is above 20%
-                scored_internships.append({
-                    'internship': internship,
-                    'match_score': score
-                })
-
-        # Sort by match score (highest first)
-        scored_internships.sort(key=lambda x: x['match_score'], reverse=True)
-        return scored_internships[:5]  # Return top 5 matches
+        # Only recommend if score is above min_score (20% by default)
+        with metrics.span('matcher.get_recommendations'), self.lock:
+            index, version = self._snapshot()
+            ranked = self.cache.get_or_compute(
+                (version, 'top_k', profile_fingerprint(user_profile), limit,
+                 min_score), lambda: tuple(
+                     index.top_k(user_profile, k=limit, min_score=min_score)))
+            return [{
+                'internship': index.internships[position],
+                'match_score': display_score(score)
+            } for position, score in ranked]
+
+    def find_by_goals(self, user_profile, limit=10):
+        """Listings whose text best matches the user's goals and interests"""
+        with metrics.span('matcher.find_by_goals'), self.lock:
+            index = self.index
+            return [{
+                'internship': index.internships[position],
+                'relevance': round(similarity, 4)
+            } for position, similarity in index.goal_matches(user_profile,
+                                                             n=limit)]
+
+    def get_ranked_page(self, user_profile, limit=10, cursor=None):
+        """Get one page of the whole catalogue ranked for a user.
+
+        Returns the page and the cursor for the next one (None on the last
+        page). Raises ValueError for a cursor this matcher did not issue.
+        """
+        after = self._decode_cursor(cursor) if cursor else None
+        with metrics.span('matcher.get_ranked_page'), self.lock:
+            index, version = self._snapshot()
+            ranked = self.cache.get_or_compute(
+                (version, 'page', profile_fingerprint(user_profile), limit,
+                 after), lambda: tuple(
+                     index.top_k(user_profile, k=limit, min_score=None,
+                                 after=after)))
+            page = [{
+                'internship': index.internships[position],
+                'match_score': display_score(score)
+            } for position, score in ranked]
+        next_cursor = None
+        if len(ranked) == limit:
+            position, score = ranked[-1]
+            next_cursor = f"{score!r}:{position}"
+        return page, next_cursor
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        score, _, position = str(cursor).partition(':')
+        return float(score), int(position)
+
+    def score_matrix(self, user_profiles, top_k=None):
+        """Score many profiles against the whole catalogue in one batch"""
+        # NumPy is only needed by offline re-ranking jobs, not request workers
+        from batch_scoring import score_matrix
+        with self.lock:
+            index = self.index
+            if not isinstance(index, InternshipIndex):
+                # Batch jobs score in-process, over an index of their own
+                index = InternshipIndex(self.catalogue.documents(),
+                                        self.catalogue.normalized())
+            return score_matrix(user_profiles, index, top_k=top_k,
+                                min_score=20 if top_k is not None else None)
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """Matcher over the catalogue store, opened on first use in a worker.
+
+    Nothing touches the catalogue at import time, so a gunicorn --preload
+    master never holds a SQLite connection its workers would inherit.
+    """
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                store = CatalogueStore(CATALOGUE_PATH)
+                seed_catalogue(store)
+                _matcher = InternshipMatcher(
+                    store, cache=RecommendationCache.from_env(),
+                    shards=MATCH_SHARDS)
+    return _matcher
 
 
-matcher = InternshipMatcher()
 career_companion = AIGrowthCompanion()
-communication_coach = CommunicationCoach()
+# Pre-generated scenario intros; set MENTORA_INTRO_POOL_DB='' to disable
+communication_coach = CommunicationCoach(
+    intro_pool_path=os.environ.get(
+        'MENTORA_INTRO_POOL_DB', os.path.join(app.instance_path,
+                                              'intros.db')),
+    intro_pool_size=int(os.environ.get('MENTORA_INTRO_POOL_SIZE', 5)))
+
+
+def event_stream(chunks, done=None):
+    """Serve text chunks as Server-Sent Events, then a final 'done' event"""
+
+    def events():
+        for chunk in chunks:
+            yield f"data: {json.dumps({'text': chunk})}\n\n"
+        yield f"event: done\ndata: {json.dumps(done or {})}\n\n"
+
+    return Response(stream_with_context(events()),
+                    mimetype='text/event-stream',
+                    headers={
+                        'Cache-Control': 'no-cache',
+                        'X-Accel-Buffering': 'no'
+                    })
 
 
 @app.route('/')
@@ -329,6 +387,9 @@ def handle_login():
                 'error': 'Email and role are required'
             })
 
+        # A new session id on login, so one set before it can't be reused
+        regenerate(session)
+
         # Store user info in session - this integrates with MENTORA dashboard
         session['user_email'] = email
         session['user_role'] = role
@@ -339,16 +400,9 @@ def handle_login():
             session['user_xp'] = 10  # Welcome bonus XP
 
         # Add login achievement to activity history
-        if 'activity_history' not in session:
-            session['activity_history'] = []
-
-        session['activity_history'].insert(
-            0, {
-                'title': 'Welcome to MENTORA!',
-                'description': f'Joined as a {role.title()}',
-                'xp': 10,
-                'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
+        record_activity(session, ActivityCategory.ACCOUNT,
+                        'Welcome to MENTORA!', f'Joined as a {role.title()}',
+                        xp=10)
 
         return jsonify({
             'success': True,
@@ -368,6 +422,31 @@ def handle_login():
         })
 
 
+def suggest_degrees(degree_suggestions, degree_field, career_goals):
+    """Degrees to suggest for a lowercased degree field and career goals"""
+    for field, suggestions in degree_suggestions.items():
+        if field.lower() in degree_field or any(
+                keyword in degree_field for keyword in field.lower().split()):
+            if suggestions:
+                return suggestions
+            break
+
+    # If no specific match, provide general suggestions based on career goals
+    if 'tech' in career_goals or 'software' in career_goals or 'programming' in career_goals:
+        return degree_suggestions['Software Engineering']
+    elif 'data' in career_goals or 'analytics' in career_goals:
+        return degree_suggestions['Data Science']
+    elif 'marketing' in career_goals or 'business' in career_goals:
+        return degree_suggestions['Marketing']
+    elif 'design' in career_goals or 'ui' in career_goals or 'ux' in career_goals:
+        return degree_suggestions['Design']
+    elif 'security' in career_goals or 'cyber' in career_goals:
+        return degree_suggestions['Cybersecurity']
+    elif 'finance' in career_goals or 'investment' in career_goals:
+        return degree_suggestions['Finance']
+    return []
+
+
 @app.route('/api/submit-profile', methods=['POST'])
 def submit_profile():
     """Handle user profile submission and return internship recommendations"""
@@ -377,33 +456,16 @@ def submit_profile():
     session['user_profile'] = data
 
     # Get internship recommendations
+    matcher = get_matcher()
     recommendations = matcher.get_recommendations(data)
 
     # Get degree suggestions based on user's field of interest
     degree_field = data.get('degree', '').lower()
-    suggested_degrees = []
-
-    for field, suggestions in DEGREE_SUGGESTIONS.items():
-        if field.lower() in degree_field or any(
-                keyword in degree_field for keyword in field.lower().split()):
-            suggested_degrees = suggestions
-            break
-
-    # If no specific match, provide general suggestions based on career goals
-    if not suggested_degrees:
-        career_goals = data.get('career_goals', '').lower()
-        if 'tech' in career_goals or 'software' in career_goals or 'programming' in career_goals:
-            suggested_degrees = DEGREE_SUGGESTIONS['Software Engineering']
-        elif 'data' in career_goals or 'analytics' in career_goals:
-            suggested_degrees = DEGREE_SUGGESTIONS['Data Science']
-        elif 'marketing' in career_goals or 'business' in career_goals:
-            suggested_degrees = DEGREE_SUGGESTIONS['Marketing']
-        elif 'design' in career_goals or 'ui' in career_goals or 'ux' in career_goals:
-            suggested_degrees = DEGREE_SUGGESTIONS['Design']
-        elif 'security' in career_goals or 'cyber' in career_goals:
-            suggested_degrees = DEGREE_SUGGESTIONS['Cybersecurity']
-        elif 'finance' in career_goals or 'investment' in career_goals:
-            suggested_degrees = DEGREE_SUGGESTIONS['Finance']
+    career_goals = data.get('career_goals', '').lower()
+    suggested_degrees = matcher.memoized(
+        ('degrees', degree_field, career_goals),
+        lambda: suggest_degrees(matcher.catalogue.degree_suggestions(),
+                                degree_field, career_goals))
 
     return jsonify({
         'success': True,
@@ -413,39 +475,55 @@ def submit_profile():
     })
 
 
+# Chat intents, checked from the highest priority down
+chat_router = IntentRouter(default='career_guidance')
+chat_router.register('all_internships',
+                     ['more internships', 'other opportunities'],
+                     priority=40)
+chat_router.register('interview_practice', ['interview'],
+                     ['practice', 'mock', 'feedback'],
+                     priority=30)
+chat_router.register('networking', ['network', 'linkedin', 'connect'],
+                     priority=20)
+chat_router.register('career_trajectory',
+                     ['career path', 'trajectory', 'career plan'],
+                     priority=10)
+
+
 @app.route('/api/chat', methods=['POST'])
-def chat():
+async def chat():
     """Enhanced chat with AI Growth Companion - Professional Career Guidance"""
     data = request.get_json()
     message = data.get('message', '')
     user_profile = session.get('user_profile', {})
+    intent = chat_router.route(message)
+    # "format": "json" asks for structured responses instead of text
+    structured = data.get('format') == 'json'
 
     # Handle specific traditional requests first
-    if 'more internships' in message.lower(
-    ) or 'other opportunities' in message.lower():
-        # Show all internships with scores
-        all_recommendations = []
-        for internship in INTERNSHIPS:
-            score = matcher.calculate_match_score(user_profile, internship)
-            all_recommendations.append({
-                'internship': internship,
-                'match_score': score
-            })
-        all_recommendations.sort(key=lambda x: x['match_score'], reverse=True)
+    if intent == 'all_internships':
+        # Show all internships with scores, one page at a time
+        try:
+            limit = int(data.get('limit', ALL_INTERNSHIPS_PAGE_SIZE))
+            limit = max(1, min(limit, MAX_INTERNSHIPS_PAGE_SIZE))
+            page, next_cursor = get_matcher().get_ranked_page(
+                user_profile, limit=limit, cursor=data.get('cursor'))
+        except ValueError:
+            return jsonify({'error': 'Invalid limit or cursor'}), 400
 
         return jsonify({
             'response':
             f"Here are all available internships ranked by how well they match your profile:",
-            'recommendations': all_recommendations
+            'recommendations': page,
+            'next_cursor': next_cursor
         })
 
     # Handle interview practice scenarios
-    elif 'interview' in message.lower() and ('practice' in message.lower()
-                                             or 'mock' in message.lower()
-                                             or 'feedback' in message.lower()):
-        if 'technical' in message.lower():
+    elif intent == 'interview_practice':
+        lowered = message.lower()
+        if 'technical' in lowered:
             interview_type = "Technical Interview"
-        elif 'behavioral' in message.lower():
+        elif 'behavioral' in lowered:
             interview_type = "Behavioral Interview"
         else:
             interview_type = "General Interview"
@@ -458,9 +536,14 @@ def chat():
             if len(quotes) >= 2:
                 user_response = quotes[1]
 
-        if user_response:
-            response = career_companion.provide_interview_feedback(
-                user_profile, interview_type, user_response)
+        if user_response and data.get('stream'):
+            return event_stream(
+                career_companion.stream_interview_feedback(
+                    user_profile, interview_type, user_response))
+        elif user_response:
+            response = await career_companion.aprovide_interview_feedback(
+                user_profile, interview_type, user_response,
+                structured=structured)
         else:
             response = f"""
 I'm your AI Growth Companion, ready to help you excel in interviews!
@@ -482,26 +565,61 @@ What type of interview would you like to practice?
         return jsonify({'response': response})
 
     # Handle networking requests
-    elif 'network' in message.lower() or 'linkedin' in message.lower(
-    ) or 'connect' in message.lower():
+    elif intent == 'networking':
         industry_focus = user_profile.get(
             'career_goals', user_profile.get('degree', 'General'))
-        response = career_companion.suggest_networking_strategy(
-            user_profile, industry_focus)
+        response = await career_companion.asuggest_networking_strategy(
+            user_profile, industry_focus, structured=structured)
         return jsonify({'response': response})
 
     # Handle career trajectory analysis
-    elif 'career path' in message.lower() or 'trajectory' in message.lower(
-    ) or 'career plan' in message.lower():
-        response = career_companion.analyze_career_trajectory(user_profile)
+    elif intent == 'career_trajectory':
+        response = await career_companion.aanalyze_career_trajectory(
+            user_profile, structured=structured)
         return jsonify({'response': response})
 
     # Handle general career guidance with AI Growth Companion
+    elif data.get('stream'):
+        return event_stream(
+            career_companion.stream_career_guidance(user_profile, message))
     else:
-        response = career_companion.get_career_guidance(user_profile, message)
+        response = await career_companion.aget_career_guidance(
+            user_profile, message, structured=structured)
         return jsonify({'response': response})
 
 
+@app.route('/api/interview/feedback', methods=['POST'])
+async def interview_feedback_batch():
+    """Grade every answer of a mock interview at once"""
+    try:
+        data = request.get_json()
+        interview_type = data.get('interview_type') or 'General Interview'
+        answers = data.get('answers')
+
+        if not isinstance(answers, list) or not answers or not all(
+                isinstance(item, dict) and item.get('question') and
+                item.get('answer') for item in answers):
+            return jsonify({
+                'success': False,
+                'error': 'Provide answers as a list of questions and answers'
+            })
+        if len(answers) > MAX_INTERVIEW_ANSWERS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_INTERVIEW_ANSWERS} answers per request'
+            })
+
+        result = await career_companion.agrade_interview(
+            session.get('user_profile', {}), interview_type, answers)
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        print(f"Interview feedback error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to grade interview'
+        })
+
+
 @app.route('/api/communication/scenarios', methods=['GET'])
 def get_communication_scenarios():
     """Get available communication scenarios"""
@@ -514,7 +632,7 @@ def get_communication_scenarios():
 
 
 @app.route('/api/communication/start', methods=['POST'])
-def start_communication_scenario():
+async def start_communication_scenario():
     """Start a new communication scenario"""
     try:
         data = request.get_json()
@@ -528,8 +646,8 @@ def start_communication_scenario():
             })
 
         # Start scenario
-        result = communication_coach.start_scenario(scenario_type, user_name,
-                                                    session)
+        result = await communication_coach.astart_scenario(
+            scenario_type, user_name, session)
 
         return jsonify({'success': True, **result})
 
@@ -539,7 +657,7 @@ def start_communication_scenario():
 
 
 @app.route('/api/communication/respond', methods=['POST'])
-def respond_to_communication_scenario():
+async def respond_to_communication_scenario():
     """Handle user response in communication scenario"""
     try:
         data = request.get_json()
@@ -548,8 +666,16 @@ def respond_to_communication_scenario():
         if not user_response:
             return jsonify({'success': False, 'error': 'No response provided'})
 
-        # Process user response
-        result = communication_coach.continue_scenario(user_response, session)
+        # Process user response, streaming the feedback if asked to
+        if data.get('stream'):
+            chunks, result = communication_coach.stream_scenario(
+                user_response, session)
+            if chunks is not None:
+                return event_stream(chunks, {'success': True, **result})
+        else:
+            result = await communication_coach.acontinue_scenario(
+                user_response, session,
+                structured=data.get('format') == 'json')
 
         return jsonify({'success': True, **result})
 
@@ -562,11 +688,11 @@ def respond_to_communication_scenario():
 
 
 @app.route('/api/communication/tip', methods=['GET'])
-def get_communication_tip():
+async def get_communication_tip():
     """Get a quick communication tip"""
     try:
         topic = request.args.get('topic', None)
-        tip = communication_coach.get_quick_tip(topic)
+        tip = await communication_coach.aget_quick_tip(topic)
 
         return jsonify({'success': True, 'tip': tip})
 
@@ -586,16 +712,32 @@ def get_communication_progress():
 
 
 @app.route('/api/communication/tone-analysis', methods=['POST'])
-def analyze_tone():
+async def analyze_tone():
     """Analyze tone of user's text"""
     try:
         data = request.get_json()
+        texts = data.get('texts')
+
+        # Batches only get the local analysis
+        if texts is not None:
+            if not isinstance(texts, list) or not texts or \
+                    not all(isinstance(text, str) for text in texts):
+                return jsonify({'success': False, 'error': 'No texts provided'})
+            if len(texts) > MAX_TONE_BATCH:
+                return jsonify({
+                    'success': False,
+                    'error': f'At most {MAX_TONE_BATCH} texts per request'
+                })
+            analyses = communication_coach.get_tone_analyses(texts)
+            return jsonify({'success': True, 'analyses': analyses})
+
         text = data.get('text', '')
 
         if not text:
             return jsonify({'success': False, 'error': 'No text provided'})
 
-        analysis = communication_coach.get_tone_analysis(text)
+        analysis = await communication_coach.aget_tone_analysis(
+            text, deep=bool(data.get('deep')))
         return jsonify({'success': True, 'analysis': analysis})
     except Exception as e:
         return jsonify({'success': False, 'error': 'Failed to analyze tone'})
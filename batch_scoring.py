@@ -0,0 +1,163 @@
+"""Vectorized match scoring for many profiles against the whole catalogue"""
+import numpy as np
+
+from internship_index import DEGREE_KEYWORDS, InternshipIndex, experience_points
+
+
+class CatalogueMatrices:
+    """Listing-side encodings of an InternshipIndex as NumPy arrays"""
+
+    def __init__(self, index):
+        self.index = index
+        count = len(index)
+
+        self.skill_rows = {
+            skill: row
+            for row, skill in enumerate(index.skill_index)
+        }
+        # float32, as it is only ever multiplied with user skill rows
+        self.skill_incidence = self._incidence(index.skill_index.values(),
+                                               count).astype(np.float32)
+        self.required_counts = np.asarray(index.required_skill_counts,
+                                          dtype=np.float64)
+
+        self.degree_ids = {
+            degree: row
+            for row, degree in enumerate(index.degree_index)
+        }
+        # Row -1 of the padded table is all False for unknown degrees
+        self.degree_incidence = np.vstack([
+            self._incidence(index.degree_index.values(), count),
+            np.zeros((1, count), dtype=bool)
+        ])
+        self.degree_keyword = np.zeros(count, dtype=bool)
+        self.degree_keyword[list(index.degree_keyword_positions)] = True
+
+        self.levels = list(index.experience_index)
+        # Empty positions get the extra, all-zero column of the level table
+        self.level_codes = np.full(count, len(self.levels), dtype=np.intp)
+        for code, positions in enumerate(index.experience_index.values()):
+            self.level_codes[positions] = code
+
+    @staticmethod
+    def _incidence(postings, count):
+        matrix = np.zeros((len(postings), count), dtype=bool)
+        for row, positions in enumerate(postings):
+            matrix[row, positions] = True
+        return matrix
+
+
+def _score_chunk(matrices, profiles):
+    """Dense float64 scores for a chunk of profiles"""
+    count = len(matrices.index)
+
+    # Degree match (30 points, 15 for a related technical degree)
+    degrees = [profile.get('degree', '').lower() for profile in profiles]
+    exact = matrices.degree_incidence[[
+        matrices.degree_ids.get(degree, -1) for degree in degrees
+    ]]
+    technical = np.array([
+        any(keyword in degree for keyword in DEGREE_KEYWORDS)
+        for degree in degrees
+    ])
+    scores = np.where(
+        exact, 30.0,
+        np.where(technical[:, None] & matrices.degree_keyword[None, :], 15.0,
+                 0.0))
+
+    # Skills match (40 points): required skill ids the user has
+    user_skills = np.zeros((len(profiles), len(matrices.skill_rows)),
+                           dtype=np.float32)
+    for row, profile in enumerate(profiles):
+        columns = [
+            matrices.skill_rows[skill]
+            for skill in matrices.index.user_skills(profile)
+            if skill in matrices.skill_rows
+        ]
+        user_skills[row, columns] = 1
+    matching = user_skills @ matrices.skill_incidence
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skill_score = np.minimum(
+            40.0, (matching.astype(np.float64) / matrices.required_counts) *
+            40.0)
+    scores += np.where(matrices.required_counts > 0, skill_score, 0.0)
+
+    # Experience level match (20 points)
+    user_levels = [
+        profile.get('experience_level', 'entry').lower()
+        for profile in profiles
+    ]
+    level_table = np.array(
+        [[experience_points(user_level, level)
+          for level in matrices.levels] + [0] for user_level in user_levels],
+        dtype=np.float64).reshape(len(profiles), len(matrices.levels) + 1)
+    scores += np.take_along_axis(
+        level_table,
+        np.broadcast_to(matrices.level_codes, (len(profiles), count)),
+        axis=1)
+
+    # Interest/goal alignment (10 points): sparse, only listings sharing a
+    # term with the profile get any, so accumulate those per row
+    goal = np.zeros((len(profiles), count), dtype=np.float64)
+    for row, profile in enumerate(profiles):
+        points = matrices.index.goal_points(profile)
+        if points:
+            goal[row, list(points)] = list(points.values())
+    scores += goal
+
+    return np.minimum(100.0, scores)
+
+
+def _top_k(row, k, min_score, removed):
+    """Best (position, score) pairs of one row, ties in catalogue order"""
+    if k <= 0:
+        return []
+    if len(removed):
+        # Ranked below every listing, then dropped
+        row = row.copy()
+        row[removed] = -np.inf
+    if k < len(row):
+        kth = np.partition(row, len(row) - k)[len(row) - k]
+        positions = np.flatnonzero(row >= kth)
+    else:
+        positions = np.arange(len(row))
+    positions = positions[np.isfinite(row[positions])]
+    if min_score is not None:
+        positions = positions[row[positions] > min_score]
+    order = positions[np.argsort(-row[positions], kind='stable')][:k]
+    return [(int(position), float(row[position])) for position in order]
+
+
+def score_matrix(profiles, internships, top_k=None, min_score=None,
+                 chunk_size=512):
+    """Score every (profile, internship) pair at once.
+
+    ``internships`` is a list of listings or a prebuilt InternshipIndex.
+    Returns a dense ``len(profiles) x len(internships)`` float64 array equal to
+    ``calculate_match_score`` pair by pair, or, when ``top_k`` is given, one
+    list of ``(position, score)`` pairs per profile ranked like
+    ``get_recommendations`` (scores above ``min_score`` only, if set).
+    Empty positions of removed listings score 0 in the dense array and are
+    never ranked.
+    """
+    if isinstance(internships, InternshipIndex):
+        index = internships
+    else:
+        index = InternshipIndex(internships)
+    matrices = CatalogueMatrices(index)
+    profiles = list(profiles)
+
+    removed = np.array(sorted(index.removed), dtype=np.intp)
+    dense = None if top_k is not None else np.empty(
+        (len(profiles), len(index)), dtype=np.float64)
+    ranked = []
+    for start in range(0, len(profiles), chunk_size):
+        chunk = profiles[start:start + chunk_size]
+        scores = _score_chunk(matrices, chunk)
+        if dense is not None:
+            dense[start:start + len(chunk)] = scores
+        else:
+            ranked.extend(
+                _top_k(row, top_k, min_score, removed)
+                for row in scores)
+    return dense if dense is not None else ranked
@@ -0,0 +1,67 @@
+"""Measure how long ``import app`` takes and fail if it regresses.
+
+    python -m benchmarks.bench_import_time --runs 5 --max-ms 600
+
+Each run imports the app in a fresh interpreter under ``python -X
+importtime`` and takes the cumulative time of the ``app`` module. The run
+also fails if a module that should only load on first use, such as the
+Gemini SDK, was imported.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("google.genai", "httpx", "numpy", "pydantic")
+
+
+def import_once(module):
+    """Per-module cumulative import times in microseconds for one run"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail if the median import takes longer")
+    parser.add_argument("--top", type=int, default=10,
+                        help="how many of the slowest modules to list")
+    args = parser.parse_args()
+
+    runs = [import_once(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(run[args.module] for run in runs) / 1000
+
+    slowest = sorted(
+        ((name, cumulative) for name, cumulative in runs[-1].items()
+         if name != args.module), key=lambda item: -item[1])
+    print(f"import {args.module}: median {median_ms:.0f}ms "
+          f"over {args.runs} runs")
+    for name, cumulative in slowest[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    failures = []
+    eager = sorted(name for name in LAZY_MODULES if name in runs[-1])
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if args.max_ms is not None and median_ms > args.max_ms:
+        failures.append(f"median {median_ms:.0f}ms exceeds {args.max_ms:.0f}ms")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
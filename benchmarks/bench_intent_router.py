@@ -0,0 +1,125 @@
+"""Compare chat intent routing against the if/elif chain it replaced.
+
+    python -m benchmarks.bench_intent_router --messages 100000
+
+Before timing, every generated message is routed both ways and the run
+stops if any decision differs. Timings are then repeated with made-up
+intents added, to show how each approach grows with the number of rules.
+"""
+import argparse
+import random
+import time
+
+from app import chat_router
+from intent_router import IntentRouter
+
+WORDS = [
+    "more internships", "other opportunities", "interview", "Interviews",
+    "practice", "mock", "feedback", "network", "Networking", "LinkedIn",
+    "connect", "reconnecting", "career path", "trajectory", "career plan",
+    "career", "path", "plan", "technical", "behavioral", "internship",
+    "opportunity", "hello", "what", "should", "I", "learn", "next", "my",
+    "resume", "salary", "the", "a", "\"Tell me about yourself\""
+]
+
+
+def legacy_route(message):
+    """The routing decisions /api/chat made with its original if/elif chain"""
+    if 'more internships' in message.lower(
+    ) or 'other opportunities' in message.lower():
+        return 'all_internships'
+    elif 'interview' in message.lower() and ('practice' in message.lower()
+                                             or 'mock' in message.lower()
+                                             or 'feedback' in message.lower()):
+        return 'interview_practice'
+    elif 'network' in message.lower() or 'linkedin' in message.lower(
+    ) or 'connect' in message.lower():
+        return 'networking'
+    elif 'career path' in message.lower() or 'trajectory' in message.lower(
+    ) or 'career plan' in message.lower():
+        return 'career_trajectory'
+    return 'career_guidance'
+
+
+def make_messages(count, seed=0):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(1, 12))
+        message = " ".join(words)
+        if rng.random() < 0.3:
+            message = message.upper()
+        elif rng.random() < 0.3:
+            # Glue words together so keywords straddle word boundaries
+            message = message.replace(" ", "")
+        messages.append(message)
+    return messages
+
+
+def keyword_chain(rules):
+    """An if/elif chain over ``rules``, lowercasing the message only once"""
+
+    def route(message):
+        message = message.lower()
+        for name, groups in rules:
+            if all(any(keyword in message for keyword in group)
+                   for group in groups):
+                return name
+        return 'career_guidance'
+
+    return route
+
+
+def with_extra_intents(count):
+    """The chat rules plus ``count`` made-up intents, as (router, chain)"""
+    rules = [
+        ('all_internships', [['more internships', 'other opportunities']]),
+        ('interview_practice', [['interview'], ['practice', 'mock',
+                                                'feedback']]),
+        ('networking', [['network', 'linkedin', 'connect']]),
+        ('career_trajectory', [['career path', 'trajectory',
+                                'career plan']]),
+    ]
+    rules += [(f'topic_{i}', [[f'topic {i} ', f'subject {i} ']])
+              for i in range(count)]
+    router = IntentRouter(default='career_guidance')
+    for priority, (name, groups) in enumerate(reversed(rules)):
+        router.register(name, *groups, priority=priority)
+    return router, keyword_chain(rules)
+
+
+def time_per_message(route, messages):
+    start = time.perf_counter()
+    for message in messages:
+        route(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--extra-intents", type=int, nargs="*",
+                        default=[0, 25, 100, 400])
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.seed)
+    for message in messages:
+        expected = legacy_route(message)
+        actual = chat_router.route(message)
+        if actual != expected:
+            raise SystemExit(f"{message!r}: routed to {actual}, "
+                             f"expected {expected}")
+    print(f"{len(messages)} messages, all routed as before")
+    print(f"original chain: {time_per_message(legacy_route, messages):.2f}us"
+          f" per message")
+
+    print("intents  if/elif chain  IntentRouter")
+    for count in args.extra_intents:
+        router, chain = with_extra_intents(count)
+        print(f"{count + 4:7d}  {time_per_message(chain, messages):11.2f}us"
+              f"  {time_per_message(router.route, messages):10.2f}us")
+
+
+if __name__ == "__main__":
+    main()
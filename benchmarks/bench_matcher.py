@@ -0,0 +1,80 @@
+"""Compare indexed recommendations against a full scan of the catalogue.
+
+    python -m benchmarks.bench_matcher --listings 2000 --profiles 500
+
+The full scan is how get_recommendations used to work: calculate_match_score
+on every listing, keeping scores above 20, best first and ties in catalogue
+order. Every profile's top 5 is computed both ways, and the run stops if
+any differs in listings or scores. Both are then timed.
+"""
+import argparse
+import random
+import time
+
+from app import InternshipMatcher
+from benchmarks.synthetic import GOAL_WORDS, make_internships, make_profiles
+from recommendation_cache import RecommendationCache
+
+
+def full_scan(matcher, profile, limit=5, min_score=20):
+    scored = []
+    for internship in matcher.index.internships:
+        score = matcher.calculate_match_score(profile, internship)
+        if score > min_score:
+            scored.append({'internship': internship, 'match_score': score})
+    scored.sort(key=lambda x: x['match_score'], reverse=True)
+    return scored[:limit]
+
+
+def make_varied_profiles(count, seed):
+    """Synthetic profiles, some with interests and loosely written skills"""
+    rng = random.Random(seed)
+    profiles = make_profiles(count, seed)
+    for profile in profiles:
+        if rng.random() < 0.5:
+            profile["interests"] = " ".join(rng.sample(GOAL_WORDS, 2))
+        if rng.random() < 0.3:
+            profile["skills"] = profile["skills"].lower().replace(", ", "; ")
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    matcher = InternshipMatcher(make_internships(args.listings, args.seed),
+                                cache=RecommendationCache(0))
+    profiles = make_varied_profiles(args.profiles, args.seed + 1)
+
+    def ranked(results):
+        return [(result['internship']['id'], result['match_score'])
+                for result in results]
+
+    index = matcher.index
+    for profile in profiles:
+        expected = ranked(full_scan(matcher, profile))
+        # The exact scores; get_recommendations rounds them for display
+        actual = [(index.internships[position]['id'], score)
+                  for position, score in index.top_k(profile)]
+        if actual != expected:
+            raise SystemExit(f"{profile!r}: indexed top 5 {actual}, "
+                             f"full scan {expected}")
+    print(f"{len(profiles)} profiles x {args.listings} listings, "
+          f"indexed top 5 equals the full scan")
+
+    timings = {}
+    for label, recommend in (("full scan", lambda p: full_scan(matcher, p)),
+                             ("indexed", matcher.get_recommendations)):
+        start = time.perf_counter()
+        for profile in profiles:
+            recommend(profile)
+        timings[label] = (time.perf_counter() - start) / len(profiles)
+        print(f"{label:>10}: {timings[label] * 1000:.2f}ms per profile")
+    print(f"speedup: {timings['full scan'] / timings['indexed']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
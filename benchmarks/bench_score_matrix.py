@@ -0,0 +1,52 @@
+"""Compare batch score_matrix against the per-pair calculate_match_score loop.
+
+    python -m benchmarks.bench_score_matrix --profiles 10000 --listings 10000
+
+The per-pair loop over 10k x 10k takes far too long to run in full, so it is
+timed on ``--loop-pairs`` pairs and extrapolated.
+"""
+import argparse
+import time
+
+from app import InternshipMatcher
+from benchmarks.synthetic import make_internships, make_profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=10000)
+    parser.add_argument("--listings", type=int, default=10000)
+    parser.add_argument("--loop-pairs", type=int, default=200000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    internships = make_internships(args.listings)
+    profiles = make_profiles(args.profiles)
+    matcher = InternshipMatcher(internships)
+
+    pairs = 0
+    start = time.perf_counter()
+    for profile in profiles:
+        for internship in internships:
+            matcher.calculate_match_score(profile, internship)
+            pairs += 1
+            if pairs >= args.loop_pairs:
+                break
+        if pairs >= args.loop_pairs:
+            break
+    loop_seconds = (time.perf_counter() - start) / pairs * (args.profiles *
+                                                             args.listings)
+
+    start = time.perf_counter()
+    matcher.score_matrix(profiles, top_k=args.top_k)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"{args.profiles} profiles x {args.listings} listings")
+    print(f"per-pair loop (extrapolated from {pairs} pairs): "
+          f"{loop_seconds:.1f}s")
+    print(f"score_matrix top-{args.top_k}: {batch_seconds:.1f}s")
+    print(f"speedup: {loop_seconds / batch_seconds:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Time sharded top-k matching at 1 to N worker processes against in-process.
+
+    python -m benchmarks.bench_sharded --listings 1000000 --shards 8
+
+Listings are loaded into a temporary catalogue store, which every shard
+reads its own range of. Each block of the catalogue describes its own
+topic, so shards hold different terms, as listings added by field would. Each row reports the index build time and the mean
+top-k latency; the sharded results are checked against the in-process ones.
+Speedups need as many free cores as shards.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app import InternshipMatcher
+from benchmarks.synthetic import make_internships, make_profiles
+from catalogue import CatalogueStore
+
+TOPICS = [
+    "biology", "robotics", "journalism", "logistics", "energy", "healthcare",
+    "education", "gaming"
+]
+
+
+def make_catalogue(count, blocks):
+    internships = make_internships(count)
+    for position, internship in enumerate(internships):
+        topic = TOPICS[position * blocks // count % len(TOPICS)]
+        internship["description"] = f"Hands-on {topic} projects with our team"
+    return internships
+
+
+def make_topic_profiles(count):
+    profiles = make_profiles(count)
+    for i, profile in enumerate(profiles):
+        profile["interests"] = TOPICS[i % len(TOPICS)]
+    return profiles
+
+
+def run(store, profiles, shards, top_k):
+    start = time.perf_counter()
+    matcher = InternshipMatcher(store, shards=shards, shard_min_listings=0)
+    index = matcher.index
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [index.top_k(profile, k=top_k) for profile in profiles]
+    query_seconds = (time.perf_counter() - start) / len(profiles)
+    if shards > 1:
+        index.close()
+    return build_seconds, query_seconds, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=200000)
+    parser.add_argument("--profiles", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    profiles = make_topic_profiles(args.profiles)
+    with tempfile.TemporaryDirectory() as directory:
+        store = CatalogueStore(os.path.join(directory, "catalogue.db"))
+        store.replace(internships=make_catalogue(
+            args.listings, max(args.shards, len(TOPICS))))
+
+        print(f"{args.listings} listings, {args.profiles} profiles, "
+              f"{os.cpu_count()} cores")
+        print(f"{'shards':>8} {'build s':>9} {'query ms':>9} {'speedup':>8}")
+        baseline = None
+        expected = None
+        for shards in range(1, max(1, args.shards) + 1):
+            build_seconds, query_seconds, results = run(
+                store, profiles, shards, args.top_k)
+            if baseline is None:
+                baseline, expected = query_seconds, results
+            elif results != expected:
+                raise SystemExit(f"{shards} shards ranked differently")
+            label = "in-proc" if shards == 1 else str(shards)
+            print(f"{label:>8} {build_seconds:9.2f} {query_seconds * 1000:9.2f}"
+                  f" {baseline / query_seconds:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Send several async AI requests in a row through a real Gemini client.
+
+    python -m benchmarks.check_async_gemini --requests 6
+
+Unlike load_test_async, the Gemini SDK client is not stubbed: it talks to a
+local HTTP/1.1 server that answers generateContent, so connections are kept
+alive across requests. Flask runs every async view on a new event loop, so
+this catches async connections being reused after their loop was closed.
+Exits non-zero unless every request gets the stubbed answer.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_TEXT = "stub advice"
+
+
+class StubGemini(BaseHTTPRequestHandler):
+    """Answers every POST as a generateContent call"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": STUB_TEXT}]},
+                "finishReason": "STOP"
+            }]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=6)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["GOOGLE_GEMINI_BASE_URL"] = \
+        f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    os.environ["MENTORA_SESSION_BACKEND"] = "memory"
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    import app as mentora
+
+    client = mentora.app.test_client()
+    failures = 0
+    for i in range(args.requests):
+        # Distinct messages so the response cache never answers
+        response = client.post(
+            "/api/chat", json={"message": f"How do I grow my career? #{i}"})
+        text = response.get_json().get("response", "")
+        ok = response.status_code == 200 and STUB_TEXT in text
+        failures += not ok
+        print(f"request {i + 1}: {'ok' if ok else 'FAILED'} {text[:60]!r}")
+    server.shutdown()
+    if failures:
+        sys.exit(f"{failures} of {args.requests} async requests failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Load test the AI chat path against a stubbed Gemini endpoint.
+
+    python -m benchmarks.load_test_async --requests 64 --concurrency 32
+
+Runs the app twice in-process: once single-threaded, the way a default
+gunicorn sync worker serves requests, and once threaded with async views
+(like ``--worker-class gthread``), where concurrent Gemini waits are limited
+by MENTORA_LLM_CONCURRENCY instead of by the number of processes.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StubResponse:
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModels:
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return StubResponse("Stubbed career advice.")
+
+
+class StubAsyncModels(StubModels):
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency)
+        return StubResponse("Stubbed career advice.")
+
+
+class StubClient:
+    """Stands in for genai.Client with a fixed per-call latency"""
+
+    def __init__(self, latency):
+        self.models = StubModels(latency)
+        self.aio = type("StubAio", (), {"models": StubAsyncModels(latency)})()
+
+
+def run(app, threaded, requests, concurrency):
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    server = make_server("127.0.0.1", 0, app, threaded=threaded)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/api/chat"
+
+    def send(i):
+        # Distinct messages so the response cache never answers
+        body = json.dumps(
+            {"message": f"How do I grow my career? #{threaded}-{i}"})
+        req = urllib.request.Request(
+            url, data=body.encode(),
+            headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=300) as resp:
+            resp.read()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(requests)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="stubbed Gemini latency in seconds")
+    args = parser.parse_args()
+
+    import app as mentora
+    from llm_gateway import gateway
+
+    gateway.client = StubClient(args.latency)
+
+    results = {}
+    for label, threaded in (("sync worker", False),
+                            ("threaded + async views", True)):
+        elapsed = run(mentora.app, threaded, args.requests, args.concurrency)
+        results[label] = elapsed
+        print(f"{label:>24}: {args.requests} requests in {elapsed:.2f}s "
+              f"({args.requests / elapsed:.1f} req/s)")
+    print(f"concurrency gain: "
+          f"{results['sync worker'] / results['threaded + async views']:.1f}x"
+          f" (MENTORA_LLM_CONCURRENCY="
+          f"{os.environ.get('MENTORA_LLM_CONCURRENCY', 8)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark the matcher, routing, session and request paths, as JSON.
+
+    python -m benchmarks.suite --out bench.json
+    python -m benchmarks.suite --baseline bench.json --max-regression 0.25
+
+Every result is a median time in seconds (lower is better) under a stable
+name, so runs on the same machine can be compared. With ``--baseline``, the
+run exits non-zero if any result is more than ``--max-regression`` slower
+than the same result in the baseline file. Gemini is stubbed out, so AI
+routes measure the app's own overhead only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import LEVELS, make_internships, make_profiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubResponse:
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModels:
+
+    def generate_content(self, model, contents, config=None):
+        return StubResponse("Stubbed career advice.")
+
+    def generate_content_stream(self, model, contents, config=None):
+        yield StubResponse("Stubbed career advice.")
+
+
+class StubAsyncModels:
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(0)
+        return StubResponse("Stubbed career advice.")
+
+
+class StubClient:
+    """Stands in for genai.Client, answering instantly"""
+
+    def __init__(self):
+        self.models = StubModels()
+        self.aio = type("StubAio", (), {"models": StubAsyncModels()})()
+
+
+def timed(fn, repeat):
+    """Median seconds of ``repeat`` calls of ``fn``"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def per_item(fn, items, repeat):
+    """Median seconds per item of ``fn`` over all of ``items``"""
+    return timed(lambda: [fn(item) for item in items], repeat) / len(items)
+
+
+def bench_matcher(results, sizes, repeat):
+    from app import InternshipMatcher
+    from ranking_engine import RankingEngine
+    from recommendation_cache import RecommendationCache
+
+    for size in sizes:
+        internships = make_internships(size)
+        # Fewer queries on big catalogues, where each one is slow
+        profiles = make_profiles(max(3, min(50, 5_000_000 // size)))
+
+        results[f"matcher.build_index[{size}]"] = timed(
+            lambda: InternshipMatcher(internships).index,
+            repeat if size < 100000 else 1)
+        # Uncached, so repeated queries time matching, not cache hits
+        matcher = InternshipMatcher(internships, cache=RecommendationCache(0))
+        matcher.index
+        results[f"matcher.get_recommendations[{size}]"] = per_item(
+            matcher.get_recommendations, profiles, repeat)
+        results[f"matcher.ranked_page[{size}]"] = per_item(
+            matcher.get_ranked_page, profiles, repeat)
+
+        def three_pages(profile):
+            cursor = None
+            for _ in range(3):
+                _, cursor = matcher.get_ranked_page(profile, cursor=cursor)
+
+        results[f"matcher.ranked_next_pages[{size}]"] = per_item(
+            three_pages, profiles, repeat)
+
+        # Repeat views served by the recommendation cache, on its own
+        matcher.cache = RecommendationCache()
+        for profile in profiles:
+            matcher.get_recommendations(profile)
+        results[f"matcher.get_recommendations_cached[{size}]"] = per_item(
+            matcher.get_recommendations, profiles, repeat)
+        matcher.cache = RecommendationCache(0)
+
+        # One listing edited with every profile's top-k kept current
+        engine = RankingEngine(matcher)
+        for user, profile in enumerate(profiles):
+            engine.track(user, profile)
+        edits = iter(range(10**9))
+
+        def edit_listing():
+            position = next(edits) * 7919 % size
+            listing = dict(internships[position])
+            listing["experience_level"] = LEVELS[next(edits) % len(LEVELS)]
+            matcher.update_internship(position, listing)
+
+        results[f"ranking.listing_update[{size}]"] = timed(
+            edit_listing, max(repeat, 20))
+        del internships, matcher, engine
+
+
+def bench_routing(results, messages, repeat):
+    from app import chat_router
+    from benchmarks.bench_intent_router import make_messages
+
+    sample = make_messages(messages)
+    results["chat.route"] = per_item(chat_router.route, sample, repeat)
+
+
+def bench_sessions(results, history_sizes, repeat):
+    from flask.sessions import SecureCookieSessionInterface
+
+    from app import app
+    from session_store import ServerSideSessionInterface
+
+    signer = SecureCookieSessionInterface().get_signing_serializer(app)
+    serializer = ServerSideSessionInterface.serializer
+    for size in history_sizes:
+        data = {
+            "user_email": "student@example.com",
+            "user_profile": make_profiles(1)[0],
+            "user_xp": 10 * size,
+            "activity_history": [{
+                "title": f"Completed scenario {i}",
+                "description": "Practiced communication skills and earned 25 XP",
+                "xp": 25,
+                "time": "2025-01-01 12:00:00",
+                "category": "communication"
+            } for i in range(size)]
+        }
+        cookie = signer.dumps(data)
+        results[f"session.cookie_roundtrip[{size}]"] = timed(
+            lambda: signer.loads(signer.dumps(data)), repeat)
+        results[f"session.server_roundtrip[{size}]"] = timed(
+            lambda: serializer.loads(serializer.dumps(data)), repeat)
+        print(f"  cookie with {size} activities: {len(cookie)} bytes",
+              file=sys.stderr)
+
+
+def bench_requests(results, count, repeat):
+    from app import app
+    from llm_gateway import gateway
+
+    gateway.client = StubClient()
+    client = app.test_client()
+    client.post("/api/login", json={"email": "bench@example.com",
+                                    "role": "student"})
+    client.post("/api/submit-profile", json=make_profiles(1)[0])
+    counter = iter(range(10**9))
+
+    requests = {
+        # Distinct messages, so the response cache never answers
+        "chat_guidance": lambda: client.post(
+            "/api/chat", json={"message": f"What next? #{next(counter)}"}),
+        "chat_more_internships": lambda: client.post(
+            "/api/chat", json={"message": "show me more internships"}),
+        "tone_analysis": lambda: client.post(
+            "/api/communication/tone-analysis",
+            json={"text": "I think I could maybe lead the project."}),
+        "submit_profile": lambda: client.post("/api/submit-profile",
+                                              json=make_profiles(1)[0]),
+        "dashboard": lambda: client.get("/dashboard"),
+    }
+    for name, send in requests.items():
+        send()  # warm up caches and lazy imports
+        results[f"request.{name}"] = timed(
+            lambda: [send() for _ in range(count)], repeat) / count
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(results, baseline, max_regression):
+    failures = []
+    for name, seconds in sorted(results.items()):
+        before = baseline.get(name)
+        if before and seconds > before * (1 + max_regression):
+            failures.append(f"{name}: {before * 1e3:.3f}ms -> "
+                            f"{seconds * 1e3:.3f}ms "
+                            f"(+{(seconds / before - 1) * 100:.0f}%)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1000, 100000, 1000000],
+                        help="catalogue sizes for the matcher benchmarks")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--history", type=int, nargs="+",
+                        default=[10, 100, 1000],
+                        help="activity_history lengths for session benchmarks")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+",
+                        choices=["matcher", "routing", "sessions", "requests"])
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    # Keep the benchmark away from the real instance databases and caches
+    os.environ.setdefault("MENTORA_SESSION_BACKEND", "memory")
+    os.environ.setdefault("MENTORA_INTRO_POOL_DB", "")
+    catalogue_dir = tempfile.TemporaryDirectory()
+    os.environ.setdefault("MENTORA_CATALOGUE_DB",
+                          os.path.join(catalogue_dir.name, "catalogue.db"))
+
+    groups = {
+        "matcher": lambda results: bench_matcher(results, args.sizes,
+                                                 args.repeat),
+        "routing": lambda results: bench_routing(results, args.messages,
+                                                 args.repeat),
+        "sessions": lambda results: bench_sessions(results, args.history,
+                                                   args.repeat),
+        "requests": lambda results: bench_requests(results, args.requests,
+                                                   args.repeat),
+    }
+    results = {}
+    for name, run in groups.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"{name}...", file=sys.stderr)
+        run(results)
+    catalogue_dir.cleanup()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results
+    }
+    for name, seconds in results.items():
+        print(f"{name:45} {seconds * 1e3:12.4f}ms")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        failures = regressions(results, baseline, args.max_regression)
+        if failures:
+            raise SystemExit("regressions:\n" + "\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
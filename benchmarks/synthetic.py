@@ -0,0 +1,54 @@
+"""Synthetic internship catalogues and profiles for benchmarks"""
+import random
+
+SKILLS = [
+    "Python", "JavaScript", "React", "Git", "SQL", "Statistics", "Excel",
+    "Analytics", "Communication", "Marketing", "Design Thinking", "Figma",
+    "User Research", "Prototyping", "Network Security", "Risk Assessment",
+    "Linux", "Financial Analysis", "Research", "Machine Learning", "Java",
+    "C++", "Go", "Docker", "Kubernetes", "AWS", "Tableau", "Power BI",
+    "Photoshop", "Public Speaking", "Project Management", "TypeScript"
+]
+DEGREES = [
+    "Computer Science", "Software Engineering", "Data Science", "Statistics",
+    "Mathematics", "Marketing", "Business", "Economics", "Design",
+    "Psychology", "Human-Computer Interaction", "Cybersecurity",
+    "Information Technology", "Finance", "Accounting"
+]
+LEVELS = ["entry", "intermediate", "advanced"]
+TITLE_WORDS = [
+    "Software", "Engineering", "Data", "Science", "Marketing", "Analytics",
+    "UX", "Design", "Cybersecurity", "Finance", "Product", "Research",
+    "Cloud", "Security", "Operations", "Business"
+]
+GOAL_WORDS = [
+    "software", "data", "design", "finance", "security", "marketing",
+    "research", "product", "cloud", "startup", "leadership", "analytics"
+]
+
+
+def make_internships(count, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "id": i + 1,
+        "title": " ".join(rng.sample(TITLE_WORDS, 2)) + " Intern",
+        "company": f"Company {i % 997}",
+        "location": "Remote",
+        "description": "Synthetic listing for benchmarking",
+        "required_skills": rng.sample(SKILLS, rng.randint(2, 5)),
+        "preferred_degree": rng.sample(DEGREES, rng.randint(1, 4)),
+        "experience_level": rng.choice(LEVELS),
+        "duration": "3 months",
+        "stipend": "$2500/month"
+    } for i in range(count)]
+
+
+def make_profiles(count, seed=1):
+    rng = random.Random(seed)
+    return [{
+        "name": f"Student {i}",
+        "degree": rng.choice(DEGREES),
+        "skills": ", ".join(rng.sample(SKILLS, rng.randint(1, 6))),
+        "experience_level": rng.choice(LEVELS),
+        "career_goals": " ".join(rng.sample(GOAL_WORDS, 3))
+    } for i in range(count)]
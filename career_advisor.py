@@ -1,9 +1,18 @@
-import os
-from google import genai
-from google.genai import types
+import asyncio
 
-# IMPORTANT: KEEP THIS COMMENT - Using python_gemini integration
-client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+from llm_gateway import gateway
+
+GUIDANCE_EMPTY_MESSAGE = "I'm here to help with your career growth! Could you please rephrase your question?"
+GUIDANCE_ERROR_MESSAGE = "I apologize, but I'm experiencing technical difficulties. Please try again."
+FEEDBACK_EMPTY_MESSAGE = "I need more details to provide specific feedback. Could you share your complete response?"
+FEEDBACK_ERROR_MESSAGE = "I'm having trouble analyzing your response right now. Please try again."
+NETWORKING_EMPTY_MESSAGE = "Here's some general networking advice: Start by connecting with classmates and alumni in your field!"
+NETWORKING_ERROR_MESSAGE = "I'm having trouble generating networking strategies right now. Please try again."
+TRAJECTORY_EMPTY_MESSAGE = "I need more information about your background to provide a detailed career trajectory analysis."
+TRAJECTORY_ERROR_MESSAGE = "I'm having trouble analyzing career trajectories right now. Please try again."
+# Answers graded per model call, and calls run at once per mock interview
+INTERVIEW_BATCH_SIZE = 5
+INTERVIEW_BATCH_CONCURRENCY = 4
 
 
 class AIGrowthCompanion:
@@ -11,13 +20,30 @@ class AIGrowthCompanion:
     def __init__(self):
         self.model = "gemini-2.5-flash"
 
-    def get_career_guidance(self, user_profile, message):
+    async def aget_career_guidance(self, user_profile, message,
+                                   structured=False):
         """Provide personalized career guidance using Gemini AI"""
-        try:
-            # Build context from user profile
-            profile_context = self._build_profile_context(user_profile)
+        return await self._arespond(
+            lambda: self._career_guidance_prompt(user_profile, message),
+            GUIDANCE_EMPTY_MESSAGE, GUIDANCE_ERROR_MESSAGE,
+            'CareerGuidance' if structured else None)
+
+    def get_career_guidance(self, user_profile, message, structured=False):
+        """Blocking version of aget_career_guidance"""
+        return asyncio.run(
+            self.aget_career_guidance(user_profile, message, structured))
+
+    def stream_career_guidance(self, user_profile, message):
+        """Stream career guidance as text chunks while Gemini generates it"""
+        return self._stream(
+            lambda: self._career_guidance_prompt(user_profile, message),
+            GUIDANCE_EMPTY_MESSAGE, GUIDANCE_ERROR_MESSAGE)
+
+    def _career_guidance_prompt(self, user_profile, message):
+        # Build context from user profile
+        profile_context = self._build_profile_context(user_profile)
 
-            system_prompt = f"""You are an expert AI Growth Companion specializing in career development.
+        system_prompt = f"""You are an expert AI Growth Companion specializing in career development.
             Provide personalized, actionable career advice based on the user's profile and current question.
            
             User Profile Context:
@@ -31,23 +57,37 @@ class AIGrowthCompanion:
             - Focus on growth opportunities and next steps
             """
 
-            full_prompt = f"{system_prompt}\n\nUser Question: {message}"
+        return f"{system_prompt}\n\nUser Question: {message}"
 
-            response = client.models.generate_content(model=self.model,
-                                                      contents=full_prompt)
+    async def aprovide_interview_feedback(self, user_profile, interview_type,
+                                          user_response, structured=False):
+        """Provide detailed interview feedback"""
+        return await self._arespond(
+            lambda: self._interview_feedback_prompt(
+                user_profile, interview_type, user_response),
+            FEEDBACK_EMPTY_MESSAGE, FEEDBACK_ERROR_MESSAGE,
+            'InterviewFeedback' if structured else None)
 
-            return response.text or "I'm here to help with your career growth! Could you please rephrase your question?"
+    def provide_interview_feedback(self, user_profile, interview_type,
+                                   user_response, structured=False):
+        """Blocking version of aprovide_interview_feedback"""
+        return asyncio.run(
+            self.aprovide_interview_feedback(user_profile, interview_type,
+                                             user_response, structured))
 
-        except Exception as e:
-            return f"I apologize, but I'm experiencing technical difficulties. Please try again. Error: {str(e)}"
+    def stream_interview_feedback(self, user_profile, interview_type,
+                                  user_response):
+        """Stream interview feedback as text chunks while Gemini generates it"""
+        return self._stream(
+            lambda: self._interview_feedback_prompt(
+                user_profile, interview_type, user_response),
+            FEEDBACK_EMPTY_MESSAGE, FEEDBACK_ERROR_MESSAGE)
 
-    def provide_interview_feedback(self, user_profile, interview_type,
+    def _interview_feedback_prompt(self, user_profile, interview_type,
                                    user_response):
-        """Provide detailed interview feedback"""
-        try:
-            profile_context = self._build_profile_context(user_profile)
+        profile_context = self._build_profile_context(user_profile)
 
-            system_prompt = f"""You are an expert interview coach providing detailed feedback on interview responses.
+        system_prompt = f"""You are an expert interview coach providing detailed feedback on interview responses.
            
             Interview Type: {interview_type}
             User Profile: {profile_context}
@@ -61,22 +101,118 @@ class AIGrowthCompanion:
             Be constructive and encouraging while being honest about areas needing work.
             """
 
-            full_prompt = f"{system_prompt}\n\nUser's Response: {user_response}"
+        return f"{system_prompt}\n\nUser's Response: {user_response}"
+
+    async def agrade_interview(self, user_profile, interview_type, answers):
+        """Feedback on a whole mock interview.
+        
+        ``answers`` is a list of ``{'question', 'answer'}`` dicts. They are
+        graded ``INTERVIEW_BATCH_SIZE`` per structured call, with up to
+        ``INTERVIEW_BATCH_CONCURRENCY`` calls running at once, so the
+        interview takes about as long as one call. Returns per-answer
+        InterviewFeedback dicts (``{'error': ...}`` for answers that could
+        not be graded) and the mean score.
+        """
+        limit = asyncio.Semaphore(INTERVIEW_BATCH_CONCURRENCY)
+
+        async def grade(chunk):
+            async with limit:
+                return await self._agrade_chunk(user_profile, interview_type,
+                                                answers, chunk)
 
-            response = client.models.generate_content(model=self.model,
-                                                      contents=full_prompt)
+        results = await asyncio.gather(
+            *(grade(chunk) for chunk in self._interview_chunks(answers)))
+        return self._interview_summary(answers, results)
 
-            return response.text or "I need more details to provide specific feedback. Could you share your complete response?"
+    def _interview_chunks(self, answers):
+        return [
+            range(start, min(start + INTERVIEW_BATCH_SIZE, len(answers)))
+            for start in range(0, len(answers), INTERVIEW_BATCH_SIZE)
+        ]
 
+    async def _agrade_chunk(self, user_profile, interview_type, answers,
+                            chunk):
+        """{index: feedback} for the answers in ``chunk``; empty on failure"""
+        try:
+            data = await gateway.agenerate_json(
+                self.model,
+                self._interview_batch_prompt(user_profile, interview_type,
+                                             answers, chunk),
+                'InterviewFeedbackBatch')
         except Exception as e:
-            return f"I'm having trouble analyzing your response right now. Please try again. Error: {str(e)}"
+            print(f"Interview batch error: {str(e)}")
+            return {}
+        return self._chunk_feedback(data, chunk)
+
+    def _chunk_feedback(self, data, chunk):
+        # Answer numbers in the prompt start at 1
+        feedback = {}
+        for item in (data or {}).get('answers', []):
+            index = item.pop('index') - 1
+            if index in chunk:
+                feedback[index] = item
+        return feedback
 
-    def suggest_networking_strategy(self, user_profile, industry_focus):
+    def _interview_summary(self, answers, results):
+        graded = {}
+        for result in results:
+            graded.update(result)
+        feedback = [
+            graded.get(index, {'error': FEEDBACK_ERROR_MESSAGE})
+            for index in range(len(answers))
+        ]
+        scores = [item['score'] for item in graded.values()]
+        return {
+            'feedback': feedback,
+            'graded': len(scores),
+            'aggregate_score':
+            round(sum(scores) / len(scores), 1) if scores else None
+        }
+
+    def _interview_batch_prompt(self, user_profile, interview_type, answers,
+                                chunk):
+        profile_context = self._build_profile_context(user_profile)
+        numbered = "\n\n".join(
+            f"Question {index + 1}: {answers[index]['question']}\n"
+            f"Answer {index + 1}: {answers[index]['answer']}"
+            for index in chunk)
+
+        return f"""You are an expert interview coach grading answers from a mock interview.
+           
+            Interview Type: {interview_type}
+            User Profile: {profile_context}
+           
+            For each numbered answer below, give its number as the index and provide:
+            1. A score from 1 to 10
+            2. Strengths in their answer
+            3. Areas for improvement
+            4. Specific suggestions for enhancement
+            5. A sample improved response
+           
+            Be constructive and encouraging while being honest about areas needing work.
+            
+            {numbered}
+            """
+
+    async def asuggest_networking_strategy(self, user_profile,
+                                           industry_focus, structured=False):
         """Suggest networking strategies based on user profile"""
-        try:
-            profile_context = self._build_profile_context(user_profile)
+        return await self._arespond(
+            lambda: self._networking_prompt(user_profile, industry_focus),
+            NETWORKING_EMPTY_MESSAGE, NETWORKING_ERROR_MESSAGE,
+            'NetworkingPlan' if structured else None)
+
+    def suggest_networking_strategy(self, user_profile, industry_focus,
+                                    structured=False):
+        """Blocking version of asuggest_networking_strategy"""
+        return asyncio.run(
+            self.asuggest_networking_strategy(user_profile, industry_focus,
+                                              structured))
+
+    def _networking_prompt(self, user_profile, industry_focus):
+        profile_context = self._build_profile_context(user_profile)
 
-            system_prompt = f"""You are a networking expert providing strategic career networking advice.
+        system_prompt = f"""You are a networking expert providing strategic career networking advice.
            
             User Profile: {profile_context}
             Industry Focus: {industry_focus}
@@ -90,20 +226,25 @@ class AIGrowthCompanion:
             Keep advice practical and actionable.
             """
 
-            response = client.models.generate_content(model=self.model,
-                                                      contents=system_prompt)
+        return system_prompt
 
-            return response.text or "Here's some general networking advice: Start by connecting with classmates and alumni in your field!"
+    async def aanalyze_career_trajectory(self, user_profile,
+                                         structured=False):
+        """Analyze user's career trajectory and suggest improvements"""
+        return await self._arespond(
+            lambda: self._trajectory_prompt(user_profile),
+            TRAJECTORY_EMPTY_MESSAGE, TRAJECTORY_ERROR_MESSAGE,
+            'CareerTrajectory' if structured else None)
 
-        except Exception as e:
-            return f"I'm having trouble generating networking strategies right now. Please try again. Error: {str(e)}"
+    def analyze_career_trajectory(self, user_profile, structured=False):
+        """Blocking version of aanalyze_career_trajectory"""
+        return asyncio.run(
+            self.aanalyze_career_trajectory(user_profile, structured))
 
-    def analyze_career_trajectory(self, user_profile):
-        """Analyze user's career trajectory and suggest improvements"""
-        try:
-            profile_context = self._build_profile_context(user_profile)
+    def _trajectory_prompt(self, user_profile):
+        profile_context = self._build_profile_context(user_profile)
 
-            system_prompt = f"""You are a career strategist analyzing career trajectories.
+        system_prompt = f"""You are a career strategist analyzing career trajectories.
            
             User Profile: {profile_context}
            
@@ -117,13 +258,41 @@ class AIGrowthCompanion:
             Be specific and actionable in your recommendations.
             """
 
-            response = client.models.generate_content(model=self.model,
-                                                      contents=system_prompt)
+        return system_prompt
+
+    async def _arespond(self, build_prompt, empty_message, error_message,
+                        schema=None):
+        """Generate a response, falling back to canned text on failure.
+
+        With ``schema`` (a model name in ai_schemas) the response is a dict
+        of that shape instead, or ``{'error': message}`` on failure.
+        """
+        try:
+            if schema:
+                data = await gateway.agenerate_json(self.model,
+                                                    build_prompt(), schema)
+                return data or {'error': empty_message}
 
-            return response.text or "I need more information about your background to provide a detailed career trajectory analysis."
+            text = await gateway.agenerate(self.model, build_prompt())
 
+            return text or empty_message
+
+        except Exception as e:
+            message = f"{error_message} Error: {str(e)}"
+            return {'error': message} if schema else message
+
+    def _stream(self, build_prompt, empty_message, error_message):
+        """Yield response chunks, with the same fallbacks as a blocking call"""
+        try:
+            produced = False
+            for chunk in gateway.generate_stream(self.model,
+                                                 build_prompt()):
+                produced = True
+                yield chunk
+            if not produced:
+                yield empty_message
         except Exception as e:
-            return f"I'm having trouble analyzing career trajectories right now. Please try again. Error: {str(e)}"
+            yield f"{error_message} Error: {str(e)}"
 
     def _build_profile_context(self, user_profile):
         """Build a context string from user profile"""
@@ -0,0 +1,342 @@
+"""Internship catalogue storage shared by every worker"""
+import argparse
+import functools
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+from internship_index import NORMALIZED_VERSION, normalize_internship
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS internships (
+    position INTEGER PRIMARY KEY,
+    id INTEGER,
+    document TEXT NOT NULL,
+    normalized TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS degree_suggestions (
+    position INTEGER PRIMARY KEY,
+    field TEXT NOT NULL UNIQUE,
+    suggestions TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS catalogue_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ListCatalogue:
+    """In-memory catalogue over plain Python lists (tests and benchmarks)"""
+
+    def __init__(self, internships, degree_suggestions=None):
+        self.internships = list(internships)
+        self._degree_suggestions = dict(degree_suggestions or {})
+        self._version = 0
+
+    def version(self):
+        return self._version
+
+    def __len__(self):
+        return sum(1 for internship in self.internships
+                   if internship is not None)
+
+    def positions(self):
+        return len(self.internships)
+
+    def documents(self):
+        return self.internships
+
+    def normalized(self, start=0, stop=None):
+        return (None if internship is None else normalize_internship(internship)
+                for internship in self.internships[start:stop])
+
+    def degree_suggestions(self):
+        return self._degree_suggestions
+
+    def add(self, internship):
+        self.internships.append(internship)
+        self._version += 1
+        return len(self.internships) - 1
+
+    def update(self, position, internship):
+        self.get(position)
+        self.internships[position] = internship
+        self._version += 1
+
+    def remove(self, position):
+        self.get(position)
+        self.internships[position] = None
+        self._version += 1
+
+    def get(self, position):
+        if not 0 <= position < len(self.internships) or \
+                self.internships[position] is None:
+            raise KeyError(position)
+        return self.internships[position]
+
+
+class StoredDocuments:
+    """Read-only sequence view that loads listing documents on demand.
+
+    Its length is the number of positions, removed listings included.
+    """
+
+    def __init__(self, store, count, cache_size=1024):
+        self.store = store
+        self.count = count
+        self._load = functools.lru_cache(maxsize=cache_size)(store.get)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        return self._load(position)
+
+    def refresh(self, count):
+        """Forget loaded documents after the store changed in place"""
+        self.count = count
+        self._load.cache_clear()
+
+
+class CatalogueStore:
+    """SQLite-backed catalogue.
+
+    Listing documents stay on disk and are read through SQLite's memory map,
+    so the page cache is shared by all workers instead of every worker
+    holding its own copy. Each listing is stored next to its
+    normalize_internship record so building an index never re-parses the
+    documents. Every import bumps the ``user_version`` pragma, which workers
+    poll through ``version()`` to reload in place. Records written by an
+    older normalize_internship are rewritten when the store is opened.
+
+    Single listings can also be added, updated and removed. A removed
+    listing leaves its position empty, so every other listing keeps its
+    position; ``normalized()`` yields None for empty positions.
+    """
+
+    def __init__(self, path, mmap_size=256 * 1024 * 1024, page_size=5000):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.page_size = page_size
+        self._local = threading.local()
+        self._degree_cache = (None, {})
+        # Not kept open, so forked workers never inherit a connection
+        with closing(sqlite3.connect(path, timeout=30)) as conn:
+            conn.executescript(SCHEMA)
+            self._upgrade_normalized(conn)
+
+    @staticmethod
+    def _normalized_version(conn):
+        row = conn.execute("SELECT value FROM catalogue_meta "
+                           "WHERE key = 'normalized_version'").fetchone()
+        return int(row[0]) if row else 1
+
+    def _upgrade_normalized(self, conn):
+        if self._normalized_version(conn) == NORMALIZED_VERSION:
+            return
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Another process may have upgraded while we waited for the lock
+            if self._normalized_version(conn) == NORMALIZED_VERSION:
+                return
+            rows = conn.execute(
+                'SELECT position, document FROM internships').fetchall()
+            conn.executemany(
+                'UPDATE internships SET normalized = ? WHERE position = ?',
+                ((json.dumps(normalize_internship(json.loads(document))),
+                  position) for position, document in rows))
+            conn.execute(
+                "INSERT OR REPLACE INTO catalogue_meta "
+                "VALUES ('normalized_version', ?)", (NORMALIZED_VERSION, ))
+            if rows:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                conn.execute(f'PRAGMA user_version={version + 1}')
+
+    def _connect(self):
+        """Thread-local connection, reopened if the file was replaced"""
+        try:
+            file_id = os.stat(self.path)[1:3]  # (st_ino, st_dev)
+        except FileNotFoundError:
+            file_id = None
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.file_id != file_id:
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            self._local.conn = conn
+            self._local.file_id = os.stat(self.path)[1:3]
+        return conn
+
+    def version(self):
+        return self._connect().execute('PRAGMA user_version').fetchone()[0]
+
+    def __len__(self):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM internships').fetchone()[0]
+
+    def get(self, position):
+        row = self._connect().execute(
+            'SELECT document FROM internships WHERE position = ?',
+            (position, )).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return json.loads(row[0])
+
+    def positions(self):
+        """Number of positions, including those of removed listings"""
+        return self._connect().execute(
+            'SELECT COALESCE(MAX(position) + 1, 0) FROM internships'
+        ).fetchone()[0]
+
+    def documents(self):
+        return StoredDocuments(self, self.positions())
+
+    def normalized(self, start=0, stop=None):
+        """Yield normalized records in catalogue order, one page at a time.
+
+        ``start`` and ``stop`` limit it to a range of positions.
+        """
+        cursor = self._connect().execute(
+            'SELECT position, normalized FROM internships '
+            'WHERE position >= ? AND position < ? ORDER BY position',
+            (start, stop if stop is not None else 2**63 - 1))
+        expected = start
+        while True:
+            rows = cursor.fetchmany(self.page_size)
+            if not rows:
+                break
+            for position, record in rows:
+                for _ in range(expected, position):
+                    yield None
+                expected = position + 1
+                yield json.loads(record)
+
+    def degree_suggestions(self):
+        version = self.version()
+        cached_version, suggestions = self._degree_cache
+        if cached_version != version:
+            rows = self._connect().execute(
+                'SELECT field, suggestions FROM degree_suggestions '
+                'ORDER BY position')
+            suggestions = {field: json.loads(data) for field, data in rows}
+            self._degree_cache = (version, suggestions)
+        return suggestions
+
+    def replace(self, internships=None, degree_suggestions=None,
+                only_if_empty=False):
+        """Atomically replace listings and/or degree suggestions.
+
+        With ``only_if_empty`` nothing is written if the catalogue already
+        has listings, so concurrently booting workers seed it exactly once.
+        Returns True if anything was written.
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if only_if_empty and conn.execute(
+                    'SELECT 1 FROM internships LIMIT 1').fetchone():
+                return False
+            if internships is not None:
+                conn.execute('DELETE FROM internships')
+                conn.executemany(
+                    'INSERT INTO internships VALUES (?, ?, ?, ?)',
+                    ((position, internship.get('id'), json.dumps(internship),
+                      json.dumps(normalize_internship(internship)))
+                     for position, internship in enumerate(internships)))
+            if degree_suggestions is not None:
+                conn.execute('DELETE FROM degree_suggestions')
+                conn.executemany(
+                    'INSERT INTO degree_suggestions VALUES (?, ?, ?)',
+                    ((position, field, json.dumps(suggestions))
+                     for position, (field, suggestions) in enumerate(
+                         degree_suggestions.items())))
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            conn.execute(f'PRAGMA user_version={version + 1}')
+        return True
+
+    def _write(self, statement, params):
+        """Run one listing write and bump the version; rows changed"""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            changed = conn.execute(statement, params).rowcount
+            if changed:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                conn.execute(f'PRAGMA user_version={version + 1}')
+        return changed
+
+    def add(self, internship):
+        """Append one listing; returns its position"""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            position = conn.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM internships'
+            ).fetchone()[0]
+            conn.execute('INSERT INTO internships VALUES (?, ?, ?, ?)',
+                         (position, internship.get('id'),
+                          json.dumps(internship),
+                          json.dumps(normalize_internship(internship))))
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            conn.execute(f'PRAGMA user_version={version + 1}')
+        return position
+
+    def update(self, position, internship):
+        """Replace the listing at ``position``; KeyError if there is none"""
+        if not self._write(
+                'UPDATE internships SET id = ?, document = ?, normalized = ? '
+                'WHERE position = ?',
+            (internship.get('id'), json.dumps(internship),
+             json.dumps(normalize_internship(internship)), position)):
+            raise KeyError(position)
+
+    def remove(self, position):
+        """Remove the listing at ``position``; KeyError if there is none"""
+        if not self._write('DELETE FROM internships WHERE position = ?',
+                           (position, )):
+            raise KeyError(position)
+
+    def import_jsonl(self, path, **kwargs):
+        """Replace the listings with one JSON object per line of ``path``"""
+        return self.replace(internships=read_jsonl(path), **kwargs)
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Import internships into the catalogue store')
+    parser.add_argument('db', help='SQLite catalogue file')
+    parser.add_argument('internships', nargs='?',
+                        help='JSONL file with one internship per line')
+    parser.add_argument('--degree-suggestions',
+                        help='JSON file mapping field -> suggestions')
+    args = parser.parse_args()
+
+    degree_suggestions = None
+    if args.degree_suggestions:
+        with open(args.degree_suggestions, encoding='utf-8') as f:
+            degree_suggestions = json.load(f)
+    store = CatalogueStore(args.db)
+    store.replace(
+        internships=read_jsonl(args.internships)
+        if args.internships else None,
+        degree_suggestions=degree_suggestions)
+    print(f"{args.db}: {len(store)} internships, version {store.version()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,53 @@
 import os
 import json
+import random
 import re
 from datetime import datetime
-from google import genai
-from google.genai import types
 
-# IMPORTANT: KEEP THIS COMMENT - Using python_gemini integration
-client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+from activity_log import (ActivityCategory, load_activity_log,
+                          record_activity)
+from intro_pool import USER_NAME_PLACEHOLDER, IntroPool, personalize
+from llm_gateway import gateway
+from scenario_context import ScenarioContext, format_turns
+from session_store import store_after_response
+from tone_analyzer import analyze_tone, analyze_tones
+
+FEEDBACK_EMPTY_MESSAGE = "Good response! Let's continue practicing."
+FEEDBACK_ERROR_MESSAGE = "I appreciate your response. Let's continue practicing - can you try expressing that idea in a different way?"
+TONE_EMPTY_MESSAGE = "Your message is clear and professional. Well done!"
+TONE_ERROR_MESSAGE = "I'm having trouble analyzing the tone right now. Generally, aim for clarity, confidence, and appropriate formality for your audience."
+
+# Varied settings for pre-generated intros, so the pool isn't five copies
+INTRO_SETTINGS = [
+    "a fast-growing startup", "a large technology company",
+    "a non-profit organization", "a university career fair",
+    "a remote-first team", "a consulting firm", "a hospital",
+    "a financial services firm", "a creative agency", "a government office"
+]
+
+QUICK_TIPS = [
+    "Maintain eye contact to show confidence and engagement",
+    "Use the STAR method (Situation, Task, Action, Result) when answering behavioral questions",
+    "Practice active listening by paraphrasing what others say",
+    "Start with a strong handshake and genuine smile",
+    "Prepare 3-5 thoughtful questions to ask your interviewer",
+    "Use specific examples to demonstrate your skills and achievements",
+    "Match your communication style to your audience",
+    "Take a pause before answering difficult questions",
+    "End conversations with a clear next step or follow-up",
+    "Practice your elevator pitch until it feels natural"
+]
 
 class CommunicationCoach:
-    def __init__(self):
+    def __init__(self, intro_pool_path=None, intro_pool_size=5,
+                 context_tokens=1200):
+        """``intro_pool_path`` enables pre-generated intros stored there.
+
+        ``context_tokens`` is the budget for the scenario history sent with
+        each response; older turns beyond it are summarized.
+        """
         self.model = "gemini-2.5-flash"
+        self.context_tokens = context_tokens
         self.scenarios = {
             "job_interview": {
                 "title": "Job Interview Practice",
@@ -43,6 +80,17 @@ class CommunicationCoach:
                 "xp_reward": 30
             }
         }
+        # Maps titles back to ids for activities logged before they had types
+        self.scenario_titles = {
+            info['title']: scenario_id
+            for scenario_id, info in self.scenarios.items()
+        }
+        self.intro_pool = None
+        self._intro_pool_warmed = False
+        if intro_pool_path:
+            self.intro_pool = IntroPool(intro_pool_path,
+                                        self._generate_intro_template,
+                                        size=intro_pool_size)
         
     def get_available_scenarios(self):
         """Return list of available communication scenarios"""
@@ -54,14 +102,30 @@ class CommunicationCoach:
             for scenario_id, scenario_data in self.scenarios.items()
         ]
     
-    def start_scenario(self, scenario_type, user_name, session):
+    async def astart_scenario(self, scenario_type, user_name, session):
         """Start a new communication scenario"""
         if scenario_type not in self.scenarios:
             return {"error": "Invalid scenario type"}
         
-        scenario = self.scenarios[scenario_type]
+        scenario = self._begin_scenario(scenario_type, user_name, session)
         
-        # Initialize scenario state in session
+        intro_message = self._pooled_intro(scenario_type, user_name)
+        if intro_message:
+            return self._introduced(scenario, intro_message, session)
+        
+        try:
+            text = await gateway.agenerate(
+                self.model, self._intro_prompt(scenario, user_name))
+            
+            intro_message = text or f"Welcome to the {scenario['title']} practice session! Let's get started."
+            
+        except Exception as e:
+            intro_message = self._intro_fallback(scenario)
+        
+        return self._introduced(scenario, intro_message, session)
+    
+    def _begin_scenario(self, scenario_type, user_name, session):
+        """Initialize scenario state in session"""
         session['current_scenario'] = {
             'type': scenario_type,
             'stage': 'introduction',
@@ -69,10 +133,21 @@ class CommunicationCoach:
             'responses': [],
             'started_at': datetime.now().isoformat()
         }
-        
-        try:
-            # Generate scenario introduction using AI
-            system_prompt = f"""You are a professional communication coach running a '{scenario['title']}' practice session.
+        return self.scenarios[scenario_type]
+    
+    def _introduced(self, scenario, intro_message, session):
+        """Start the conversation history with the intro"""
+        current_scenario = session['current_scenario']
+        self._context(current_scenario).add('model', intro_message)
+        session['current_scenario'] = current_scenario
+        return {
+            "scenario": scenario,
+            "introduction": intro_message,
+            "stage": "active"
+        }
+    
+    def _intro_prompt(self, scenario, user_name):
+        return f"""You are a professional communication coach running a '{scenario['title']}' practice session.
             
             Create an engaging introduction for {user_name} that:
             1. Explains the scenario context
@@ -81,155 +156,281 @@ class CommunicationCoach:
             
             Keep it professional but encouraging. Make it feel like a real-world situation.
             """
-            
-            response = client.models.generate_content(
-                model=self.model,
-                contents=system_prompt
-            )
-            
-            intro_message = response.text or f"Welcome to the {scenario['title']} practice session! Let's get started."
-            
-            return {
-                "scenario": scenario,
-                "introduction": intro_message,
-                "stage": "active"
-            }
-            
+    
+    def _pooled_intro(self, scenario_type, user_name):
+        """A ready-made intro for the user, or None to generate one now"""
+        if self.intro_pool is None:
+            return None
+        try:
+            if not self._intro_pool_warmed:
+                self._intro_pool_warmed = True
+                self.intro_pool.warm(self.scenarios)
+            template = self.intro_pool.take(scenario_type)
+        except Exception as e:
+            print(f"Intro pool error: {str(e)}")
+            return None
+        return personalize(template, user_name) if template else None
+    
+    def _generate_intro_template(self, scenario_type):
+        """A new intro for the pool, with a placeholder for the user's name"""
+        scenario = self.scenarios[scenario_type]
+        prompt = f"""{self._intro_prompt(scenario, USER_NAME_PLACEHOLDER)}
+            Set the roleplay at {random.choice(INTRO_SETTINGS)}.
+            Refer to the user only as {USER_NAME_PLACEHOLDER}, written exactly like that.
+            """
+        # Uncached: each pool entry should be a new intro, and a stored one
+        # would never be asked for again
+        text = gateway.generate(self.model, prompt, cached=False)
+        if not text or USER_NAME_PLACEHOLDER not in text:
+            return None
+        return text
+    
+    def _intro_fallback(self, scenario):
+        return f"Welcome to the {scenario['title']} practice session! This is a great opportunity to improve your communication skills. Let's begin with a simple question: How would you introduce yourself in this situation?"
+    
+    async def acontinue_scenario(self, user_response, session,
+                                 structured=False):
+        """Continue the communication scenario based on user response.
+        
+        With ``structured`` the coach response is a ScenarioFeedback dict
+        (feedback, suggestions, next_prompt) instead of text.
+        """
+        current_scenario = session.get('current_scenario')
+        
+        if not current_scenario:
+            return {"error": "No active scenario found"}
+        
+        scenario_info = self._record_response(current_scenario, user_response,
+                                              session)
+        context = self._context(current_scenario)
+        older = context.overflow()
+        context.compact(
+            await self._asummarize(context.summary, older) if older else None)
+        
+        try:
+            if structured:
+                data = await gateway.agenerate_json(
+                    self.model,
+                    context.contents(self._opening(scenario_info)),
+                    'ScenarioFeedback',
+                    system=self._feedback_system(scenario_info))
+            else:
+                data = None
+                text = await gateway.agenerate(
+                    self.model,
+                    context.contents(self._opening(scenario_info)),
+                    system=self._feedback_system(scenario_info))
         except Exception as e:
+            return self._feedback_fallback(structured)
+        
+        if structured:
+            return self._finish_structured_turn(current_scenario,
+                                                scenario_info, data, session)
+        return self._finish_turn(current_scenario, scenario_info, text,
+                                 session)
+    
+    def _finish_structured_turn(self, current_scenario, scenario_info, data,
+                                session):
+        if not data:
+            result = self._finish_turn(current_scenario, scenario_info, None,
+                                       session)
+            result['coach_response'] = {'error': result['coach_response']}
+            return result
+        # The history keeps the reply as the text the user was shown
+        text = '\n\n'.join([data['feedback'], *data['suggestions'],
+                             data['next_prompt']])
+        result = self._finish_turn(current_scenario, scenario_info, text,
+                                   session)
+        result['coach_response'] = data
+        return result
+    
+    def _finish_turn(self, current_scenario, scenario_info, text, session):
+        coach_response = text or FEEDBACK_EMPTY_MESSAGE
+        self._context(current_scenario).add('model', coach_response)
+        session['current_scenario'] = current_scenario
+        
+        # Check if scenario should end (after 3-5 exchanges)
+        response_count = len(current_scenario['responses'])
+        if response_count >= 4:
+            xp_earned = self._complete_scenario(scenario_info, session)
+            
             return {
-                "scenario": scenario,
-                "introduction": f"Welcome to the {scenario['title']} practice session! This is a great opportunity to improve your communication skills. Let's begin with a simple question: How would you introduce yourself in this situation?",
-                "stage": "active"
+                "coach_response": coach_response,
+                "scenario_complete": True,
+                "xp_earned": xp_earned,
+                "stage": "complete"
             }
+        
+        return {
+            "coach_response": coach_response,
+            "scenario_complete": False,
+            "stage": "active"
+        }
+    
+    def _feedback_fallback(self, structured=False):
+        return {
+            "coach_response": {'error': FEEDBACK_ERROR_MESSAGE}
+            if structured else FEEDBACK_ERROR_MESSAGE,
+            "scenario_complete": False,
+            "stage": "active"
+        }
     
-    def continue_scenario(self, user_response, session):
-        """Continue the communication scenario based on user response"""
+    def stream_scenario(self, user_response, session):
+        """Continue the scenario, streaming the coach's feedback.
+        
+        Returns ``(chunks, result)``: an iterator of feedback text and the
+        completion state. The session is fully updated before returning,
+        because a streamed response cannot set the session cookie once the
+        body has started. Only the coach's reply is added afterwards, and
+        only to server-side sessions, which can still be saved then.
+        """
         current_scenario = session.get('current_scenario')
         
         if not current_scenario:
-            return {"error": "No active scenario found"}
+            return None, {"error": "No active scenario found"}
         
-        # Add user response to history
+        scenario_info = self._record_response(current_scenario, user_response,
+                                              session)
+        context = self._context(current_scenario)
+        older = context.overflow()
+        context.compact(
+            self._summarize(context.summary, older) if older else None)
+        contents = context.contents(self._opening(scenario_info))
+        system = self._feedback_system(scenario_info)
+        
+        if len(current_scenario['responses']) >= 4:
+            xp_earned = self._complete_scenario(scenario_info, session)
+            result = {
+                "scenario_complete": True,
+                "xp_earned": xp_earned,
+                "stage": "complete"
+            }
+        else:
+            result = {"scenario_complete": False, "stage": "active"}
+        
+        return self._stream(contents, system, session), result
+    
+    def _stream(self, contents, system, session):
+        try:
+            chunks = []
+            for chunk in gateway.generate_stream(self.model, contents,
+                                                 system=system):
+                chunks.append(chunk)
+                yield chunk
+            if not chunks:
+                yield FEEDBACK_EMPTY_MESSAGE
+        except Exception:
+            yield FEEDBACK_ERROR_MESSAGE
+            return
+        
+        current_scenario = session.get('current_scenario')
+        if chunks and current_scenario:
+            self._context(current_scenario).add('model', ''.join(chunks))
+            session['current_scenario'] = current_scenario
+            try:
+                store_after_response(session)
+            except Exception as e:
+                print(f"Session save error: {str(e)}")
+    
+    def _record_response(self, current_scenario, user_response, session):
+        """Add the user's response to the scenario history"""
         current_scenario['responses'].append({
             'user_response': user_response,
             'timestamp': datetime.now().isoformat()
         })
-        
-        scenario_info = self.scenarios[current_scenario['type']]
-        
-        try:
-            # Generate AI feedback and next prompt
-            system_prompt = f"""You are a communication coach providing feedback in a '{scenario_info['title']}' scenario.
-            
-            User's latest response: "{user_response}"
+        self._context(current_scenario).add('user', user_response)
+        # Reassign so the session notices the nested change
+        session['current_scenario'] = current_scenario
+        return self.scenarios[current_scenario['type']]
+    
+    def _context(self, current_scenario):
+        return ScenarioContext(current_scenario.setdefault('context', {}),
+                               max_tokens=self.context_tokens)
+    
+    def _opening(self, scenario_info):
+        return f"I'd like to practice the '{scenario_info['title']}' scenario."
+    
+    def _feedback_system(self, scenario_info):
+        # Fixed per scenario, so it can be cached separately from the turns
+        return f"""You are a communication coach running a '{scenario_info['title']}' practice scenario with the user.
             
-            Provide:
+            After each of the user's responses, provide:
             1. Brief, constructive feedback on their response
             2. Specific suggestions for improvement
             3. A follow-up question or next challenge
             
             Keep feedback encouraging but specific. Help them improve their communication skills.
             """
+    
+    def _summarize(self, summary, turns):
+        """Running summary with ``turns`` folded in, or None on failure"""
+        try:
+            return gateway.generate(self.model,
+                                    self._summary_prompt(summary, turns))
+        except Exception as e:
+            print(f"Scenario summary error: {str(e)}")
+            return None
+    
+    async def _asummarize(self, summary, turns):
+        try:
+            return await gateway.agenerate(
+                self.model, self._summary_prompt(summary, turns))
+        except Exception as e:
+            print(f"Scenario summary error: {str(e)}")
+            return None
+    
+    def _summary_prompt(self, summary, turns):
+        return f"""Summarize this communication practice conversation between a user and their coach in under 150 words.
+            Keep what the user said, the feedback they were given and what they are working on.
             
-            response = client.models.generate_content(
-                model=self.model,
-                contents=system_prompt
-            )
-            
-            coach_response = response.text or "Good response! Let's continue practicing."
-            
-            # Check if scenario should end (after 3-5 exchanges)
-            response_count = len(current_scenario['responses'])
-            if response_count >= 4:
-                # End scenario and award XP
-                xp_earned = scenario_info['xp_reward']
-                session['user_xp'] = session.get('user_xp', 0) + xp_earned
-                
-                # Add to activity history
-                if 'activity_history' not in session:
-                    session['activity_history'] = []
-                
-                session['activity_history'].insert(0, {
-                    'title': f'Completed {scenario_info["title"]}',
-                    'description': f'Practiced communication skills and earned {xp_earned} XP',
-                    'xp': xp_earned,
-                    'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-                
-                # Clear current scenario
-                session.pop('current_scenario', None)
-                
-                return {
-                    "coach_response": coach_response,
-                    "scenario_complete": True,
-                    "xp_earned": xp_earned,
-                    "stage": "complete"
-                }
-            
-            return {
-                "coach_response": coach_response,
-                "scenario_complete": False,
-                "stage": "active"
-            }
+            Summary so far: {summary or 'None'}
             
-        except Exception as e:
-            return {
-                "coach_response": "I appreciate your response. Let's continue practicing - can you try expressing that idea in a different way?",
-                "scenario_complete": False,
-                "stage": "active"
-            }
+            New turns:
+            {format_turns(turns)}
+            """
     
-    def get_quick_tip(self, topic=None):
-        """Get a quick communication tip"""
-        tips = [
-            "Maintain eye contact to show confidence and engagement",
-            "Use the STAR method (Situation, Task, Action, Result) when answering behavioral questions",
-            "Practice active listening by paraphrasing what others say",
-            "Start with a strong handshake and genuine smile",
-            "Prepare 3-5 thoughtful questions to ask your interviewer",
-            "Use specific examples to demonstrate your skills and achievements",
-            "Match your communication style to your audience",
-            "Take a pause before answering difficult questions",
-            "End conversations with a clear next step or follow-up",
-            "Practice your elevator pitch until it feels natural"
-        ]
+    def _complete_scenario(self, scenario_info, session):
+        """End the scenario and award its XP"""
+        xp_earned = scenario_info['xp_reward']
+        session['user_xp'] = session.get('user_xp', 0) + xp_earned
         
+        record_activity(
+            session, ActivityCategory.COMMUNICATION,
+            f'Completed {scenario_info["title"]}',
+            f'Practiced communication skills and earned {xp_earned} XP',
+            xp=xp_earned,
+            scenario=session['current_scenario']['type'],
+            scenario_titles=self.scenario_titles)
+        
+        # Clear current scenario
+        session.pop('current_scenario', None)
+        return xp_earned
+    
+    async def aget_quick_tip(self, topic=None):
+        """Get a quick communication tip"""
         if topic:
-            # Try to provide topic-specific tip using AI
             try:
-                system_prompt = f"""Provide a specific, actionable communication tip related to: {topic}
+                text = await gateway.agenerate(self.model,
+                                               self._tip_prompt(topic))
                 
-                Make it practical and something someone can implement immediately.
-                Keep it to 1-2 sentences maximum.
-                """
-                
-                response = client.models.generate_content(
-                    model=self.model,
-                    contents=system_prompt
-                )
-                
-                return response.text or tips[0]
+                return text or QUICK_TIPS[0]
                 
             except Exception:
-                return tips[0]
+                return QUICK_TIPS[0]
         
-        # Return random tip
-        import random
-        return random.choice(tips)
+        return random.choice(QUICK_TIPS)
+    
+    def _tip_prompt(self, topic):
+        return f"""Provide a specific, actionable communication tip related to: {topic}
+                
+                Make it practical and something someone can implement immediately.
+                Keep it to 1-2 sentences maximum.
+                """
     
     def get_user_progress(self, session):
         """Get user's communication progress and stats"""
-        activity_history = session.get('activity_history', [])
-        communication_activities = [
-            activity for activity in activity_history
-            if 'communication' in activity.get('title', '').lower() or 
-               any(scenario in activity.get('title', '').lower() for scenario in self.scenarios.keys())
-        ]
-        
-        total_scenarios = len(communication_activities)
-        total_xp_from_communication = sum(
-            activity.get('xp', 0) for activity in communication_activities
-        )
+        activity_log = load_activity_log(session, self.scenario_titles)
+        totals = activity_log.totals
         
         # Calculate level based on total XP
         total_xp = session.get('user_xp', 0)
@@ -240,15 +441,35 @@ class CommunicationCoach:
             "level": level,
             "total_xp": total_xp,
             "xp_to_next_level": xp_to_next_level,
-            "scenarios_completed": total_scenarios,
-            "communication_xp": total_xp_from_communication,
-            "recent_activities": communication_activities[:5]
+            "scenarios_completed": totals['scenarios_completed'],
+            "communication_xp": totals['communication_xp'],
+            "scenario_counts": totals['per_scenario'],
+            "recent_activities": activity_log.recent_in(
+                ActivityCategory.COMMUNICATION, 5)
         }
     
-    def get_tone_analysis(self, text):
-        """Analyze the tone of user's text"""
-        try:
-            system_prompt = f"""Analyze the tone and communication effectiveness of this text:
+    async def aget_tone_analysis(self, text, deep=False):
+        """Analyze the tone of user's text.
+        
+        The metrics are computed locally; ``deep`` adds written feedback
+        from the AI under ``feedback``.
+        """
+        analysis = analyze_tone(text)
+        if deep:
+            try:
+                feedback = await gateway.agenerate(self.model,
+                                                   self._tone_prompt(text))
+                analysis['feedback'] = feedback or TONE_EMPTY_MESSAGE
+            except Exception as e:
+                analysis['feedback'] = TONE_ERROR_MESSAGE
+        return analysis
+    
+    def get_tone_analyses(self, texts):
+        """Local tone analysis of many texts at once, without the AI"""
+        return analyze_tones(texts)
+    
+    def _tone_prompt(self, text):
+        return f"""Analyze the tone and communication effectiveness of this text:
             
             "{text}"
             
@@ -260,14 +481,4 @@ class CommunicationCoach:
             5. Suggested revisions if needed
             
             Keep feedback constructive and specific.
-            """
-            
-            response = client.models.generate_content(
-                model=self.model,
-                contents=system_prompt
-            )
-            
-            return response.text or "Your message is clear and professional. Well done!"
-            
-        except Exception as e:
-            return "I'm having trouble analyzing the tone right now. Generally, aim for clarity, confidence, and appropriate formality for your audience."
\ No newline at end of file
+            """
\ No newline at end of file
@@ -0,0 +1,360 @@
+"""Inverted indexes over the internship catalogue for fast matching"""
+import heapq
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from skill_taxonomy import taxonomy
+from text_index import TextIndex, text_terms
+
+DEGREE_KEYWORDS = ['computer', 'engineering', 'science']
+GOAL_POINTS = 10
+# Bump whenever normalize_internship changes shape, so stores re-normalize
+NORMALIZED_VERSION = 2
+
+
+def experience_points(user_exp, internship_exp):
+    """Points awarded for the experience level part of a match"""
+    if user_exp == internship_exp:
+        return 20
+    if (user_exp == 'intermediate' and internship_exp == 'entry') or \
+       (user_exp == 'advanced' and internship_exp in ['entry', 'intermediate']):
+        return 15
+    return 0
+
+
+def normalize_internship(internship):
+    """Match-relevant fields of a listing, lowercased once"""
+    return {
+        'required_skills':
+        [skill.lower() for skill in internship['required_skills']],
+        'preferred_degree':
+        [degree.lower() for degree in internship['preferred_degree']],
+        'experience_level': internship['experience_level'].lower(),
+        'text_terms': listing_terms(internship)
+    }
+
+
+def listing_terms(internship):
+    """Term counts of the text a listing is matched on for goal alignment"""
+    return text_terms(
+        f"{internship['title']} {internship.get('description', '')}")
+
+
+def goal_text(user_profile):
+    """The profile text matched against listing text"""
+    return f"{user_profile.get('career_goals', '')} " \
+        f"{user_profile.get('interests', '')}"
+
+
+def goal_points(similarity):
+    """Goal alignment points for a cosine similarity in [0, 1]"""
+    return GOAL_POINTS * similarity
+
+
+# One listing changed in place: its position, normalize_internship records
+# before and after (None when absent) and the goal terms that entered or
+# left the vocabulary, which changes the goal points of profiles using them
+ListingChange = namedtuple('ListingChange', 'position old new vocabulary')
+
+# The parts of a profile scoring reads, see InternshipIndex.prepare
+PreparedProfile = namedtuple('PreparedProfile',
+                             'degree technical skills experience query')
+
+
+def _insert(postings, key, position):
+    positions = postings.get(key)
+    if positions is None:
+        postings[key] = [position]
+    elif positions[-1] < position:
+        positions.append(position)
+    else:
+        insort(positions, position)
+
+
+def _discard(postings, key, position):
+    positions = postings[key]
+    del positions[bisect_left(positions, position)]
+    if not positions:
+        del postings[key]
+
+
+class InternshipIndex:
+    """Normalizes listings once and scores only the listings a profile can reach.
+
+    Scores are identical to ``InternshipMatcher.calculate_match_score``; the
+    index just avoids touching listings that share nothing with the profile.
+    Listings are referred to by their position in the catalogue so ties keep
+    catalogue order, like the stable sort in the original ranking.
+
+    ``set_listing`` and ``remove_listing`` patch single listings in place.
+    Removed listings leave their position empty. Goal points keep using the
+    term statistics of the last full build, see TextIndex.
+    """
+
+    def __init__(self, internships, normalized=None, text_stats=None):
+        """Index ``internships``, a sequence of listing dicts.
+
+        ``normalized`` optionally supplies the normalize_internship records
+        in the same order, so a store-backed sequence is only read for the
+        listings that end up in a result. A None record marks an empty
+        position. ``text_stats`` is passed on to TextIndex, for an index
+        over one shard of a catalogue.
+        """
+        if normalized is None:
+            internships = list(internships)
+            normalized = map(normalize_internship, internships)
+        self.internships = internships
+        self.skill_index = {}  # required skill id -> positions
+        self.degree_index = {}  # lowercased preferred degree -> positions
+        self.experience_index = {}  # lowercased experience level -> positions
+        self.degree_keyword_positions = set()
+        self.required_skills = []
+        self.required_skill_counts = []
+        self.removed = set()  # empty positions
+        listing_text = []
+
+        for position, record in enumerate(normalized):
+            self.required_skills.append(frozenset())
+            self.required_skill_counts.append(0)
+            if record is None:
+                self.removed.add(position)
+                listing_text.append(None)
+                continue
+            self._add(position, record)
+            listing_text.append(record['text_terms'])
+
+        self.text = TextIndex(listing_text, text_stats)
+
+    def _add(self, position, record):
+        required_skills = taxonomy.listing_skills(record['required_skills'])
+        self.required_skills[position] = required_skills
+        self.required_skill_counts[position] = len(required_skills)
+        for skill in required_skills:
+            _insert(self.skill_index, skill, position)
+
+        degrees = record['preferred_degree']
+        for degree in set(degrees):
+            _insert(self.degree_index, degree, position)
+        if any(keyword in ' '.join(degrees) for keyword in DEGREE_KEYWORDS):
+            self.degree_keyword_positions.add(position)
+
+        level = record['experience_level']
+        _insert(self.experience_index, level, position)
+
+    def _remove(self, position, record):
+        for skill in self.required_skills[position]:
+            _discard(self.skill_index, skill, position)
+        self.required_skills[position] = frozenset()
+        self.required_skill_counts[position] = 0
+        for degree in set(record['preferred_degree']):
+            _discard(self.degree_index, degree, position)
+        self.degree_keyword_positions.discard(position)
+        _discard(self.experience_index, record['experience_level'], position)
+
+    def set_listing(self, position, record, old=None):
+        """Index ``record`` at ``position``, replacing the listing ``old``.
+
+        ``position`` is an empty or existing position, or the next one.
+        Returns a ListingChange.
+        """
+        vocabulary = set()
+        if old is not None:
+            self._remove(position, old)
+            vocabulary ^= self.text.remove_document(position,
+                                                    old['text_terms'])
+        if position == len(self):
+            self.required_skills.append(frozenset())
+            self.required_skill_counts.append(0)
+        self.removed.discard(position)
+        self._add(position, record)
+        vocabulary ^= self.text.add_document(position, record['text_terms'])
+        return ListingChange(position, old, record, frozenset(vocabulary))
+
+    def remove_listing(self, position, old):
+        """Empty ``position``, which held the listing ``old``"""
+        self._remove(position, old)
+        self.removed.add(position)
+        vocabulary = self.text.remove_document(position, old['text_terms'])
+        return ListingChange(position, old, None, frozenset(vocabulary))
+
+    def __len__(self):
+        return len(self.required_skill_counts)
+
+    def degree_points(self, user_profile):
+        """Map position -> degree points for every listing that earns any"""
+        user_degree = user_profile.get('degree', '').lower()
+        return self._degree_points(
+            user_degree,
+            any(keyword in user_degree for keyword in DEGREE_KEYWORDS))
+
+    def _degree_points(self, user_degree, technical):
+        points = dict.fromkeys(self.degree_index.get(user_degree, ()), 30)
+        if technical:
+            for position in self.degree_keyword_positions:
+                points.setdefault(position, 15)
+        return points
+
+    @staticmethod
+    def user_skills(user_profile):
+        """Skill ids of the user's free-text skills"""
+        return taxonomy.parse(user_profile.get('skills', ''))
+
+    def experience_points(self, user_profile):
+        """Map position -> experience points for every listing that earns any"""
+        return self._experience_points(
+            user_profile.get('experience_level', 'entry').lower())
+
+    def _experience_points(self, user_exp):
+        points = {}
+        for level, positions in self.experience_index.items():
+            level_points = experience_points(user_exp, level)
+            if level_points:
+                points.update(dict.fromkeys(positions, level_points))
+        return points
+
+    def goal_points(self, user_profile):
+        """Map position -> goal points for every listing that earns any"""
+        return self._goal_points(
+            self.text.query_vector(goal_text(user_profile)))
+
+    def _goal_points(self, query):
+        return {
+            position: goal_points(similarity)
+            for position, similarity in self.text.scores(query).items()
+        }
+
+    def listing_goal_points(self, user_profile, internship):
+        """Goal points of one listing, which need not be in the index"""
+        query = self.text.query_vector(goal_text(user_profile))
+        vector = self.text.document_vector(listing_terms(internship))
+        return goal_points(self.text.dot(query, vector))
+
+    def goal_matches(self, user_profile, n=10):
+        """Best ``n`` (position, similarity) pairs by goal text alone.
+
+        Uses the threshold algorithm, so only the top of each posting list
+        is usually read.
+        """
+        query = self.text.query_vector(goal_text(user_profile))
+        return self.text.top_n(query, n)
+
+    def prepare(self, user_profile):
+        """What rank and score_record need from a profile, computed once"""
+        user_degree = user_profile.get('degree', '').lower()
+        return PreparedProfile(
+            user_degree,
+            any(keyword in user_degree for keyword in DEGREE_KEYWORDS),
+            self.user_skills(user_profile),
+            user_profile.get('experience_level', 'entry').lower(),
+            self.text.query_vector(goal_text(user_profile)))
+
+    def score_record(self, prepared, record):
+        """Score of a normalize_internship record, as top_k would score it"""
+        degrees = record['preferred_degree']
+        if prepared.degree in degrees:
+            score = 30
+        elif prepared.technical and any(keyword in ' '.join(degrees)
+                                        for keyword in DEGREE_KEYWORDS):
+            score = 15
+        else:
+            score = 0
+        required = taxonomy.listing_skills(record['required_skills'])
+        if required:
+            score += min(40, (len(required & prepared.skills) /
+                              len(required)) * 40)
+        score += experience_points(prepared.experience,
+                                   record['experience_level'])
+        similarity = self.text.dot(
+            prepared.query, self.text.document_vector(record['text_terms']))
+        # Like top_k, which adds goal points only where a term is shared
+        if similarity:
+            score += goal_points(similarity)
+        return min(100, score)
+
+    def skill_score(self, position, matching_skills):
+        required = self.required_skill_counts[position]
+        if not required:
+            return 0
+        return min(40, (matching_skills / required) * 40)
+
+    def top_k(self, user_profile, k=5, min_score=20, after=None):
+        """Return the best ``k`` (position, score) pairs for a profile"""
+        return self.rank(self.prepare(user_profile), k, min_score, after)
+
+    def rank(self, prepared, k=5, min_score=20, after=None):
+        """Return the best ``k`` (position, score) pairs, best first.
+
+        Only scores above ``min_score`` are kept; pass ``None`` to rank every
+        listing, including those scoring 0. ``after`` is the
+        ``(score, position)`` of the last pair of a previous page, and
+        restricts the result to pairs ranked after it.
+
+        Candidates are visited in order of an upper bound (degree,
+        experience and goal points plus the most skill points they could
+        earn) so skill matching stops as soon as no remaining listing can
+        enter the heap.
+        """
+        if k <= 0:
+            return []
+        degree_points = self._degree_points(prepared.degree,
+                                            prepared.technical)
+        exp_points = self._experience_points(prepared.experience)
+        goal_points = self._goal_points(prepared.query)
+        user_skills = prepared.skills
+        skill_positions = set()
+        for skill in user_skills:
+            skill_positions.update(self.skill_index.get(skill, ()))
+
+        # Same addition order as calculate_match_score so floats agree
+        def points(position, skill_points):
+            score = degree_points.get(position, 0)
+            score += skill_points
+            score += exp_points.get(position, 0)
+            score += goal_points.get(position, 0)
+            return min(100, score)
+
+        bounds = {}
+        for position in skill_positions:
+            bounds[position] = points(
+                position, self.skill_score(position, len(user_skills)))
+        for position in set(degree_points).union(exp_points, goal_points):
+            if position not in bounds:
+                bounds[position] = points(position,
+                                          self.skill_score(position, 0))
+
+        after_key = None if after is None else (after[0], -after[1])
+        heap = []  # min-heap of (score, -position): worst kept pair on top
+        for position in sorted(bounds, key=lambda p: (-bounds[p], p)):
+            bound = bounds[position]
+            if min_score is not None and bound <= min_score:
+                break
+            if len(heap) == k and (bound, -position) < heap[0]:
+                break
+            if position in skill_positions:
+                matching_skills = len(self.required_skills[position] &
+                                      user_skills)
+                score = points(position,
+                               self.skill_score(position, matching_skills))
+            else:
+                score = bound
+            if min_score is not None and score <= min_score:
+                continue
+            key = (score, -position)
+            if after_key is not None and key >= after_key:
+                continue
+            if len(heap) < k:
+                heapq.heappush(heap, key)
+            elif key > heap[0]:
+                heapq.heapreplace(heap, key)
+
+        # Listings the indexes never reach score 0 and rank last
+        if len(heap) < k and (min_score is None or min_score < 0):
+            position = 0 if after_key is None or after_key[0] > 0 else max(
+                0, -after_key[1] + 1)
+            while len(heap) < k and position < len(self):
+                if position not in bounds and position not in self.removed:
+                    heapq.heappush(heap, (0.0, -position))
+                position += 1
+
+        return [(-negated, score)
+                for score, negated in sorted(heap, reverse=True)]
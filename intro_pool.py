@@ -0,0 +1,126 @@
+"""Pre-generated scenario introductions, so starting a scenario skips Gemini"""
+import random
+import sqlite3
+import threading
+import time
+
+USER_NAME_PLACEHOLDER = '[[USER_NAME]]'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intros (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scenario TEXT NOT NULL,
+    template TEXT NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS intros_scenario ON intros (scenario, uses);
+"""
+
+
+def personalize(template, user_name):
+    return template.replace(USER_NAME_PLACEHOLDER, user_name)
+
+
+class IntroPool:
+    """Keeps ``size`` ready-made intros per scenario type in SQLite.
+
+    Intros are templates with ``[[USER_NAME]]`` where the user's name goes.
+    Each is served up to ``max_uses`` times, picked at random among the
+    live ones, then retired. When fewer than ``low_water`` are left for a
+    scenario, a background thread asks ``generate(scenario_type)`` for new
+    templates (None means unusable) until the pool is full again. The file
+    survives restarts and is shared by all workers on the host.
+    """
+
+    def __init__(self, path, generate, size=5, low_water=2, max_uses=20):
+        self.path = path
+        self.generate = generate
+        self.size = size
+        self.low_water = low_water
+        self.max_uses = max_uses
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refilling = set()
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def live_count(self, scenario_type):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM intros WHERE scenario = ? AND uses < ?',
+            (scenario_type, self.max_uses)).fetchone()[0]
+
+    def take(self, scenario_type):
+        """A ready intro template for the scenario, or None if there is none"""
+        conn = self._connect()
+        rows = conn.execute(
+            'SELECT id, template FROM intros WHERE scenario = ? AND uses < ?',
+            (scenario_type, self.max_uses)).fetchall()
+        if len(rows) <= self.low_water:
+            self.refill(scenario_type)
+        if not rows:
+            return None
+        intro_id, template = random.choice(rows)
+        conn.execute('UPDATE intros SET uses = uses + 1 WHERE id = ?',
+                     (intro_id, ))
+        return template
+
+    def refill(self, scenario_type):
+        """Top the scenario's pool up in the background, once at a time"""
+        with self._lock:
+            if scenario_type in self._refilling:
+                return
+            self._refilling.add(scenario_type)
+        threading.Thread(target=self._refill, args=(scenario_type, ),
+                         daemon=True).start()
+
+    def _refill(self, scenario_type):
+        try:
+            # Bounded, in case the model keeps returning unusable text
+            for _ in range(self.size * 2):
+                if self.live_count(scenario_type) >= self.size:
+                    break
+                template = self.generate(scenario_type)
+                if template:
+                    self._add(scenario_type, template)
+        except Exception as e:
+            print(f"Intro pool refill error: {str(e)}")
+        finally:
+            with self._lock:
+                self._refilling.discard(scenario_type)
+
+    def _add(self, scenario_type, template):
+        conn = self._connect()
+        # Workers may refill the same scenario at once; don't overfill
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            live = conn.execute(
+                'SELECT COUNT(*) FROM intros WHERE scenario = ? AND uses < ?',
+                (scenario_type, self.max_uses)).fetchone()[0]
+            if live < self.size:
+                conn.execute(
+                    'INSERT INTO intros (scenario, template, created_at) '
+                    'VALUES (?, ?, ?)', (scenario_type, template, time.time()))
+            conn.execute('DELETE FROM intros WHERE uses >= ?',
+                         (self.max_uses, ))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def warm(self, scenario_types):
+        """Start filling every scenario's pool that is below its size"""
+        for scenario_type in scenario_types:
+            if self.live_count(scenario_type) < self.size:
+                self.refill(scenario_type)
@@ -0,0 +1,149 @@
+"""Shared cache for Gemini responses"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so re-indented prompts share a cache entry"""
+    return ' '.join(prompt.split())
+
+
+class LLMResponseCache:
+    """Two-tier response cache keyed on (model, normalized prompt).
+
+    The first tier is an in-process LRU bounded by entry count and total
+    response size, with a TTL. The optional second tier is a SQLite file that
+    all gunicorn workers on the host share, so one worker's answer serves the
+    others too.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=8 * 1024 * 1024,
+                 ttl=3600, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()  # key -> (expires_at, text, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        if path:
+            # Not kept open, so forked workers never inherit a connection
+            with closing(sqlite3.connect(path, timeout=5)) as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS responses ('
+                             'key TEXT PRIMARY KEY, response TEXT NOT NULL, '
+                             'expires_at REAL NOT NULL)')
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.environ.get('MENTORA_LLM_CACHE_ENTRIES',
+                                           1024)),
+            max_bytes=int(
+                os.environ.get('MENTORA_LLM_CACHE_BYTES', 8 * 1024 * 1024)),
+            ttl=float(os.environ.get('MENTORA_LLM_CACHE_TTL', 3600)),
+            path=os.environ.get('MENTORA_LLM_CACHE_PATH') or None)
+
+    @staticmethod
+    def key(model, prompt):
+        data = f"{model}\0{normalize_prompt(prompt)}".encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, model, prompt):
+        """Return the cached response text, or None"""
+        key = self.key(model, prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._remove(key)
+
+        if self.path:
+            row = self._connect().execute(
+                'SELECT response, expires_at FROM responses WHERE key = ?',
+                (key, )).fetchone()
+            if row is not None and row[1] > now:
+                with self._lock:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, model, prompt, text):
+        key = self.key(model, prompt)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, text, expires_at)
+        if self.path:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?)',
+                         (key, text, expires_at))
+            # Keep the shared file from growing without bound
+            conn.execute('DELETE FROM responses WHERE expires_at <= ?',
+                         (time.time(), ))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.path:
+            self._connect().execute('DELETE FROM responses')
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def _store(self, key, text, expires_at):
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, text, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or \
+                self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[2]
+
+
+response_cache = LLMResponseCache.from_env()
+
@@ -0,0 +1,704 @@
+"""Single Gemini client shared by the AI features.
+
+Every call goes through ``gateway``, which adds the response cache, a
+per-worker concurrency limit, per-attempt timeouts within an overall
+deadline, jittered retries for transient errors and a circuit breaker. When
+the breaker is open calls fail immediately, so callers drop straight to
+their canned fallback text instead of waiting on a struggling API. Long
+system instructions are put in a Gemini context cache instead of being
+sent with every request.
+
+The Gemini SDK is imported and the client built on first use, so importing
+the app stays cheap and a client is never shared across a fork (e.g.
+gunicorn ``--preload``). Async calls use a client per event loop, since an
+async connection cannot outlive the loop that opened it.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from types import SimpleNamespace
+
+from llm_cache import response_cache
+from metrics import metrics
+from single_flight import SingleFlight
+
+# HTTP statuses worth retrying: rate limits, timeouts and server errors
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+# Rough size of a token for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def cache_text(prompt, system=None, schema=None):
+    """Text identifying a request in the response cache.
+
+    ``prompt`` is a string or a list of Gemini content dicts; a plain
+    string prompt without a system instruction or schema is its own key.
+    """
+    if isinstance(prompt, str) and system is None and schema is None:
+        return prompt
+    request = {'system': system, 'contents': prompt}
+    if schema is not None:
+        # A changed schema must not be answered from the old one's cache
+        request['schema'] = schema_text(schema)
+    return json.dumps(request, sort_keys=True)
+
+
+def response_schema(schema):
+    """The pydantic model for ``schema``, importing ``ai_schemas`` on first
+    use since pydantic is slow to import"""
+    if isinstance(schema, str):
+        import ai_schemas
+        return getattr(ai_schemas, schema)
+    return schema
+
+
+@functools.lru_cache(maxsize=None)
+def schema_text(schema):
+    return json.dumps(schema.model_json_schema(), sort_keys=True)
+
+
+class LLMBusyError(RuntimeError):
+    """No Gemini call slot became free within the queue timeout"""
+
+
+class LLMUnavailableError(RuntimeError):
+    """The circuit breaker is open, so the call was not attempted"""
+
+
+def is_retryable(exc):
+    import httpx
+    from google.genai import errors
+
+    if isinstance(exc, errors.APIError):
+        return exc.code in RETRYABLE_STATUS
+    # Timeouts, refused and dropped connections
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Opens when too many recent calls failed, then probes for recovery.
+
+    Outcomes of the last ``window`` calls are kept. Once at least
+    ``min_calls`` are recorded and the failure share reaches
+    ``failure_rate``, the breaker opens and rejects calls for ``cooldown``
+    seconds. After that a single probe call is let through: success closes
+    the breaker, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_rate=0.5, window=20, min_calls=10,
+                 cooldown=30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)  # True for success
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and \
+                time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self):
+        """Whether a call may go ahead now"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and \
+                    failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def cancel(self):
+        """Forget a call that ended without an outcome, e.g. cancelled"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probing = False
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._outcomes.clear()
+        self.times_opened += 1
+
+
+class ContextCaches:
+    """Gemini context caches for long, fixed system instructions.
+
+    Gemini only caches content above a minimum size (``min_tokens``, 1024
+    for Flash models), so shorter instructions, and any whose cache could
+    not be created, are sent inline with each request instead. The coach's
+    feedback instructions are about 100 tokens and always go inline; only
+    long instructions, such as a scenario with a lengthy brief, are cached.
+    A cache is reused until shortly before its ``ttl`` runs out, then
+    created again.
+    """
+
+    def __init__(self, min_tokens=1024, ttl=3600, retry_after=600):
+        self.min_tokens = min_tokens
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._entries = {}  # (model, digest) -> (name or None, valid until)
+        self._creating = {}  # (model, digest) -> lock held while creating
+        self._lock = threading.Lock()
+        self.created = 0
+        self.failed = 0
+
+    def get(self, client, model, system):
+        """Name of the cache holding ``system``, or None to send it inline"""
+        known, name = self.lookup(model, system)
+        if known:
+            return name
+        with self._lock:
+            creating = self._creating.setdefault(self._key(model, system),
+                                                 threading.Lock())
+        with creating:
+            # Concurrent callers wait for one cache rather than make their own
+            known, name = self.lookup(model, system)
+            return name if known else self._create(client, model, system)
+
+    def lookup(self, model, system):
+        """``(True, get's answer)`` if ``get`` needs no API call, else
+        ``(False, None)``"""
+        if estimate_tokens(system) < self.min_tokens:
+            return True, None
+        with self._lock:
+            entry = self._entries.get(self._key(model, system))
+        if entry is not None and entry[1] > time.monotonic():
+            return True, entry[0]
+        return False, None
+
+    @staticmethod
+    def _key(model, system):
+        return (model, hashlib.sha256(system.encode('utf-8')).hexdigest())
+
+    def _create(self, client, model, system):
+        from google.genai import types
+        now = time.monotonic()
+        try:
+            cache = client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system, ttl=f'{self.ttl}s'))
+            entry = (cache.name, now + self.ttl * 0.9)
+            counter = 'created'
+        except Exception as e:
+            print(f"Context cache error: {str(e)}")
+            entry = (None, now + self.retry_after)
+            counter = 'failed'
+        with self._lock:
+            self._entries[self._key(model, system)] = entry
+            setattr(self, counter, getattr(self, counter) + 1)
+        return entry[0]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'created': self.created,
+                'failed': self.failed,
+                'active': sum(1 for name, _ in self._entries.values() if name)
+            }
+
+
+class LLMGateway:
+    """Cached, rate-limited and fault-tolerant access to one Gemini client"""
+
+    def __init__(self, client=None, cache=response_cache, concurrency=8,
+                 queue_timeout=30.0, timeout=20.0, deadline=45.0, retries=2,
+                 backoff=0.5, max_backoff=8.0, breaker=None,
+                 flight=None, context_caches=None):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout  # seconds per attempt
+        self.deadline = deadline  # seconds for the call including retries
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.flight = flight or SingleFlight()
+        self.context_caches = context_caches or ContextCaches()
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self._client = client
+        self._client_pid = os.getpid() if client is not None else None
+        self._client_given = client is not None
+        self._client_lock = threading.Lock()
+        self._inherited_clients = []
+        self._aio_clients = {}  # event loop -> [async client, calls]
+        self._ssl_context = None
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1024)  # seconds, recent calls
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.retried = 0
+        self.short_circuits = 0
+        self.busy = 0
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        # Coalescing across workers hands results over through the shared
+        # cache file, so it is only enabled when there is one
+        lock_dir = env('MENTORA_LLM_SINGLEFLIGHT_DIR') \
+            if response_cache.path else None
+        return cls(
+            concurrency=int(env('MENTORA_LLM_CONCURRENCY', 8)),
+            queue_timeout=float(env('MENTORA_LLM_QUEUE_TIMEOUT', 30)),
+            timeout=float(env('MENTORA_LLM_TIMEOUT', 20)),
+            deadline=float(env('MENTORA_LLM_DEADLINE', 45)),
+            retries=int(env('MENTORA_LLM_RETRIES', 2)),
+            breaker=CircuitBreaker(
+                failure_rate=float(env('MENTORA_LLM_BREAKER_FAILURE_RATE',
+                                       0.5)),
+                cooldown=float(env('MENTORA_LLM_BREAKER_COOLDOWN', 30))),
+            flight=SingleFlight(lock_dir=lock_dir))
+
+    @property
+    def client(self):
+        """The Gemini client for this process, created on first use"""
+        if self._client_pid != os.getpid():
+            with self._client_lock:
+                if self._client_pid != os.getpid():
+                    if self._client is not None:
+                        # Built before a fork: its pooled connections belong
+                        # to the parent, so never use or close it here
+                        self._inherited_clients.append(self._client)
+                    self._client = self._make_client()
+                    self._client_pid = os.getpid()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        with self._client_lock:
+            self._client = client
+            self._client_pid = os.getpid()
+            self._client_given = True
+
+    @asynccontextmanager
+    async def _aio(self):
+        """The Gemini async client for the running event loop.
+
+        Flask runs each async view on a new event loop and closes it
+        afterwards, and a kept-alive connection stays tied to the loop that
+        opened it, so one shared async client fails every other call with
+        "Event loop is closed". Each loop gets its own client, shared by
+        its concurrent calls and closed, on that loop, when the last ends.
+        """
+        if self._client_given:
+            yield self.client.aio
+            return
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            entry = self._aio_clients.get(loop)
+            if entry is None:
+                entry = self._aio_clients[loop] = [self._make_client().aio, 0]
+            entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            with self._client_lock:
+                entry[1] -= 1
+                last = entry[1] == 0
+                if last:
+                    del self._aio_clients[loop]
+            if last:
+                await entry[0].aclose()
+
+    def _make_client(self):
+        import ssl
+
+        import certifi
+        import httpx
+        from google import genai
+        from google.genai import types
+
+        if self._ssl_context is None:
+            # Loading the CA bundle is most of the cost of a client, and
+            # async calls build one per event loop, so load it once
+            self._ssl_context = ssl.create_default_context(
+                cafile=os.environ.get('SSL_CERT_FILE', certifi.where()),
+                capath=os.environ.get('SSL_CERT_DIR'))
+        # One keep-alive pool per worker (and per event loop for async
+        # calls), sized to the concurrency limit
+        limits = httpx.Limits(max_connections=self.concurrency,
+                              max_keepalive_connections=self.concurrency)
+        client_args = {'limits': limits, 'verify': self._ssl_context}
+        # IMPORTANT: KEEP THIS COMMENT - Using python_gemini integration
+        return genai.Client(
+            api_key=os.environ.get("GEMINI_API_KEY"),
+            http_options=types.HttpOptions(
+                timeout=int(self.timeout * 1000),
+                client_args=client_args,
+                async_client_args=dict(client_args,
+                                       ssl=self._ssl_context)))
+
+    # Public API
+
+    def generate(self, model, prompt, system=None, cached=True):
+        """Response text for ``prompt``, calling the model on a cache miss.
+
+        ``prompt`` is a string, or a list of Gemini content dicts for a
+        multi-turn conversation; ``system`` is an optional system
+        instruction. Concurrent misses for the same request share a single
+        model call. With ``cached=False`` the model is always called and
+        its answer is not stored, for prompts meant to get a new answer
+        each time.
+        """
+        if not cached:
+            return self._call(
+                lambda config: self.client.models.generate_content(
+                    model=model, contents=prompt, config=config),
+                model, system).text
+        return self._generate(model, prompt, system)
+
+    async def agenerate(self, model, prompt, system=None):
+        """Async version of generate using the Gemini async client"""
+        return await self._agenerate(model, prompt, system)
+
+    def generate_json(self, model, prompt, schema, system=None):
+        """Structured response for ``prompt`` as a dict.
+
+        ``schema`` is a pydantic model, or the name of one in ``ai_schemas``.
+        It is sent as the response schema and used to validate the reply; a
+        reply that does not fit raises ``pydantic.ValidationError`` and is
+        not cached.
+        """
+        schema = response_schema(schema)
+        text = self._generate(model, prompt, system, schema)
+        return schema.model_validate_json(text).model_dump() if text else None
+
+    async def agenerate_json(self, model, prompt, schema, system=None):
+        """Async version of generate_json"""
+        schema = response_schema(schema)
+        text = await self._agenerate(model, prompt, system, schema)
+        return schema.model_validate_json(text).model_dump() if text else None
+
+    def _generate(self, model, prompt, system=None, schema=None):
+        request = cache_text(prompt, system, schema)
+        text = self.cache.get(model, request)
+        if text is None:
+            key = self.cache.key(model, request)
+            text = self.flight.do(
+                key, lambda: self._fetch(key, model, prompt, system, schema,
+                                         request))
+        return text
+
+    async def _agenerate(self, model, prompt, system=None, schema=None):
+        request = cache_text(prompt, system, schema)
+        text = self.cache.get(model, request)
+        if text is None:
+            key = self.cache.key(model, request)
+            text = await self.flight.ado(
+                key, lambda: self._afetch(key, model, prompt, system, schema,
+                                          request))
+        return text
+
+    def _fetch(self, key, model, prompt, system, schema, request):
+        with self.flight.worker_lock(key) as waited:
+            # Another worker was fetching; its answer may be cached now
+            text = self.cache.get(model, request) if waited else None
+            if text is None:
+                response = self._call(
+                    lambda config: self.client.models.generate_content(
+                        model=model, contents=prompt, config=config),
+                    model, system, schema)
+                text = response.text
+                if text:
+                    if schema is not None:
+                        schema.model_validate_json(text)
+                    self.cache.set(model, request, text)
+        return text
+
+    async def _afetch(self, key, model, prompt, system, schema, request):
+        async with self.flight.aworker_lock(key) as waited:
+            text = self.cache.get(model, request) if waited else None
+            if text is None:
+                async with self._aio() as aio:
+                    response = await self._acall(
+                        lambda config: aio.models.generate_content(
+                            model=model, contents=prompt, config=config),
+                        model, system, schema)
+                text = response.text
+                if text:
+                    if schema is not None:
+                        schema.model_validate_json(text)
+                    self.cache.set(model, request, text)
+        return text
+
+    def generate_stream(self, model, prompt, system=None):
+        """Yield response text chunks, or the whole cached response at once.
+
+        Failures are retried only until the first chunk has been yielded.
+        """
+        request = cache_text(prompt, system)
+        text = self.cache.get(model, request)
+        if text is not None:
+            yield text
+            return
+        chunks = []
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            with self._slot():
+                self._admit()
+                try:
+                    with self._track(model) as call:
+                        for chunk in self.client.models.generate_content_stream(
+                                model=model, contents=prompt,
+                                config=self._config(deadline, model, system)):
+                            # The last chunk carries the totals
+                            call.usage = getattr(chunk, 'usage_metadata',
+                                                 None) or call.usage
+                            if chunk.text:
+                                chunks.append(chunk.text)
+                                yield chunk.text
+                except Exception as e:
+                    delay = self._failed(e, attempt, deadline)
+                    if chunks or delay is None:
+                        raise
+                except BaseException:
+                    self.breaker.cancel()
+                    raise
+                else:
+                    self.breaker.record(True)
+                    break
+            attempt += 1
+            time.sleep(delay)
+        if chunks:
+            self.cache.set(model, request, ''.join(chunks))
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'in_flight': self.in_flight,
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retried,
+                'short_circuits': self.short_circuits,
+                'busy': self.busy,
+            }
+        stats['latency_ms'] = _latency_summary(latencies)
+        stats['breaker'] = {
+            'state': self.breaker.state,
+            'times_opened': self.breaker.times_opened
+        }
+        stats['single_flight'] = self.flight.stats()
+        stats['context_caches'] = self.context_caches.stats()
+        stats['cache'] = self.cache.stats()
+        return stats
+
+    # Call machinery
+
+    def _call(self, send, model=None, system=None, schema=None):
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            with self._slot():
+                self._admit()
+                try:
+                    with self._track(model) as call:
+                        response = send(
+                            self._config(deadline, model, system, schema))
+                        call.usage = getattr(response, 'usage_metadata', None)
+                except Exception as e:
+                    delay = self._failed(e, attempt, deadline)
+                    if delay is None:
+                        raise
+                except BaseException:
+                    self.breaker.cancel()
+                    raise
+                else:
+                    self.breaker.record(True)
+                    return response
+            attempt += 1
+            time.sleep(delay)
+
+    async def _acall(self, send, model=None, system=None, schema=None):
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            async with self._aslot():
+                self._admit()
+                try:
+                    with self._track(model) as call:
+                        response = await send(await self._aconfig(
+                            deadline, model, system, schema))
+                        call.usage = getattr(response, 'usage_metadata', None)
+                except Exception as e:
+                    delay = self._failed(e, attempt, deadline)
+                    if delay is None:
+                        raise
+                except BaseException:
+                    self.breaker.cancel()
+                    raise
+                else:
+                    self.breaker.record(True)
+                    return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @contextmanager
+    def _slot(self):
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            self._count('busy')
+            raise LLMBusyError('Too many concurrent AI requests')
+        try:
+            yield
+        finally:
+            self.slots.release()
+
+    @asynccontextmanager
+    async def _aslot(self):
+        """Like _slot, but waits without blocking the event loop.
+
+        Flask runs each async view on its own event loop, so the slots are
+        shared through a thread semaphore polled from the loop rather than
+        an asyncio.Semaphore bound to one loop.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        while not self.slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                self._count('busy')
+                raise LLMBusyError('Too many concurrent AI requests')
+            await asyncio.sleep(0.005)
+        try:
+            yield
+        finally:
+            self.slots.release()
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self._count('short_circuits')
+            raise LLMUnavailableError('AI service is temporarily unavailable')
+
+    @contextmanager
+    def _track(self, model=None):
+        """Count and time one attempt; the caller sets ``usage`` on the
+        yielded object once the response has it"""
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+        call = SimpleNamespace(usage=None)
+        start = time.monotonic()
+        try:
+            yield call
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.in_flight -= 1
+                self._latencies.append(elapsed)
+            metrics.record_llm_call(model, elapsed, call.usage)
+
+    def _config(self, deadline, model=None, system=None, schema=None):
+        """Request config whose timeout fits in what is left of the deadline"""
+        from google.genai import types
+
+        remaining = max(deadline - time.monotonic(), 0.001)
+        timeout_ms = max(1, int(min(self.timeout, remaining) * 1000))
+        options = {'http_options': types.HttpOptions(timeout=timeout_ms)}
+        if system:
+            cached = self.context_caches.get(self.client, model, system)
+            if cached:
+                options['cached_content'] = cached
+            else:
+                options['system_instruction'] = system
+        if schema is not None:
+            options['response_mime_type'] = 'application/json'
+            options['response_schema'] = schema
+        return types.GenerateContentConfig(**options)
+
+    async def _aconfig(self, deadline, model=None, system=None, schema=None):
+        """_config, creating a context cache in a thread if one is needed,
+        since that is a blocking API call"""
+        if system and not self.context_caches.lookup(model, system)[0]:
+            await asyncio.to_thread(self.context_caches.get, self.client,
+                                    model, system)
+        return self._config(deadline, model, system, schema)
+
+    def _failed(self, exc, attempt, deadline):
+        """Record a failed attempt; the delay before retrying, or None"""
+        self._count('failures')
+        retryable = is_retryable(exc)
+        # Client errors such as a bad request say nothing about API health
+        self.breaker.record(not retryable)
+        if not retryable or attempt >= self.retries:
+            return None
+        # Full jitter keeps workers from retrying in lockstep
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2**attempt))
+        if time.monotonic() + delay >= deadline:
+            return None
+        self._count('retried')
+        return delay
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def _latency_summary(latencies):
+    if not latencies:
+        return {'count': 0}
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1,
+                                   int(p * len(latencies)))] * 1000, 1)
+
+    return {
+        'count': len(latencies),
+        'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+        'p50': percentile(0.5),
+        'p95': percentile(0.95),
+        'max': round(latencies[-1] * 1000, 1)
+    }
+
+
+gateway = LLMGateway.from_env()
+# /metrics reads the gateway's counters at each scrape
+metrics.add_collector(lambda: metrics.observe_gateway(gateway.stats()))
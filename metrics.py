@@ -0,0 +1,339 @@
+"""Request, matcher and AI call instrumentation.
+
+Off unless ``MENTORA_METRICS=1``. When off, ``span`` hands back one shared
+no-op context manager and nothing is hooked into Flask, so instrumented
+code pays for a function call and a flag check. When on, the app serves
+the numbers in Prometheus text format at ``/metrics``, and with
+``MENTORA_METRICS_LOG=1`` also logs one JSON line per request and per
+Gemini call to the ``mentora.metrics`` logger. Numbers other modules keep
+themselves, like ``gateway.stats()``, are read in by collectors at each
+scrape rather than tracked twice.
+
+Each worker process keeps its own numbers; scrape workers individually or
+run a single worker per metrics endpoint.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Seconds; the matcher spans sit in the low buckets, Gemini calls high up
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+NO_SPAN = nullcontext()
+
+logger = logging.getLogger('mentora.metrics')
+
+
+class Counter:
+
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}  # label values -> total
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value, *labels):
+        """Copy in a total (or gauge reading) counted elsewhere"""
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}',
+                 f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} '
+                             f'{_number(value)}')
+        return lines
+
+
+class Gauge(Counter):
+
+    type = 'gauge'
+
+
+class Histogram:
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0
+                ]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}',
+                 f'# TYPE {self.name} histogram']
+        names = self.labelnames + ('le', )
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket in zip(self.buckets + ('+Inf', ), counts):
+                    cumulative += bucket
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f'{self.name}_bucket'
+                                 f'{_labels(names, labels + (le, ))} '
+                                 f'{cumulative}')
+                label_text = _labels(self.labelnames, labels)
+                lines.append(f'{self.name}_sum{label_text} {_number(total)}')
+                lines.append(f'{self.name}_count{label_text} {count}')
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"'
+                     for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """The app's metrics; see the module docstring"""
+
+    def __init__(self, enabled=False, log_json=False):
+        self.enabled = enabled
+        self.log_json = log_json
+        self.request_seconds = Histogram(
+            'mentora_request_duration_seconds',
+            'Time to produce a response (to the first byte when streaming)',
+            ('method', 'route', 'status'))
+        self.span_seconds = Histogram('mentora_span_duration_seconds',
+                                      'Time spent in instrumented code',
+                                      ('span', ))
+        self.session_bytes = Histogram('mentora_session_payload_bytes',
+                                       'Serialized size of saved sessions',
+                                       buckets=SIZE_BUCKETS)
+        self.llm_tokens = Counter('mentora_llm_tokens_total',
+                                  'Gemini tokens used, by kind',
+                                  ('model', 'kind'))
+        # Read from gateway.stats() at each scrape, see observe_gateway
+        self.llm_in_flight = Gauge('mentora_llm_in_flight',
+                                   'Gemini calls in progress')
+        self.llm_calls = Counter('mentora_llm_calls_total',
+                                 'Gemini call attempts')
+        self.llm_failures = Counter('mentora_llm_call_failures_total',
+                                    'Gemini call attempts that failed')
+        self.llm_retries = Counter('mentora_llm_retries_total',
+                                   'Gemini calls retried after a failure')
+        self.llm_short_circuits = Counter(
+            'mentora_llm_short_circuits_total',
+            'Gemini calls refused while the circuit breaker was open')
+        self.llm_busy = Counter(
+            'mentora_llm_busy_total',
+            'Gemini calls that gave up waiting for a concurrency slot')
+        self.llm_recent_latency = Gauge(
+            'mentora_llm_recent_latency_seconds',
+            'Latency of recent Gemini calls', ('stat', ))
+        self.llm_breaker_state = Gauge(
+            'mentora_llm_breaker_state',
+            'Circuit breaker state, 1 for the current one', ('state', ))
+        self.llm_breaker_opened = Counter(
+            'mentora_llm_breaker_opened_total',
+            'Times the circuit breaker opened')
+        self.llm_single_flight = Counter(
+            'mentora_llm_single_flight_total',
+            'Gemini requests by role in single-flight coalescing', ('role', ))
+        self.llm_single_flight_in_flight = Gauge(
+            'mentora_llm_single_flight_in_flight',
+            'Distinct Gemini requests being coalesced')
+        self.llm_cache_lookups = Counter(
+            'mentora_llm_response_cache_lookups_total',
+            'Response cache lookups, by result', ('result', ))
+        self.llm_cache_evictions = Counter(
+            'mentora_llm_response_cache_evictions_total',
+            'Responses evicted from the in-memory cache')
+        self.llm_cache_entries = Gauge(
+            'mentora_llm_response_cache_entries',
+            'Responses held in the in-memory cache')
+        self.llm_cache_bytes = Gauge(
+            'mentora_llm_response_cache_bytes',
+            'Size of the responses held in the in-memory cache')
+        self.llm_context_caches = Counter(
+            'mentora_llm_context_caches_total',
+            'Gemini context cache creations, by outcome', ('outcome', ))
+        self.llm_context_caches_active = Gauge(
+            'mentora_llm_context_caches_active',
+            'Gemini context caches in use')
+        self._all = (self.request_seconds, self.span_seconds,
+                     self.session_bytes, self.llm_tokens, self.llm_in_flight,
+                     self.llm_calls, self.llm_failures, self.llm_retries,
+                     self.llm_short_circuits, self.llm_busy,
+                     self.llm_recent_latency, self.llm_breaker_state,
+                     self.llm_breaker_opened, self.llm_single_flight,
+                     self.llm_single_flight_in_flight, self.llm_cache_lookups,
+                     self.llm_cache_evictions, self.llm_cache_entries,
+                     self.llm_cache_bytes, self.llm_context_caches,
+                     self.llm_context_caches_active)
+        self._collectors = []
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        return cls(enabled=env('MENTORA_METRICS', '') == '1',
+                   log_json=env('MENTORA_METRICS_LOG', '') == '1')
+
+    def span(self, name):
+        """Context manager timing the code it wraps as span ``name``"""
+        if not self.enabled:
+            return NO_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.span_seconds.observe(time.perf_counter() - start, name)
+
+    def observe_session(self, size):
+        if self.enabled:
+            self.session_bytes.observe(size)
+
+    def record_llm_call(self, model, seconds, usage=None):
+        """Record one Gemini call and the token counts in its ``usage``"""
+        if not self.enabled:
+            return
+        self.span_seconds.observe(seconds, 'llm.generate_content')
+        tokens = {}
+        if usage is not None:
+            for kind, field in (('prompt', 'prompt_token_count'),
+                                ('output', 'candidates_token_count'),
+                                ('cached', 'cached_content_token_count'),
+                                ('thinking', 'thoughts_token_count')):
+                count = getattr(usage, field, None)
+                if count:
+                    tokens[kind] = count
+                    self.llm_tokens.inc(count, model, kind)
+        self.log('llm_call', model=model, duration_ms=round(seconds * 1000, 1),
+                 tokens=tokens)
+
+    def add_collector(self, collect):
+        """Call ``collect()`` before each render, to read numbers kept
+        elsewhere into the metrics"""
+        self._collectors.append(collect)
+
+    def observe_gateway(self, stats):
+        """Read an ``LLMGateway.stats()`` snapshot into the llm metrics"""
+        self.llm_in_flight.set(stats['in_flight'])
+        self.llm_calls.set(stats['calls'])
+        self.llm_failures.set(stats['failures'])
+        self.llm_retries.set(stats['retries'])
+        self.llm_short_circuits.set(stats['short_circuits'])
+        self.llm_busy.set(stats['busy'])
+        for stat in ('avg', 'p50', 'p95', 'max'):
+            if stat in stats['latency_ms']:
+                self.llm_recent_latency.set(stats['latency_ms'][stat] / 1000,
+                                            stat)
+
+        breaker = stats['breaker']
+        for state in ('closed', 'open', 'half_open'):
+            self.llm_breaker_state.set(int(breaker['state'] == state), state)
+        self.llm_breaker_opened.set(breaker['times_opened'])
+
+        flight = stats['single_flight']
+        for role in ('leaders', 'deduplicated', 'worker_waits'):
+            self.llm_single_flight.set(flight[role], role)
+        self.llm_single_flight_in_flight.set(flight['in_flight'])
+
+        cache = stats['cache']
+        self.llm_cache_lookups.set(cache['hits'] - cache['disk_hits'],
+                                   'memory_hit')
+        self.llm_cache_lookups.set(cache['disk_hits'], 'disk_hit')
+        self.llm_cache_lookups.set(cache['misses'], 'miss')
+        self.llm_cache_evictions.set(cache['evictions'])
+        self.llm_cache_entries.set(cache['entries'])
+        self.llm_cache_bytes.set(cache['bytes'])
+
+        context_caches = stats['context_caches']
+        for outcome in ('created', 'failed'):
+            self.llm_context_caches.set(context_caches[outcome], outcome)
+        self.llm_context_caches_active.set(context_caches['active'])
+
+    def log(self, event, **fields):
+        if self.log_json:
+            logger.info(json.dumps({'event': event, **fields}))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._all:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, app):
+        """Time every request and serve ``/metrics``, if enabled"""
+        if not self.enabled:
+            return
+        from flask import Response, g, request
+
+        if self.log_json and not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+        @app.before_request
+        def start_timer():
+            g.metrics_start = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            start = g.pop('metrics_start', None)
+            if start is not None:
+                seconds = time.perf_counter() - start
+                route = request.url_rule.rule if request.url_rule else \
+                    'unmatched'
+                self.request_seconds.observe(seconds, request.method, route,
+                                             response.status_code)
+                self.log('request', method=request.method, route=route,
+                         status=response.status_code,
+                         duration_ms=round(seconds * 1000, 1))
+            return response
+
+        @app.route('/metrics')
+        def metrics_endpoint():
+            return Response(self.render(),
+                            mimetype='text/plain; version=0.0.4')
+
+
+metrics = Metrics.from_env()
@@ -0,0 +1,221 @@
+"""Keeps users' top matches current as single listings change"""
+from collections import namedtuple
+
+from internship_index import DEGREE_KEYWORDS, experience_points, goal_text
+from skill_taxonomy import taxonomy
+from text_index import text_terms
+
+# kind is 'added' (a new match for the user), 'removed' (no longer a top
+# match) or 'rescored' (still a top match, with a new score)
+RankingEvent = namedtuple('RankingEvent', 'user kind position score')
+
+# Points a listing can earn with no skill, degree or goal overlap at all
+MAX_UNRELATED_POINTS = max(
+    experience_points(user_level, level)
+    for user_level in ('entry', 'intermediate', 'advanced')
+    for level in ('entry', 'intermediate', 'advanced'))
+
+
+def _rank_key(entry):
+    position, score = entry
+    return -score, position
+
+
+class RankingEngine:
+    """Each tracked user's current top-k, patched as listings change.
+
+    Subscribes to an InternshipMatcher. When a listing is added, updated or
+    removed through it, only the users that can be affected are scored
+    against that one listing: those holding it in their top-k, and those
+    sharing a skill, degree or goal term with it, found through reverse
+    indexes over the tracked profiles. With ``min_score`` at or above
+    ``MAX_UNRELATED_POINTS`` no other user can gain it as a match. A user
+    has to be re-ranked in full only when one of their top matches drops or
+    scores lower, or when the change alters the goal vocabulary or skill
+    taxonomy the user's profile resolves against.
+
+    Rankings equal ``get_recommendations(profile, k, min_score)``. Every
+    change is reported as RankingEvents to the subscribed callbacks.
+    """
+
+    def __init__(self, matcher, k=5, min_score=20):
+        self.matcher = matcher
+        self.k = k
+        self.min_score = min_score
+        self.rankings = {}  # user -> [(position, score)], best first
+        self._profiles = {}  # user -> profile
+        self._keys = {}  # user -> (skills, degree, technical, goal terms)
+        self._by_skill = {}  # skill id -> users
+        self._by_degree = {}  # lowercased degree -> users
+        self._technical = set()  # users with a technical degree
+        self._by_term = {}  # goal term -> users
+        self._holders = {}  # position -> users ranking it
+        self._taxonomy_size = len(taxonomy)
+        self._callbacks = []
+        # The matcher's, so rankings and the index always change together
+        self._lock = matcher.lock
+        matcher.subscribe(self._on_change)
+
+    def subscribe(self, callback):
+        """Call ``callback(events)`` with each non-empty list of events"""
+        self._callbacks.append(callback)
+
+    def track(self, user, user_profile):
+        """Start (or restart) keeping ``user``'s ranking; returns it"""
+        with self._lock:
+            index = self.matcher.index
+            if user in self._profiles:
+                self.untrack(user)
+            self._profiles[user] = user_profile
+            self._index_user(user)
+            self._set_ranking(user, self._rank(index, user))
+            return list(self.rankings[user])
+
+    def untrack(self, user):
+        with self._lock:
+            self._unindex_user(user)
+            self._set_ranking(user, [])
+            del self.rankings[user]
+            del self._profiles[user]
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def _index_keys(self, user_profile):
+        degree = user_profile.get('degree', '').lower()
+        return (taxonomy.parse(user_profile.get('skills', '')), degree,
+                any(keyword in degree for keyword in DEGREE_KEYWORDS),
+                frozenset(text_terms(goal_text(user_profile))))
+
+    def _index_user(self, user):
+        keys = self._keys[user] = self._index_keys(self._profiles[user])
+        skills, degree, technical, terms = keys
+        for skill in skills:
+            self._by_skill.setdefault(skill, set()).add(user)
+        self._by_degree.setdefault(degree, set()).add(user)
+        if technical:
+            self._technical.add(user)
+        for term in terms:
+            self._by_term.setdefault(term, set()).add(user)
+
+    def _unindex_user(self, user):
+        skills, degree, technical, terms = self._keys.pop(user)
+        for skill in skills:
+            self._discard(self._by_skill, skill, user)
+        self._discard(self._by_degree, degree, user)
+        self._technical.discard(user)
+        for term in terms:
+            self._discard(self._by_term, term, user)
+
+    @staticmethod
+    def _discard(users_by_key, key, user):
+        users = users_by_key[key]
+        users.discard(user)
+        if not users:
+            del users_by_key[key]
+
+    def _rank(self, index, user):
+        return index.top_k(self._profiles[user], k=self.k,
+                           min_score=self.min_score)
+
+    def _set_ranking(self, user, ranking):
+        for position, _ in self.rankings.get(user, ()):
+            self._discard(self._holders, position, user)
+        self.rankings[user] = ranking
+        for position, _ in ranking:
+            self._holders.setdefault(position, set()).add(user)
+
+    def _candidates(self, record):
+        """Tracked users that could score above min_score on ``record``"""
+        if self.min_score is None or self.min_score < MAX_UNRELATED_POINTS:
+            return set(self._profiles)
+        users = set()
+        for skill in taxonomy.listing_skills(record['required_skills']):
+            users.update(self._by_skill.get(skill, ()))
+        degrees = record['preferred_degree']
+        for degree in degrees:
+            users.update(self._by_degree.get(degree, ()))
+        if any(keyword in ' '.join(degrees) for keyword in DEGREE_KEYWORDS):
+            users.update(self._technical)
+        for term in record['text_terms']:
+            users.update(self._by_term.get(term, ()))
+        return users
+
+    def _on_change(self, index, change):
+        with self._lock:
+            events = []
+            if change is None:
+                # A new index: every score may have moved
+                for user in list(self._profiles):
+                    events.extend(self._rerank(index, user))
+            else:
+                events.extend(self._apply(index, change))
+            if events:
+                for callback in self._callbacks:
+                    callback(events)
+
+    def _apply(self, index, change):
+        events = []
+        stale = set()
+        if len(taxonomy) != self._taxonomy_size:
+            # New skills may resolve profile skills that did not before
+            self._taxonomy_size = len(taxonomy)
+            for user in list(self._profiles):
+                if self._index_keys(self._profiles[user]) != self._keys[user]:
+                    self._unindex_user(user)
+                    self._index_user(user)
+                    stale.add(user)
+        # A term entering or leaving use changes the goal query of every
+        # profile with that term, and so all of that profile's goal points
+        for term in change.vocabulary:
+            stale.update(self._by_term.get(term, ()))
+
+        users = set(self._holders.get(change.position, ()))
+        if change.new is not None:
+            users.update(self._candidates(change.new))
+        for user in stale:
+            events.extend(self._rerank(index, user))
+        for user in users - stale:
+            events.extend(self._patch(index, user, change))
+        return events
+
+    def _patch(self, index, user, change):
+        """Update one user's ranking for a change of one listing"""
+        ranking = self.rankings[user]
+        position = change.position
+        old_score = dict(ranking).get(position)
+        score = None
+        if change.new is not None:
+            score = index.score_record(index.prepare(self._profiles[user]),
+                                       change.new)
+            if self.min_score is not None and score <= self.min_score:
+                score = None
+        if old_score is not None and (score is None or score < old_score) \
+                and len(ranking) == self.k:
+            # A listing outside the top-k may now beat it
+            return self._rerank(index, user)
+        if score is None and old_score is None:
+            return []
+
+        entries = [entry for entry in ranking if entry[0] != position]
+        if score is not None:
+            entries.append((position, score))
+        entries.sort(key=_rank_key)
+        return self._replace(user, entries[:self.k])
+
+    def _rerank(self, index, user):
+        return self._replace(user, self._rank(index, user))
+
+    def _replace(self, user, ranking):
+        """Store ``user``'s new ranking; returns the events it causes"""
+        before = dict(self.rankings[user])
+        self._set_ranking(user, ranking)
+        events = []
+        for position, score in ranking:
+            if position not in before:
+                events.append(RankingEvent(user, 'added', position, score))
+            elif before.pop(position) != score:
+                events.append(RankingEvent(user, 'rescored', position, score))
+        for position in before:
+            events.append(RankingEvent(user, 'removed', position, None))
+        return events
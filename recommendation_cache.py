@@ -0,0 +1,83 @@
+"""In-process cache of match rankings, per profile and catalogue version"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from internship_index import goal_text
+from skill_taxonomy import taxonomy
+from text_index import text_terms
+
+
+def profile_fingerprint(user_profile):
+    """Hash of the profile fields matching reads, in canonical form.
+
+    Profiles that can only ever score the same share a fingerprint, e.g.
+    "Python, JS" and "js,python", or goals differing only in case and
+    punctuation. Skill ids are per process, and so are fingerprints.
+    """
+    canonical = [
+        user_profile.get('degree', '').lower(),
+        sorted(taxonomy.parse(user_profile.get('skills', ''))),
+        user_profile.get('experience_level', 'entry').lower(),
+        sorted(text_terms(goal_text(user_profile)).items())
+    ]
+    data = json.dumps(canonical, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class RecommendationCache:
+    """LRU of ranking results.
+
+    Keys start with the catalogue version they were computed against, so a
+    result is never served for another catalogue; the matcher also clears
+    the cache when it loads a new version. Values must not be mutated by
+    callers, so store tuples.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_entries=int(
+            os.environ.get('MENTORA_RECOMMENDATION_CACHE_ENTRIES', 4096)))
+
+    def get_or_compute(self, key, compute):
+        """Cached value for ``key``, calling ``compute()`` on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,95 @@
+"""Bounded multi-turn history for communication scenario conversations"""
+from llm_gateway import CHARS_PER_TOKEN, estimate_tokens
+
+
+class ScenarioContext:
+    """Conversation history of one scenario, kept in its session state.
+
+    Turns are stored as ``{'role': 'user' | 'model', 'text': ...}``. Once
+    they exceed ``max_tokens``, ``compact`` folds all but the newest
+    ``keep_turns`` into a running summary, so the history sent with each
+    turn stays roughly the same size however long the conversation gets.
+
+    Summarizing is left to the caller, which may do it sync or async::
+
+        older = context.overflow()
+        context.compact(summarize(context.summary, older) if older else None)
+    """
+
+    def __init__(self, state, max_tokens=1200, keep_turns=4):
+        self.state = state
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        state.setdefault('turns', [])
+        state.setdefault('summary', '')
+
+    @property
+    def turns(self):
+        return self.state['turns']
+
+    @property
+    def summary(self):
+        return self.state['summary']
+
+    def add(self, role, text):
+        self.state['turns'].append({'role': role, 'text': text})
+
+    def tokens(self):
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(turn['text']) for turn in self.turns)
+
+    def overflow(self):
+        """Older turns to fold into the summary, if over budget"""
+        if self.tokens() <= self.max_tokens:
+            return []
+        return self.turns[:-self.keep_turns]
+
+    def compact(self, summary=None):
+        """Bring the history back within budget.
+
+        Drops the turns ``overflow`` returned, keeping ``summary`` (the
+        running summary with them folded in) if one was produced; without
+        one they are simply lost. Kept turns still too long on their own
+        are clipped.
+        """
+        if self.tokens() <= self.max_tokens:
+            return False
+        if summary:
+            self.state['summary'] = summary
+        self.state['turns'] = self.turns[-self.keep_turns:]
+
+        budget = max(1, (self.max_tokens - estimate_tokens(self.summary)) //
+                     max(1, len(self.turns)))
+        limit = budget * CHARS_PER_TOKEN
+        self.state['turns'] = [
+            turn if len(turn['text']) <= limit else
+            dict(turn, text=turn['text'][:limit] + ' [...]')
+            for turn in self.turns
+        ]
+        return True
+
+    def contents(self, opening):
+        """Gemini ``contents`` for the conversation.
+
+        The first turn is always the user's, so it carries the summary, or
+        ``opening`` when there is nothing to summarize yet.
+        """
+        first = f"Summary of the conversation so far: {self.summary}" \
+            if self.summary else opening
+        contents = [{'role': 'user', 'parts': [{'text': first}]}]
+        for turn in self.turns:
+            if turn['role'] == contents[-1]['role']:
+                contents[-1]['parts'].append({'text': turn['text']})
+            else:
+                contents.append({
+                    'role': turn['role'],
+                    'parts': [{'text': turn['text']}]
+                })
+        return contents
+
+
+def format_turns(turns):
+    """Plain-text transcript, for summarization prompts"""
+    names = {'user': 'User', 'model': 'Coach'}
+    return '\n'.join(f"{names[turn['role']]}: {turn['text']}"
+                     for turn in turns)
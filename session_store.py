@@ -0,0 +1,333 @@
+"""Server-side Flask sessions: the cookie only carries a signed session id"""
+import json
+import random
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+from metrics import metrics
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session whose data lives in a backend keyed by ``sid``.
+
+    Only the newest ``activity_history`` entries stay in the session itself;
+    older ones are moved to the backend on save and read back on demand with
+    ``load_history``.
+    """
+
+    def __init__(self, initial=None, sid=None, backend=None, new=False,
+                 payload=None, expires_at=None):
+
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.backend = backend
+        self.new = new
+        self.modified = False
+        self.payload = payload  # serialized data as loaded, to skip no-op saves
+        self.expires_at = expires_at
+
+    def load_history(self, offset=0, limit=None):
+        """Activity history, newest first, including entries moved out"""
+        hot = self.get('activity_history', [])
+        end = None if limit is None else offset + limit
+        if end is not None and end <= len(hot):
+            return hot[offset:end]
+        older = self.backend.load_history(
+            self.sid, max(0, offset - len(hot)),
+            None if end is None else end - max(offset, len(hot)))
+        return hot[offset:end] + older
+
+
+def full_activity_history(session):
+    """Whole activity history, newest first, for any session implementation"""
+    if isinstance(session, ServerSideSession):
+        return session.load_history()
+    return session.get('activity_history', [])
+
+
+def regenerate(session):
+    """Move ``session`` to a new id and drop the old one, e.g. on login, so
+    an id planted or leaked beforehand is useless afterwards (session
+    fixation). Data and stored history carry over.
+
+    Only server-side sessions have ids to rotate; returns False for others.
+    """
+    if not isinstance(session, ServerSideSession):
+        return False
+    sid = _new_sid()
+    if not session.new:
+        session.backend.rename(session.sid, sid)
+    session.sid = sid
+    # Saved under the new id, with a new cookie, at the end of the request
+    session.new = True
+    session.payload = None
+    return True
+
+
+def _new_sid():
+    return secrets.token_urlsafe(32)
+
+
+def store_after_response(session):
+    """Save ``session`` again after its response was sent, e.g. at the end of
+    a stream, when the usual save at the end of the request is already done.
+
+    Only server-side sessions can be updated then; returns False for others.
+    """
+    if not isinstance(session, ServerSideSession) or \
+            session.expires_at is None:
+        return False
+    payload = ServerSideSessionInterface.serializer.dumps(dict(session))
+    if payload != session.payload:
+        session.backend.save(session.sid, payload, session.expires_at)
+        session.payload = payload
+    return True
+
+
+class MemorySessionBackend:
+    """Process-local backend for tests and single-process development"""
+
+    def __init__(self):
+        self._sessions = {}  # sid -> (payload, expires_at)
+        self._history = {}  # sid -> entries, oldest first
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        with self._lock:
+            record = self._sessions.get(sid)
+        if record is None or record[1] <= time.time():
+            return None
+        return record
+
+    def save(self, sid, payload, expires_at):
+        with self._lock:
+            self._sessions[sid] = (payload, expires_at)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+            self._history.pop(sid, None)
+
+    def rename(self, sid, new_sid):
+        with self._lock:
+            if sid in self._sessions:
+                self._sessions[new_sid] = self._sessions.pop(sid)
+            if sid in self._history:
+                self._history[new_sid] = self._history.pop(sid)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for sid in [sid for sid, (_, expires_at) in self._sessions.items()
+                        if expires_at <= now]:
+                del self._sessions[sid]
+                self._history.pop(sid, None)
+
+    def append_history(self, sid, entries):
+        with self._lock:
+            self._history.setdefault(sid, []).extend(entries)
+
+    def load_history(self, sid, offset=0, limit=None):
+        with self._lock:
+            entries = self._history.get(sid, [])[::-1]
+        end = None if limit is None else offset + limit
+        return entries[offset:end]
+
+
+class SQLiteSessionBackend:
+    """Backend in a local SQLite file shared by all workers on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        # A throwaway connection, so none is left open to be inherited by
+        # forked workers (gunicorn --preload)
+        with closing(sqlite3.connect(path, timeout=30)) as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS session_history (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sid TEXT NOT NULL,
+                    entry TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS session_history_sid
+                    ON session_history (sid, seq);
+                CREATE INDEX IF NOT EXISTS sessions_expires_at
+                    ON sessions (expires_at);
+            """)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def load(self, sid):
+        return self._connect().execute(
+            'SELECT payload, expires_at FROM sessions '
+            'WHERE sid = ? AND expires_at > ?', (sid, time.time())).fetchone()
+
+    def save(self, sid, payload, expires_at):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)',
+            (sid, payload, expires_at))
+
+    def delete(self, sid):
+        conn = self._connect()
+        conn.execute('DELETE FROM sessions WHERE sid = ?', (sid, ))
+        conn.execute('DELETE FROM session_history WHERE sid = ?', (sid, ))
+
+    def rename(self, sid, new_sid):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('UPDATE sessions SET sid = ? WHERE sid = ?',
+                         (new_sid, sid))
+            conn.execute('UPDATE session_history SET sid = ? WHERE sid = ?',
+                         (new_sid, sid))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def purge_expired(self):
+        """Delete expired sessions and their moved-out history"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'DELETE FROM session_history WHERE sid IN '
+                '(SELECT sid FROM sessions WHERE expires_at <= ?)', (now, ))
+            conn.execute('DELETE FROM sessions WHERE expires_at <= ?',
+                         (now, ))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def append_history(self, sid, entries):
+        self._connect().executemany(
+            'INSERT INTO session_history (sid, entry) VALUES (?, ?)',
+            ((sid, json.dumps(entry)) for entry in entries))
+
+    def load_history(self, sid, offset=0, limit=None):
+        rows = self._connect().execute(
+            'SELECT entry FROM session_history WHERE sid = ? '
+            'ORDER BY seq DESC LIMIT ? OFFSET ?',
+            (sid, -1 if limit is None else limit, offset))
+        return [json.loads(entry) for (entry, ) in rows]
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Stores session data in ``backend``; the cookie holds a signed id"""
+
+    serializer = TaggedJSONSerializer()
+    salt = 'mentora-session'
+
+    def __init__(self, backend, hot_history=20, purge_every=1000):
+        """About one save in ``purge_every`` also purges expired sessions
+        from ``backend``, so it does not grow forever; 0 never purges."""
+        self.backend = backend
+        self.hot_history = hot_history
+        self.purge_every = purge_every
+
+    def _signer(self, app):
+        if not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt=self.salt)
+
+    def _new_session(self):
+        return ServerSideSession(sid=_new_sid(), backend=self.backend,
+                                 new=True)
+
+    def open_session(self, app, request):
+        signer = self._signer(app)
+        if signer is None:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self._new_session()
+        try:
+            sid = signer.unsign(cookie).decode()
+        except BadSignature:
+            return self._new_session()
+        record = self.backend.load(sid)
+        if record is None:
+            return self._new_session()
+        payload, expires_at = record
+        return ServerSideSession(self.serializer.loads(payload), sid=sid,
+                                 backend=self.backend, payload=payload,
+                                 expires_at=expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        response.vary.add('Cookie')
+        if self.purge_every and random.randrange(self.purge_every) == 0:
+            self._purge_expired()
+
+        if not session:
+            if not session.new:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        self._move_old_history(session)
+        # Nested mutations (e.g. list.insert) don't mark the session
+        # modified, so compare the serialized data instead
+        payload = self.serializer.dumps(dict(session))
+        metrics.observe_session(len(payload))
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        now = time.time()
+        if payload != session.payload or session.expires_at is None or \
+                session.expires_at - now < lifetime / 2:
+            self.backend.save(session.sid, payload, now + lifetime)
+            session.payload = payload
+            session.expires_at = now + lifetime
+
+        if session.new or session.permanent:
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app))
+
+    def _purge_expired(self):
+        try:
+            self.backend.purge_expired()
+        except sqlite3.Error as e:
+            # Retried on a later save; the response must not fail for it
+            print(f"Session purge error: {str(e)}")
+
+    def _move_old_history(self, session):
+        history = session.get('activity_history')
+        if history and len(history) > self.hot_history:
+            # Entries are newest first; store the overflow oldest first
+            self.backend.append_history(session.sid,
+                                        history[self.hot_history:][::-1])
+            session['activity_history'] = history[:self.hot_history]
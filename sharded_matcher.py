@@ -0,0 +1,173 @@
+"""Matching over a catalogue split across worker processes.
+
+Each shard is a contiguous range of catalogue positions indexed by an
+InternshipIndex in its own long-lived process. A query is prepared once in
+the calling process, every shard ranks its own listings in parallel and the
+local top-k lists are merged, so results equal a single in-process index:
+
+* goal points use term statistics summed over all shards before any shard
+  builds its text index, and the query vector is computed once against the
+  whole vocabulary;
+* profile skills are resolved once, here, against every shard's listing
+  skills, and sent to the shards as canonical names since skill ids are
+  per process;
+* shards return global positions, and ties are merged in catalogue order.
+
+Shard processes are started with ``spawn``, so they never inherit the
+caller's threads, locks or SQLite connections.
+"""
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from catalogue import CatalogueStore
+from internship_index import (DEGREE_KEYWORDS, InternshipIndex,
+                              PreparedProfile, goal_points, goal_text,
+                              listing_terms)
+from skill_taxonomy import taxonomy
+from text_index import TextIndex
+
+# In a shard process: its records until built, then its index
+_records = None
+_index = None
+_start = 0
+
+
+def _load_shard(source, start, stop):
+    """Read this shard's records; returns its term statistics and skills"""
+    global _records, _start
+    kind, value = source
+    _records = list(CatalogueStore(value).normalized(start, stop)) \
+        if kind == 'store' else value
+    _start = start
+    skills = {}
+    for record in _records:
+        if record is not None:
+            skills.update(dict.fromkeys(record['required_skills']))
+    return TextIndex.term_statistics(
+        None if record is None else record['text_terms']
+        for record in _records), list(skills)
+
+
+def _build_shard(text_stats):
+    global _records, _index
+    _index = InternshipIndex(None, _records, text_stats)
+    _records = None
+    return len(_index)
+
+
+def _rank_shard(prepared, k, min_score, after):
+    skills = frozenset(skill for skill in map(taxonomy.lookup, prepared.skills)
+                       if skill is not None)
+    if after is not None:
+        after = (after[0], after[1] - _start)
+    return [(_start + position, score)
+            for position, score in _index.rank(prepared._replace(
+                skills=skills), k, min_score, after)]
+
+
+def _goal_matches_shard(query, n):
+    return [(_start + position, similarity)
+            for position, similarity in _index.text.top_n(query, n)]
+
+
+def _merge(results, k):
+    """Best ``k`` of several best-first lists, ties by position"""
+    merged = heapq.merge(*results, key=lambda pair: (-pair[1], pair[0]))
+    return [pair for _, pair in zip(range(k), merged)]
+
+
+class ShardedIndex:
+    """The query side of InternshipIndex, over ``shards`` worker processes.
+
+    Read-only: the matcher rebuilds it when the catalogue changes.
+    """
+
+    def __init__(self, catalogue, shards):
+        count = catalogue.positions()
+        shards = max(1, min(shards, count))
+        bounds = [(count * i // shards, count * (i + 1) // shards)
+                  for i in range(shards)]
+        if isinstance(catalogue, CatalogueStore):
+            sources = [('store', catalogue.path)] * shards
+        else:
+            sources = [('records', list(catalogue.normalized(start, stop)))
+                       for start, stop in bounds]
+        context = multiprocessing.get_context('spawn')
+        self._executors = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context)
+            for _ in bounds
+        ]
+        try:
+            loads = [
+                executor.submit(_load_shard, source, start, stop)
+                for executor, source, (start, stop) in zip(
+                    self._executors, sources, bounds)
+            ]
+            total = 0
+            document_frequency = {}
+            for load in loads:
+                (shard_count, shard_frequency), skills = load.result()
+                total += shard_count
+                for term, frequency in shard_frequency.items():
+                    document_frequency[term] = \
+                        document_frequency.get(term, 0) + frequency
+                # Registered in catalogue order, as a single index would
+                taxonomy.listing_skills(skills)
+            text_stats = (total, document_frequency)
+            for build in [executor.submit(_build_shard, text_stats)
+                          for executor in self._executors]:
+                build.result()
+        except BaseException:
+            self.close()
+            raise
+        self.text = TextIndex([], text_stats)
+        self.internships = catalogue.documents()
+        self.shards = shards
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def prepare(self, user_profile):
+        """Like InternshipIndex.prepare, with skills as canonical names"""
+        user_degree = user_profile.get('degree', '').lower()
+        return PreparedProfile(
+            user_degree,
+            any(keyword in user_degree for keyword in DEGREE_KEYWORDS),
+            tuple(taxonomy.names[skill] for skill in sorted(
+                taxonomy.parse(user_profile.get('skills', '')))),
+            user_profile.get('experience_level', 'entry').lower(),
+            self.text.query_vector(goal_text(user_profile)))
+
+    def top_k(self, user_profile, k=5, min_score=20, after=None):
+        """InternshipIndex.top_k, ranked by every shard at once"""
+        if k <= 0:
+            return []
+        prepared = self.prepare(user_profile)
+        return _merge([
+            future.result() for future in [
+                executor.submit(_rank_shard, prepared, k, min_score, after)
+                for executor in self._executors
+            ]
+        ], k)
+
+    def goal_matches(self, user_profile, n=10):
+        """InternshipIndex.goal_matches, ranked by every shard at once"""
+        query = self.text.query_vector(goal_text(user_profile))
+        return _merge([
+            future.result() for future in [
+                executor.submit(_goal_matches_shard, query, n)
+                for executor in self._executors
+            ]
+        ], n)
+
+    def listing_goal_points(self, user_profile, internship):
+        """Goal points of one listing, as InternshipIndex computes them"""
+        query = self.text.query_vector(goal_text(user_profile))
+        vector = self.text.document_vector(listing_terms(internship))
+        return goal_points(self.text.dot(query, vector))
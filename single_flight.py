@@ -0,0 +1,176 @@
+"""Coalesce identical concurrent calls so only one of them does the work"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; cross-worker locks are off
+    fcntl = None
+
+
+class CoalescedCallCancelled(RuntimeError):
+    """The call this request was waiting on was cancelled"""
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers share its result.
+
+    Works across the threads of a worker, and across event loops since
+    followers wait on a ``concurrent.futures.Future``. With ``lock_dir``
+    set, ``worker_lock`` also serializes a key across worker processes on
+    the host through ``flock`` on a lock file, so a second worker can pick
+    up the first one's result from a shared cache instead of calling again.
+    Each key in flight has its own lock file, removed when the call is done.
+    """
+
+    def __init__(self, lock_dir=None, lock_timeout=30.0):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.lock_timeout = lock_timeout
+        self._calls = {}  # key -> Future of the leader's result
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.deduplicated = 0
+        self.worker_waits = 0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def _join(self, key):
+        """(future, is_leader) for ``key``"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # Followers should fall back, not be cancelled themselves
+            future.set_exception(
+                CoalescedCallCancelled('The shared AI call was cancelled'))
+
+    def do(self, key, fn):
+        """``fn()``, or the result of the identical call already running"""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def ado(self, key, fn):
+        """Async version of do; ``fn`` returns an awaitable"""
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def _take_lock(self, key):
+        """The key's locked lock file, or None while another holds it"""
+        path = os.path.join(self.lock_dir, f'{key}.lock')
+        while True:
+            lock_file = open(path, 'a')
+            if not _try_flock(lock_file):
+                lock_file.close()
+                return None
+            try:
+                current = os.stat(path).st_ino == \
+                    os.fstat(lock_file.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                return lock_file
+            # Its holder removed the file once done; lock the new one
+            lock_file.close()
+
+    def _release_lock(self, lock_file):
+        # One file per key, removed by the holder while still locked, so
+        # unrelated keys never share a lock and the directory stays small
+        try:
+            os.unlink(lock_file.name)
+        finally:
+            lock_file.close()
+
+    @contextmanager
+    def worker_lock(self, key):
+        """Hold ``key`` across workers; yields True if another had it first"""
+        if not self.lock_dir:
+            yield False
+            return
+        lock_file = self._take_lock(key)
+        waited = lock_file is None
+        if waited:
+            self._count_wait()
+            deadline = time.monotonic() + self.lock_timeout
+            # Give up on coalescing rather than on the request
+            while lock_file is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+                lock_file = self._take_lock(key)
+        try:
+            yield waited
+        finally:
+            if lock_file is not None:
+                self._release_lock(lock_file)
+
+    @asynccontextmanager
+    async def aworker_lock(self, key):
+        """Like worker_lock, but waits without blocking the event loop"""
+        if not self.lock_dir:
+            yield False
+            return
+        lock_file = self._take_lock(key)
+        waited = lock_file is None
+        if waited:
+            self._count_wait()
+            deadline = time.monotonic() + self.lock_timeout
+            while lock_file is None and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+                lock_file = self._take_lock(key)
+        try:
+            yield waited
+        finally:
+            if lock_file is not None:
+                self._release_lock(lock_file)
+
+    def _count_wait(self):
+        with self._lock:
+            self.worker_waits += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'deduplicated': self.deduplicated,
+                'worker_waits': self.worker_waits,
+                'in_flight': len(self._calls)
+            }
+
+
+def _try_flock(lock_file):
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
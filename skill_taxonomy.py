@@ -0,0 +1,213 @@
+"""Skill taxonomy: canonical skill ids, aliases and typo tolerance.
+
+Free-text skills ("JS, react.js and Pyhton") resolve to sets of integer
+skill ids, which is what the matcher compares; "Java" no longer matches
+"JavaScript", nor "R" every skill containing an r. A skills string is split
+on commas and similar separators, and each part is resolved as a whole name
+or alias, then by scanning it for known aliases with one trie-shaped regex,
+then by the nearest name within a small edit distance, found through a
+trigram index.
+
+Listing skills missing from the taxonomy are added on first sight as their
+own canonical skills, so any listing skill can still be matched by name.
+Ids are only meaningful within one process.
+"""
+import functools
+import re
+import threading
+
+from intent_router import trie_pattern
+
+# Canonical name -> aliases; names and aliases are matched case-insensitively
+SKILLS = {
+    'Python': ['py', 'python3'],
+    'JavaScript': ['js', 'ecmascript', 'es6'],
+    'TypeScript': ['ts'],
+    'React': ['reactjs', 'react.js'],
+    'Node.js': ['node', 'nodejs'],
+    'HTML': ['html5'],
+    'CSS': ['css3'],
+    'SQL': ['structured query language'],
+    'Java': [],
+    'C': [],
+    'C++': ['cpp'],
+    'C#': ['csharp', 'c sharp'],
+    'Go': ['golang'],
+    'R': ['rstats', 'r programming'],
+    'Git': ['github', 'version control'],
+    'Linux': ['unix'],
+    'Docker': ['containers'],
+    'Kubernetes': ['k8s'],
+    'AWS': ['amazon web services'],
+    'Excel': ['microsoft excel', 'ms excel', 'spreadsheets'],
+    'Tableau': [],
+    'Power BI': ['powerbi'],
+    'Machine Learning': ['ml'],
+    'Deep Learning': ['dl'],
+    'Statistics': ['stats', 'statistical analysis'],
+    'Analytics': ['data analytics', 'data analysis'],
+    'Financial Analysis': ['financial modeling', 'financial modelling'],
+    'Risk Assessment': ['risk analysis'],
+    'Network Security': ['cybersecurity', 'cyber security',
+                         'information security', 'infosec'],
+    'Figma': [],
+    'Photoshop': ['adobe photoshop'],
+    'Prototyping': ['wireframing'],
+    'Design Thinking': [],
+    'User Research': ['ux research', 'usability testing'],
+    'Research': [],
+    'Marketing': ['digital marketing'],
+    'Communication': ['communication skills'],
+    'Public Speaking': ['presenting', 'presentations'],
+    'Project Management': ['project planning'],
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+SEPARATOR_RE = re.compile(r"[,;/|&\n]+|\band\b")
+# Shorter names are too easy to confuse to correct, e.g. "java" and "lava"
+MIN_FUZZY_LENGTH = 5
+
+
+def skill_key(text):
+    """Lowercased, punctuation-free form names and aliases are looked up by"""
+    return ' '.join(TOKEN_RE.findall(text.lower()))
+
+
+def _trigrams(key):
+    padded = f' {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or ``limit + 1`` once above it"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and \
+                    a[i - 2] == char_b:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SkillTaxonomy:
+    """Resolves skill names and free-text skill lists to integer ids"""
+
+    def __init__(self, skills=SKILLS, cache_size=4096):
+        self.names = []  # id -> canonical name
+        self._ids = {}  # skill_key of a name or alias -> id
+        self._trigrams = {}  # trigram -> keys long enough to correct to
+        self._listing_ids = {}  # listing skill as written -> id
+        self._lock = threading.Lock()
+        for name, aliases in skills.items():
+            skill_id = self._add_name(name)
+            for alias in aliases:
+                self._add_key(skill_key(alias), skill_id)
+        # Built-in aliases found inside longer text; single letters ("r",
+        # "c") only count as a whole entry
+        self._alias_re = re.compile(
+            r"(?<![a-z0-9+#])(?:" +
+            trie_pattern([key for key in self._ids if len(key) > 1]) +
+            r")(?![a-z0-9+#])")
+        self._parse = functools.lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _add_name(self, name):
+        skill_id = len(self.names)
+        self.names.append(name)
+        self._add_key(skill_key(name), skill_id)
+        return skill_id
+
+    def _add_key(self, key, skill_id):
+        self._ids.setdefault(key, skill_id)
+        if len(key) >= MIN_FUZZY_LENGTH:
+            for gram in _trigrams(key):
+                self._trigrams.setdefault(gram, []).append(key)
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name):
+        """Id of a skill name or alias, or None"""
+        return self._ids.get(skill_key(name))
+
+    def correct(self, key):
+        """Id of the closest known key within the typo budget, or None"""
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+        limit = 1 if len(key) < 9 else 2
+        shared = {}
+        for gram in _trigrams(key):
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        best = None
+        # Each edit changes at most four trigrams (a transposition), so
+        # fewer shared ones rule a candidate out before computing distances
+        needed = len(_trigrams(key)) - 4 * limit
+        for candidate, count in shared.items():
+            if count < needed:
+                continue
+            distance = edit_distance(key, candidate, limit)
+            if distance <= limit:
+                rank = (distance, self._ids[candidate])
+                if best is None or rank < best:
+                    best = rank
+        return None if best is None else best[1]
+
+    def skill_id(self, name):
+        """Id of a listing skill, adding it to the taxonomy if it is new"""
+        key = skill_key(name)
+        skill_id = self._ids.get(key)
+        if skill_id is None and key:
+            with self._lock:
+                skill_id = self._ids.get(key)
+                if skill_id is None:
+                    skill_id = self._add_name(name)
+                    # Earlier parses may have missed the new skill
+                    self._parse.cache_clear()
+        return skill_id
+
+    def listing_skills(self, names):
+        """Ids of a listing's required skills"""
+        ids = set()
+        for name in names:
+            skill_id = self._listing_ids.get(name)
+            if skill_id is None:
+                skill_id = self._listing_ids[name] = self.skill_id(name)
+            if skill_id is not None:
+                ids.add(skill_id)
+        return frozenset(ids)
+
+    def parse(self, text):
+        """Ids of the skills in a free-text skills string"""
+        return self._parse(text.lower())
+
+    def _resolve(self, text):
+        ids = set()
+        for part in SEPARATOR_RE.split(text):
+            key = skill_key(part)
+            if not key:
+                continue
+            skill_id = self._ids.get(key)
+            if skill_id is not None:
+                ids.add(skill_id)
+                continue
+            found = [self._ids[match.group()]
+                     for match in self._alias_re.finditer(key)]
+            if found:
+                ids.update(found)
+                continue
+            skill_id = self.correct(key)
+            if skill_id is not None:
+                ids.add(skill_id)
+        return frozenset(ids)
+
+
+taxonomy = SkillTaxonomy()
@@ -126,9 +126,21 @@ async function sendMessage() {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ message })
+            body: JSON.stringify({ message, stream: true })
         });
         
+        // AI answers arrive as a token stream; other replies are plain JSON
+        if (isEventStream(response)) {
+            const messageDiv = addMessageToChat('', 'ai');
+            const messageText = messageDiv.querySelector('.message-content p');
+            typingIndicator.remove();
+            await readEventStream(response, text => {
+                messageText.textContent += text;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            });
+            return;
+        }
+        
         const result = await response.json();
         
         // Remove typing indicator
@@ -139,7 +151,7 @@ async function sendMessage() {
             
             // If there are recommendations, display them
             if (result.recommendations) {
-                displayInternshipRecommendations(result.recommendations);
+                displayInternshipRecommendations(result.recommendations, result.next_cursor);
             }
         } else {
             addMessageToChat('Sorry, I encountered an error. Please try again.', 'ai');
@@ -151,6 +163,60 @@ async function sendMessage() {
     }
 }
 
+function displayInternshipRecommendations(recommendations, nextCursor) {
+    const chatMessages = document.getElementById('chatMessages');
+    if (!chatMessages) return;
+    
+    const resultsDiv = document.createElement('div');
+    resultsDiv.className = 'message ai-message';
+    resultsDiv.innerHTML = `
+        <div class="internships-grid">
+            ${recommendations.map(rec => renderInternshipCard({
+                ...rec.internship,
+                match_score: Math.round(rec.match_score)
+            })).join('')}
+        </div>
+    `;
+    
+    // The ranked catalogue is paged; fetch the next page on demand
+    if (nextCursor) {
+        const loadMoreButton = document.createElement('button');
+        loadMoreButton.className = 'btn btn-outline btn-small';
+        loadMoreButton.textContent = 'Load more internships';
+        loadMoreButton.addEventListener('click', () => {
+            loadMoreButton.remove();
+            loadMoreInternships(nextCursor);
+        });
+        resultsDiv.appendChild(loadMoreButton);
+    }
+    
+    chatMessages.appendChild(resultsDiv);
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
+async function loadMoreInternships(cursor) {
+    try {
+        const response = await fetch('/api/chat', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ message: 'more internships', cursor })
+        });
+        
+        const result = await response.json();
+        
+        if (result.recommendations) {
+            displayInternshipRecommendations(result.recommendations, result.next_cursor);
+        } else {
+            showNotification('Could not load more internships', 'error');
+        }
+    } catch (error) {
+        console.error('Load more error:', error);
+        showNotification('Network error. Please try again.', 'error');
+    }
+}
+
 function addMessageToChat(message, sender) {
     const chatMessages = document.getElementById('chatMessages');
     if (!chatMessages) return;
@@ -169,6 +235,50 @@ function addMessageToChat(message, sender) {
     
     chatMessages.appendChild(messageDiv);
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    
+    return messageDiv;
+}
+
+function isEventStream(response) {
+    const contentType = response.headers.get('Content-Type') || '';
+    return contentType.startsWith('text/event-stream');
+}
+
+// Read a Server-Sent Events response, calling onText for each text chunk.
+// Resolves with the payload of the final 'done' event.
+async function readEventStream(response, onText) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let donePayload = {};
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (!data) continue;
+            
+            const payload = JSON.parse(data);
+            if (eventName === 'done') {
+                donePayload = payload;
+            } else if (payload.text) {
+                onText(payload.text);
+            }
+        }
+    }
+    return donePayload;
 }
 
 function addTypingIndicator() {
@@ -228,49 +338,7 @@ async function loadInternships() {
         }
     ];
     
-    internshipsGrid.innerHTML = internships.map(internship => `
-        <div class="internship-card" data-match="${internship.match_score}">
-            <div class="card-header">
-                <div class="internship-header">
-                    <h3>${internship.title}</h3>
-                    <div class="match-score ${getMatchScoreClass(internship.match_score)}">
-                        ${internship.match_score}% Match
-                    </div>
-                </div>
-                <div class="company-info">
-                    <span class="company">${internship.company}</span>
-                    <span class="location">📍 ${internship.location}</span>
-                </div>
-            </div>
-            <div class="card-content">
-                <p class="description">${internship.description}</p>
-                <div class="internship-details">
-                    <div class="detail-item">
-                        <span class="detail-label">Duration:</span>
-                        <span class="detail-value">${internship.duration}</span>
-                    </div>
-                    <div class="detail-item">
-                        <span class="detail-label">Stipend:</span>
-                        <span class="detail-value">${internship.stipend}</span>
-                    </div>
-                </div>
-                <div class="skills-required">
-                    <h4>Required Skills:</h4>
-                    <div class="skills-list">
-                        ${internship.required_skills.map(skill => `<span class="skill-tag">${skill}</span>`).join('')}
-                    </div>
-                </div>
-            </div>
-            <div class="card-footer">
-                <button class="btn btn-primary btn-small" onclick="applyToInternship(${internship.id})">
-                    Apply Now
-                </button>
-                <button class="btn btn-outline btn-small" onclick="saveInternship(${internship.id})">
-                    Save for Later
-                </button>
-            </div>
-        </div>
-    `).join('');
+    internshipsGrid.innerHTML = internships.map(renderInternshipCard).join('');
     
     // Add CSS for internship cards if not already present
     if (!document.querySelector('#internship-styles')) {
@@ -380,6 +448,52 @@ async function loadInternships() {
     }
 }
 
+function renderInternshipCard(internship) {
+    return `
+    <div class="internship-card" data-match="${internship.match_score}">
+        <div class="card-header">
+            <div class="internship-header">
+                <h3>${internship.title}</h3>
+                <div class="match-score ${getMatchScoreClass(internship.match_score)}">
+                    ${internship.match_score}% Match
+                </div>
+            </div>
+            <div class="company-info">
+                <span class="company">${internship.company}</span>
+                <span class="location">📍 ${internship.location}</span>
+            </div>
+        </div>
+        <div class="card-content">
+            <p class="description">${internship.description}</p>
+            <div class="internship-details">
+                <div class="detail-item">
+                    <span class="detail-label">Duration:</span>
+                    <span class="detail-value">${internship.duration}</span>
+                </div>
+                <div class="detail-item">
+                    <span class="detail-label">Stipend:</span>
+                    <span class="detail-value">${internship.stipend}</span>
+                </div>
+            </div>
+            <div class="skills-required">
+                <h4>Required Skills:</h4>
+                <div class="skills-list">
+                    ${internship.required_skills.map(skill => `<span class="skill-tag">${skill}</span>`).join('')}
+                </div>
+            </div>
+        </div>
+        <div class="card-footer">
+            <button class="btn btn-primary btn-small" onclick="applyToInternship(${internship.id})">
+                Apply Now
+            </button>
+            <button class="btn btn-outline btn-small" onclick="saveInternship(${internship.id})">
+                Save for Later
+            </button>
+        </div>
+    </div>
+    `;
+}
+
 async function loadCommunicationScenarios() {
     const scenariosGrid = document.getElementById('scenariosGrid');
     if (!scenariosGrid) return;
@@ -619,10 +733,23 @@ async function submitScenarioResponse() {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ user_response: userResponse })
+            body: JSON.stringify({ user_response: userResponse, stream: true })
         });
         
-        const result = await response.json();
+        let result;
+        if (isEventStream(response)) {
+            // Show the coach's feedback as it is generated
+            let coachResponse = '';
+            updateTrainingModal('');
+            result = await readEventStream(response, text => {
+                coachResponse += text;
+                const scenarioIntro = document.querySelector('.scenario-intro p');
+                if (scenarioIntro) scenarioIntro.textContent = coachResponse;
+            });
+            result.coach_response = coachResponse;
+        } else {
+            result = await response.json();
+        }
         
         if (result.success) {
             if (result.scenario_complete) {
@@ -0,0 +1,9 @@
+"""Keep the app off the instance databases while tests import it"""
+import os
+import tempfile
+
+_instance = tempfile.mkdtemp(prefix='mentora-tests-')
+os.environ.setdefault('MENTORA_SESSION_BACKEND', 'memory')
+os.environ.setdefault('MENTORA_INTRO_POOL_DB', '')
+os.environ.setdefault('MENTORA_CATALOGUE_DB',
+                      os.path.join(_instance, 'catalogue.db'))
@@ -0,0 +1,86 @@
+"""Chat routing decisions, as /api/chat made them with its if/elif chain"""
+import pytest
+
+from app import chat_router
+from benchmarks.bench_intent_router import legacy_route, make_messages
+from intent_router import IntentRouter
+
+
+@pytest.mark.parametrize('message, intent', [
+    ('Show me more internships', 'all_internships'),
+    ('Any other opportunities?', 'all_internships'),
+    ('Can we practice an interview?', 'interview_practice'),
+    ('I want a mock interview', 'interview_practice'),
+    ('Feedback on my interview answer please', 'interview_practice'),
+    ('How do I network at conferences?', 'networking'),
+    ('Should I update my LinkedIn?', 'networking'),
+    ('How do I connect with alumni?', 'networking'),
+    ('What career path suits me?', 'career_trajectory'),
+    ('Analyze my trajectory', 'career_trajectory'),
+    ('Help me write a career plan', 'career_trajectory'),
+])
+def test_each_intent(message, intent):
+    assert chat_router.route(message) == intent
+
+
+@pytest.mark.parametrize('message', [
+    'MORE INTERNSHIPS', 'Mock INTERVIEW', 'linkedIN', 'Career Path'
+])
+def test_case_insensitive(message):
+    assert chat_router.route(message) != 'career_guidance'
+
+
+@pytest.mark.parametrize('message, intent', [
+    # all_internships > interview_practice > networking > career_trajectory
+    ('more internships for interview practice', 'all_internships'),
+    ('other opportunities to network', 'all_internships'),
+    ('mock interview for a networking event', 'interview_practice'),
+    ('interview feedback on my career path', 'interview_practice'),
+    ('connect me with people on my career path', 'networking'),
+    ('linkedin trajectory', 'networking'),
+])
+def test_priority_when_keywords_overlap(message, intent):
+    assert chat_router.route(message) == intent
+
+
+@pytest.mark.parametrize('message', [
+    '',
+    'What should I learn next?',
+    # Each needs a keyword from both groups
+    'I have an interview tomorrow',
+    'Can I practice more?',
+    # Substrings of a keyword do not count
+    'more internship', 'career', 'path plan',
+])
+def test_fallthrough_to_career_guidance(message):
+    assert chat_router.route(message) == 'career_guidance'
+
+
+def test_keywords_match_inside_words():
+    # Substring tests, as before: "reconnecting" contains "connect"
+    assert chat_router.route('reconnecting with my team') == 'networking'
+    assert chat_router.route('networking') == 'networking'
+
+
+def test_matches_the_original_chain():
+    for message in make_messages(5000, seed=3):
+        assert chat_router.route(message) == legacy_route(message), message
+
+
+def test_registration_order_breaks_priority_ties():
+    router = IntentRouter(default='none')
+    router.register('first', ['apple'])
+    router.register('second', ['apple', 'pear'])
+    router.register('urgent', ['pear'], priority=1)
+    assert router.route('apple') == 'first'
+    assert router.route('apple pear') == 'urgent'
+    assert router.route('plum') == 'none'
+    assert router.keywords_in('Apple and pear') == {'apple', 'pear'}
+
+
+def test_register_rejects_empty_rules():
+    router = IntentRouter()
+    with pytest.raises(ValueError):
+        router.register('nothing')
+    with pytest.raises(ValueError):
+        router.register('empty group', ['word'], [])
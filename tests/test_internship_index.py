@@ -0,0 +1,111 @@
+"""Indexed recommendations against a brute-force scan of the catalogue"""
+import random
+
+import pytest
+
+from app import InternshipMatcher, display_score
+from benchmarks.synthetic import GOAL_WORDS, make_internships, make_profiles
+from recommendation_cache import RecommendationCache
+
+
+def full_scan(matcher, profile, limit=5, min_score=20):
+    """(id, exact score) of the best listings, ties in catalogue order"""
+    scored = [(matcher.calculate_match_score(profile, internship), internship)
+              for internship in matcher.catalogue.documents()
+              if internship is not None]
+    if min_score is not None:
+        scored = [(score, internship) for score, internship in scored
+                  if score > min_score]
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [(internship['id'], score) for score, internship in scored[:limit]]
+
+
+def recommended(matcher, profile, limit=5, min_score=20):
+    return [(result['internship']['id'], result['match_score'])
+            for result in matcher.get_recommendations(
+                profile, limit=limit, min_score=min_score)]
+
+
+def assert_matches_full_scan(matcher, profile, limit=5, min_score=20):
+    expected = full_scan(matcher, profile, limit, min_score)
+    index = matcher.index
+    exact = [(index.internships[position]['id'], score)
+             for position, score in index.top_k(profile, k=limit,
+                                                min_score=min_score)]
+    assert exact == expected, profile
+    assert recommended(matcher, profile, limit, min_score) == \
+        [(listing_id, display_score(score)) for listing_id, score in expected]
+
+
+def varied_profiles(count, seed):
+    """Synthetic profiles, some with interests or loosely written skills"""
+    rng = random.Random(seed)
+    profiles = make_profiles(count, seed)
+    for profile in profiles:
+        if rng.random() < 0.5:
+            profile['interests'] = ' '.join(rng.sample(GOAL_WORDS, 2))
+        if rng.random() < 0.3:
+            profile['skills'] = profile['skills'].lower().replace(', ', '; ')
+        if rng.random() < 0.1:
+            del profile[rng.choice(['degree', 'skills', 'experience_level'])]
+    return profiles
+
+
+def make_matcher(internships):
+    return InternshipMatcher(internships, cache=RecommendationCache(0))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_top_5_matches_full_scan(seed):
+    matcher = make_matcher(make_internships(500, seed))
+    for profile in varied_profiles(100, seed + 10):
+        assert_matches_full_scan(matcher, profile)
+
+
+def test_ties_keep_catalogue_order():
+    # Every listing appears four times, so most scores are tied
+    listings = make_internships(50, seed=3)
+    internships = [dict(listing, id=copy * 100 + listing['id'])
+                   for listing in listings for copy in range(4)]
+    matcher = make_matcher(internships)
+    for profile in varied_profiles(50, seed=4):
+        assert_matches_full_scan(matcher, profile, limit=10)
+
+
+@pytest.mark.parametrize('min_score', [None, 0, 20, 45, 70, 100])
+@pytest.mark.parametrize('limit', [0, 1, 5, 25])
+def test_min_score_and_limit(min_score, limit):
+    matcher = make_matcher(make_internships(300, seed=5))
+    for profile in varied_profiles(30, seed=6):
+        assert_matches_full_scan(matcher, profile, limit, min_score)
+
+
+def test_listing_changes_patch_the_index():
+    rng = random.Random(7)
+    matcher = make_matcher(make_internships(300, seed=7))
+    index = matcher.index
+    profiles = varied_profiles(30, seed=8)
+    replacements = iter(make_internships(200, seed=9))
+    next_id = 1000
+    for _ in range(60):
+        live = [position for position, internship in
+                enumerate(matcher.catalogue.documents())
+                if internship is not None]
+        action = rng.choice(['add', 'update', 'remove'])
+        listing = dict(next(replacements), id=next_id)
+        next_id += 1
+        if action == 'add':
+            matcher.add_internship(listing)
+        elif action == 'update':
+            matcher.update_internship(rng.choice(live), listing)
+        else:
+            matcher.remove_internship(rng.choice(live))
+        # Changed through set_listing/remove_listing, not a rebuild
+        assert matcher.index is index
+        for profile in rng.sample(profiles, 5):
+            assert_matches_full_scan(matcher, profile)
+    # The whole ranking, down to the listings scoring 0 and never indexed
+    everything = matcher.catalogue.positions()
+    for profile in profiles[:10] + [{}]:
+        assert_matches_full_scan(matcher, profile, limit=everything,
+                                 min_score=None)
@@ -0,0 +1,65 @@
+"""Server-side session ids are rotated on login"""
+import time
+
+import pytest
+
+from app import app
+from session_store import (MemorySessionBackend, ServerSideSessionInterface,
+                           SQLiteSessionBackend)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def interface(request, tmp_path, monkeypatch):
+    backend = MemorySessionBackend() if request.param == 'memory' else \
+        SQLiteSessionBackend(str(tmp_path / 'sessions.db'))
+    interface = ServerSideSessionInterface(backend, purge_every=0)
+    monkeypatch.setattr(app, 'session_interface', interface)
+    return interface
+
+
+def plant(interface, client, sid, data):
+    """Store ``data`` under ``sid`` and give ``client`` its cookie"""
+    interface.backend.save(sid, interface.serializer.dumps(data),
+                           time.time() + 3600)
+    client.set_cookie(app.config['SESSION_COOKIE_NAME'],
+                      interface._signer(app).sign(sid).decode())
+
+
+def test_login_rotates_a_planted_session_id(interface):
+    victim = app.test_client()
+    plant(interface, victim, 'planted', {'user_xp': 30})
+    interface.backend.append_history('planted', [{'title': 'Older'}])
+
+    response = victim.post('/api/login', json={'email': 'a@example.com',
+                                                'role': 'student'})
+    assert response.get_json()['success']
+    assert interface.backend.load('planted') is None
+    assert interface.backend.load_history('planted') == []
+
+    # The victim's session moved, with its data and history
+    with victim.session_transaction() as session:
+        assert session.sid != 'planted'
+        assert session['user_email'] == 'a@example.com'
+        assert session['user_xp'] == 30
+        assert session.load_history()[-1] == {'title': 'Older'}
+
+    # Whoever planted the id gets a fresh, anonymous session with it
+    attacker = app.test_client()
+    plant_cookie = interface._signer(app).sign('planted').decode()
+    attacker.set_cookie(app.config['SESSION_COOKIE_NAME'], plant_cookie)
+    with attacker.session_transaction() as session:
+        assert 'user_email' not in session
+
+
+def test_login_without_a_session_gets_a_new_id(interface):
+    client = app.test_client()
+    client.post('/api/login', json={'email': 'b@example.com',
+                                    'role': 'mentor'})
+    with client.session_transaction() as session:
+        first = session.sid
+        assert session['user_role'] == 'mentor'
+    client.post('/api/login', json={'email': 'b@example.com',
+                                    'role': 'mentor'})
+    with client.session_transaction() as session:
+        assert session.sid != first
+    assert interface.backend.load(first) is None
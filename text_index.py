@@ -0,0 +1,227 @@
+"""Sparse TF-IDF index over listing text, for goal alignment and retrieval"""
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset("""
+a about an and are as at be but by for from get in into is it its of on or
+our so that the their them this to up we will with work working you your
+i me my want would like become intern internship internships role job
+""".split())
+
+
+def _stem(token):
+    # Plurals only; enough to match "models" with "model"
+    if len(token) > 4 and token.endswith('s') and \
+            not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def text_terms(text):
+    """Term counts of ``text``, stopwords removed"""
+    counts = {}
+    for token in TOKEN_RE.findall(text.lower()):
+        if token not in STOPWORDS:
+            term = _stem(token)
+            counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class TextIndex:
+    """TF-IDF vectors of a set of documents, stored as postings.
+
+    Weights are ``(1 + log tf) * idf``, with each document vector scaled to
+    unit length, so the dot product with a unit query vector is their cosine
+    similarity. ``scores`` accumulates exact similarities over the postings
+    of the query's terms only; ``top_n`` finds the best few with the
+    threshold algorithm, reading each posting list from its highest weight
+    down and stopping once no unseen document can beat the current top.
+
+    Documents added or removed later are weighted with the document
+    frequencies counted when the index was built, so no other document's
+    vector changes; build a new index to refresh them.
+    """
+
+    def __init__(self, term_counts, stats=None):
+        """Index documents given as ``{term: count}`` dicts, in order.
+
+        A None document leaves its position empty. ``stats`` is the
+        term_statistics of a whole corpus these documents are one part of;
+        weights and the vocabulary queries use are then the corpus's, so
+        every part scores alike.
+        """
+        documents = list(term_counts)
+        self.count, self.document_frequency = \
+            stats or self.term_statistics(documents)
+
+        self._idf = {}
+        # term -> (positions ascending, weights)
+        self.postings = {}
+        # Terms a query keeps; postings is updated as documents change
+        self.vocabulary = self.document_frequency if stats else self.postings
+        # term -> indexes into its postings by weight, highest first; built
+        # on first use and dropped whenever the postings change
+        self._by_weight = {}
+        for position, terms in enumerate(documents):
+            if terms is None:
+                continue
+            for term, weight in self.document_vector(terms).items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = (array('i'), array('d'))
+                posting[0].append(position)
+                posting[1].append(weight)
+
+    @staticmethod
+    def term_statistics(term_counts):
+        """(document count, document frequency per term) of documents"""
+        count = 0
+        document_frequency = {}
+        for terms in term_counts:
+            if terms is None:
+                continue
+            count += 1
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        return count, document_frequency
+
+    def add_document(self, position, terms):
+        """Index a document at an empty position; returns new terms"""
+        new_terms = set()
+        for term, weight in self.document_vector(terms).items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array('i'), array('d'))
+                new_terms.add(term)
+            i = bisect_left(posting[0], position)
+            posting[0].insert(i, position)
+            posting[1].insert(i, weight)
+            self._by_weight.pop(term, None)
+        return new_terms
+
+    def remove_document(self, position, terms):
+        """Drop the document with ``terms``; returns terms no longer used"""
+        gone = set()
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            positions, weights = posting
+            i = bisect_left(positions, position)
+            if i < len(positions) and positions[i] == position:
+                del positions[i]
+                del weights[i]
+                self._by_weight.pop(term, None)
+                if not positions:
+                    del self.postings[term]
+                    gone.add(term)
+        return gone
+
+    def _ordered(self, term):
+        by_weight = self._by_weight.get(term)
+        if by_weight is None:
+            weights = self.postings[term][1]
+            by_weight = self._by_weight[term] = array(
+                'i', sorted(range(len(weights)), key=weights.__getitem__,
+                            reverse=True))
+        return by_weight
+
+    def idf(self, term):
+        # Frequencies are fixed after the build, so each term's is too
+        idf = self._idf.get(term)
+        if idf is None:
+            idf = self._idf[term] = math.log(
+                (1 + self.count) /
+                (1 + self.document_frequency.get(term, 0))) + 1
+        return idf
+
+    def document_vector(self, terms):
+        """Unit TF-IDF vector, ``{term: weight}`` in term order"""
+        weights = {
+            term: (1 + math.log(count)) * self.idf(term)
+            for term, count in sorted(terms.items())
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        if not norm:
+            return {}
+        return {term: weight / norm for term, weight in weights.items()}
+
+    def query_vector(self, text):
+        """Unit vector of ``text`` over the terms the documents use"""
+        return self.document_vector({
+            term: count
+            for term, count in text_terms(text).items()
+            if term in self.vocabulary
+        })
+
+    @staticmethod
+    def dot(query, vector):
+        return sum(weight * vector.get(term, 0.0)
+                   for term, weight in query.items())
+
+    def scores(self, query):
+        """Map position -> similarity for every document sharing a term"""
+        scores = {}
+        for term, query_weight in query.items():
+            # An index over part of a corpus lacks some of its terms
+            positions, weights = self.postings.get(term, ((), ()))
+            for position, weight in zip(positions, weights):
+                scores[position] = scores.get(position, 0.0) + \
+                    query_weight * weight
+        return scores
+
+    def _score(self, query, position):
+        """Similarity of one document, looked up in the postings"""
+        score = 0
+        for term, query_weight in query.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            positions, weights = posting
+            i = bisect_left(positions, position)
+            if i < len(positions) and positions[i] == position:
+                score += query_weight * weights[i]
+        return score
+
+    def top_n(self, query, n):
+        """Best ``n`` (position, similarity) pairs above 0, best first.
+
+        Ties keep catalogue order.
+        """
+        if n <= 0 or not query:
+            return []
+        lists = [(query_weight, self.postings[term][0],
+                  self.postings[term][1], self._ordered(term))
+                 for term, query_weight in query.items()
+                 if term in self.postings]
+        heap = []  # min-heap of (similarity, -position)
+        seen = set()
+        depth = 0
+        while True:
+            threshold = 0.0
+            advanced = False
+            for query_weight, positions, weights, by_weight in lists:
+                if depth >= len(by_weight):
+                    continue
+                advanced = True
+                i = by_weight[depth]
+                threshold += query_weight * weights[i]
+                position = positions[i]
+                if position in seen:
+                    continue
+                seen.add(position)
+                key = (self._score(query, position), -position)
+                if len(heap) < n:
+                    heapq.heappush(heap, key)
+                elif key > heap[0]:
+                    heapq.heapreplace(heap, key)
+            # Unseen documents score at most ``threshold``
+            if not advanced or (len(heap) == n and heap[0][0] > threshold):
+                break
+            depth += 1
+        return [(-negated, score)
+                for score, negated in sorted(heap, reverse=True)]
@@ -0,0 +1,218 @@
+"""Local tone analysis: readability, hedging, fillers, formality, confidence.
+
+Runs in well under a millisecond per paragraph with no AI call, and returns
+plain dicts that can be charted. All lexicons are compiled at import time
+into one trie-shaped regex, so each text is scanned once however many
+phrases they hold.
+"""
+import re
+import statistics
+
+from intent_router import trie_pattern
+
+HEDGES = [
+    "i think", "i believe", "i feel like", "i guess", "i suppose",
+    "maybe", "perhaps", "possibly", "probably", "might", "could be",
+    "sort of", "kind of", "somewhat", "a little", "a bit", "i'm not sure",
+    "not sure", "i hope", "hopefully", "just", "seems", "it seems",
+    "in my opinion", "i would say", "more or less", "try to"
+]
+FILLERS = [
+    "um", "uh", "er", "erm", "you know", "i mean", "basically", "actually",
+    "literally", "honestly", "totally", "really", "very", "like i said",
+    "anyway", "whatever", "and stuff", "or something", "stuff like that"
+]
+CONFIDENT = [
+    "i will", "i am confident", "i'm confident", "i can", "i led",
+    "i delivered", "i achieved", "i built", "i created", "i managed",
+    "i improved", "i increased", "i reduced", "i recommend", "i am sure",
+    "definitely", "certainly", "clearly", "confident", "proven",
+    "successfully", "accomplished", "ensure", "committed", "decided"
+]
+FORMAL = [
+    "therefore", "furthermore", "moreover", "however", "consequently",
+    "regarding", "additionally", "sincerely", "respectfully", "kindly",
+    "please find", "i would appreciate", "thank you for", "accordingly",
+    "nevertheless", "in addition", "with respect to", "i look forward"
+]
+INFORMAL = [
+    "hey", "hi there", "yeah", "yep", "nope", "gonna", "wanna", "gotta",
+    "kinda", "sorta", "cool", "awesome", "stuff", "guys", "lol", "btw",
+    "thanks a lot", "no worries", "super", "pretty much", "ok", "okay"
+]
+
+LEXICON = {}
+for category, phrases in (('hedge', HEDGES), ('filler', FILLERS),
+                          ('confident', CONFIDENT), ('formal', FORMAL),
+                          ('informal', INFORMAL)):
+    for phrase in phrases:
+        LEXICON[phrase] = category
+
+PHRASE_RE = re.compile(r"\b(?:" + trie_pattern(LEXICON) + r")\b(?!')")
+WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+CONTRACTION_RE = re.compile(r"\b[a-z]+'(?:t|s|re|ve|ll|d|m)\b")
+SENTENCE_END_RE = re.compile(r"[.!?]+(?:\s+|$)")
+VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+# Upper bounds of the sentence length histogram buckets, in words
+SENTENCE_BUCKETS = (10, 20, 30)
+
+
+def _normalize(text):
+    text = text.lower().replace('’', "'").replace('‘', "'")
+    return ' '.join(text.split())
+
+
+def _syllables(word):
+    count = len(VOWEL_GROUP_RE.findall(word))
+    if word.endswith('e') and not word.endswith(('le', 'ee')) and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+def _per_100(count, words):
+    return round(count * 100 / words, 2) if words else 0.0
+
+
+def _histogram(lengths):
+    labels = []
+    low = 1
+    for high in SENTENCE_BUCKETS:
+        labels.append((f'{low}-{high}', high))
+        low = high + 1
+    histogram = {label: 0 for label, _ in labels}
+    histogram[f'{low}+'] = 0
+    for length in lengths:
+        for label, high in labels:
+            if length <= high:
+                histogram[label] += 1
+                break
+        else:
+            histogram[f'{low}+'] += 1
+    return histogram
+
+
+def analyze_tone(text):
+    """Tone metrics for ``text`` as a JSON-ready dict"""
+    normalized = _normalize(text)
+    words = WORD_RE.findall(normalized)
+    word_count = len(words)
+    sentences = [
+        sentence for sentence in SENTENCE_END_RE.split(normalized)
+        if WORD_RE.search(sentence)
+    ]
+    lengths = [len(WORD_RE.findall(sentence)) for sentence in sentences]
+
+    counts = dict.fromkeys(('hedge', 'filler', 'confident', 'formal',
+                            'informal'), 0)
+    found = {category: [] for category in counts}
+    for match in PHRASE_RE.finditer(normalized):
+        phrase = match.group()
+        category = LEXICON[phrase]
+        counts[category] += 1
+        if phrase not in found[category]:
+            found[category].append(phrase)
+    contractions = len(CONTRACTION_RE.findall(normalized))
+
+    if word_count and lengths:
+        syllables = sum(_syllables(word) for word in words)
+        words_per_sentence = word_count / len(lengths)
+        syllables_per_word = syllables / word_count
+        reading_ease = 206.835 - 1.015 * words_per_sentence - \
+            84.6 * syllables_per_word
+        grade = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+    else:
+        reading_ease = grade = 0.0
+
+    # -1 (casual) .. 1 (formal); contractions count half as casual
+    formal_signals = counts['formal']
+    informal_signals = counts['informal'] + contractions / 2
+    formality = (formal_signals - informal_signals) / \
+        (formal_signals + informal_signals) \
+        if formal_signals + informal_signals else 0.0
+    # 0 (tentative) .. 100 (assertive), 50 when there are no signals
+    doubt = counts['hedge'] + counts['filler'] / 2
+    confidence = 100 * (counts['confident'] + 1) / \
+        (counts['confident'] + doubt + 2)
+
+    analysis = {
+        'word_count': word_count,
+        'sentence_count': len(lengths),
+        'readability': {
+            'flesch_reading_ease': round(max(0.0, min(100.0, reading_ease)), 1),
+            'grade_level': round(max(0.0, grade), 1)
+        },
+        'sentence_length': {
+            'mean': round(statistics.mean(lengths), 1) if lengths else 0,
+            'median': statistics.median(lengths) if lengths else 0,
+            'max': max(lengths, default=0),
+            'histogram': _histogram(lengths)
+        },
+        'hedging': {
+            'count': counts['hedge'],
+            'per_100_words': _per_100(counts['hedge'], word_count),
+            'phrases': found['hedge']
+        },
+        'fillers': {
+            'count': counts['filler'],
+            'per_100_words': _per_100(counts['filler'], word_count),
+            'phrases': found['filler']
+        },
+        'formality': {
+            'score': round(formality, 2),
+            'formal_markers': found['formal'],
+            'informal_markers': found['informal'],
+            'contractions': contractions
+        },
+        'confidence': {
+            'score': round(confidence),
+            'markers': found['confident']
+        }
+    }
+    analysis['tone'] = _tone_label(analysis)
+    analysis['suggestions'] = _suggestions(analysis)
+    return analysis
+
+
+def analyze_tones(texts):
+    """analyze_tone for each of ``texts``, in order"""
+    return [analyze_tone(text) for text in texts]
+
+
+def _tone_label(analysis):
+    labels = []
+    formality = analysis['formality']['score']
+    if formality >= 0.3:
+        labels.append('formal')
+    elif formality <= -0.3:
+        labels.append('casual')
+    else:
+        labels.append('neutral')
+    confidence = analysis['confidence']['score']
+    if confidence >= 65:
+        labels.append('confident')
+    elif confidence <= 35:
+        labels.append('tentative')
+    return ', '.join(labels)
+
+
+def _suggestions(analysis):
+    suggestions = []
+    if analysis['hedging']['per_100_words'] > 3:
+        suggestions.append(
+            "Cut hedges like '" + "', '".join(analysis['hedging']['phrases'][:3]) +
+            "' to sound more confident.")
+    if analysis['fillers']['per_100_words'] > 3:
+        suggestions.append(
+            "Drop filler words like '" +
+            "', '".join(analysis['fillers']['phrases'][:3]) + "'.")
+    if analysis['sentence_length']['max'] > 30:
+        suggestions.append("Split sentences over 30 words to keep them clear.")
+    if analysis['word_count'] >= 20 and \
+            analysis['readability']['flesch_reading_ease'] < 40:
+        suggestions.append("Use shorter words and sentences; the text is hard "
+                           "to read.")
+    if analysis['formality']['score'] <= -0.5:
+        suggestions.append("Replace casual words with more professional "
+                           "phrasing for work settings.")
+    return suggestions